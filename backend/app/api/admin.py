@@ -0,0 +1,133 @@
+import asyncio
+import secrets
+from datetime import date, datetime, timedelta
+from typing import Any, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.dependencies import get_mongo_client
+from core.export import export_ndjson, export_query, gzipped
+from core.profiling import ProfilerBusy, collapsed, memory_diff, sample_cpu
+from core.stats import rebuild_task_stats, task_stats
+from core.usage import usage_report
+from schemas import FactCheckLabel, TaskStatus
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token or ""):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+
+# Only mounted when an ADMIN_TOKEN is configured, the profiling router only when PROFILING_ENABLED is set too (see
+# app.main)
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)], include_in_schema=False)
+profiling_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)], include_in_schema=False)
+
+
+@router.get("/usage")
+async def llm_usage(
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    group_by: list[Literal["day", "model", "stage"]] = Query(["model"]),
+    mongo_client=Depends(get_mongo_client),
+) -> list[dict[str, Any]]:
+    """
+    LLM calls, tokens, estimated cost and total latency between ``since`` and ``until`` (inclusive; the last 30 days
+    by default), summed per distinct combination of the ``group_by`` fields, costliest first.
+    """
+    until = until or date.today()
+    since = since or until - timedelta(days=29)
+    # Flushed every USAGE_FLUSH_SECONDS, so the last few seconds of usage may not be counted yet
+    return await usage_report(mongo_client, since, until, list(dict.fromkeys(group_by)))
+
+
+@router.get("/export/{source}", response_class=StreamingResponse)
+async def export(
+    source: Literal["tasks", "articles"],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    task_status: Optional[TaskStatus] = Query(None, alias="status"),
+    label: Optional[FactCheckLabel] = None,
+    fields: list[str] = Query([]),
+    after: Optional[str] = None,
+    accept_encoding: str = Header(default=""),
+    mongo_client=Depends(get_mongo_client),
+) -> StreamingResponse:
+    """
+    Streams all matching tasks or articles as NDJSON in one response (gzip-compressed when the client accepts it),
+    straight from a Mongo cursor. An export that broke off is resumed by passing the ``_cursor`` of the last line
+    received as ``after``.
+    """
+    try:
+        query = export_query(source, since, until, task_status, label, after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    chunks = export_ndjson(mongo_client, source, query, fields)
+    # Fails here, with a status code, if Mongo is down; a failure mid-stream aborts the response instead
+    try:
+        first = await anext(chunks, b"")
+    except PyMongoError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable")
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    if "gzip" in accept_encoding:
+        return StreamingResponse(
+            gzipped(body()), media_type="application/x-ndjson", headers={"Content-Encoding": "gzip"}
+        )
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.post("/stats/rebuild")
+async def rebuild_stats(mongo_client=Depends(get_mongo_client)) -> dict[str, Any]:
+    """Recomputes the task stats served by /api/stats/ from the tasks collection now and returns the new totals."""
+    await rebuild_task_stats(mongo_client)
+    return await task_stats(mongo_client, "hour", 1)
+
+
+@profiling_router.get("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1, le=1000),
+) -> PlainTextResponse:
+    """
+    Samples this worker's stacks for ``seconds`` and returns them as collapsed stacks (one ``stack count`` line each),
+    rooted at the asyncio task or thread that was running; pipe into flamegraph.pl or open in speedscope.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        stacks = await asyncio.to_thread(
+            sample_cpu, loop, min(seconds, settings.max_profile_seconds), interval_ms / 1000
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(collapsed(stacks))
+
+
+@profiling_router.get("/profile/memory")
+async def profile_memory(
+    seconds: float = Query(30, gt=0),
+    group_by: Literal["module", "package"] = "module",
+    limit: int = Query(30, ge=1, le=500),
+) -> list[dict]:
+    """
+    Traces allocations for ``seconds`` and returns the memory still held at the end, grouped by the innermost
+    application module (or package) on each allocation's traceback, largest growth first.
+    """
+    try:
+        return await asyncio.to_thread(
+            memory_diff,
+            min(seconds, settings.max_profile_seconds),
+            settings.tracemalloc_frames,
+            1 if group_by == "package" else None,
+            limit,
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -1,63 +1,223 @@
 from datetime import datetime
-from uuid import uuid4
-from typing import Optional
+from uuid import UUID, uuid4
+from typing import Literal, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
 
 from app.dependencies import get_groq_client, get_openai_client, get_mongo_client
+from app.responses import ModelJSONResponse
 from core import db_is_working
-from core.db import create_task, get_task_status, update_task_status
+from core.admission import AdmissionRejected, Ticket, admission, client_key
+from core.breakers import breaker_states
+from core.cancellation import cancel, run_cancellable
+from core.idempotency import release_idempotency_key, reserve_idempotency_key, submission_key
+from core.scheduler import set_lane
+from core.stats import task_stats
+from core.db import ACTIVE_TASK_STATUSES, claim_task, create_task, get_task_status, record_poll, update_task_status
+from core.jobs import spawn
+from core.metrics import TASKS_RESUMED
+from core.recovery import worker_id
 from core.tasks import process_fact_check_task
+from core.usage import save_task_usage, start_task_usage
 from app.utils.claim_detector import detect_factual_claim
 from schemas import (
     HealthResponse,
     TextInputData,
     TaskResponse,
     TaskStatusResponse,
+    TaskStatsResponse,
     TaskData,
     TaskStatus,
 )
 
 router = APIRouter()
 
+RETRYABLE_STATUSES = [TaskStatus.FAILED, TaskStatus.CANCELLED]
+
 
 @router.get("/health/", response_model=HealthResponse)
 async def health(mongo_client=Depends(get_mongo_client)) -> HealthResponse:
-    return HealthResponse(database_is_working=await db_is_working(mongo_client))
+    return HealthResponse(database_is_working=await db_is_working(mongo_client), upstreams=breaker_states())
+
+
+def _admit(request: Request, api_key: Optional[str], lane: str) -> Ticket:
+    set_lane(lane)
+    try:
+        return admission.admit(client_key(api_key, request.client.host if request.client else None), lane)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _replay(mongo_client, response: Response, task_id: UUID) -> TaskResponse:
+    response.headers["Idempotent-Replayed"] = "true"
+    task = await get_task_status(mongo_client, task_id)
+    if task is None:
+        # The first submission is still in claim detection; its task is about to be created
+        return TaskResponse(
+            task_id=task_id, status=TaskStatus.PENDING, message="Task created and queued for processing"
+        )
+    return TaskResponse(task_id=task_id, status=task.status, message=task.message)
 
 
 @router.post("/verify/text/", response_model=TaskResponse)
 async def verify_news(
     data: TextInputData,
+    request: Request,
+    response: Response,
     background_tasks: BackgroundTasks,
+    x_api_key: Optional[str] = Header(default=None),
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
     groq_client=Depends(get_groq_client),
     openai_client=Depends(get_openai_client),
     mongo_client=Depends(get_mongo_client),
 ) -> TaskResponse:
     task_id = uuid4()
+    # A resend of a submission (same Idempotency-Key, or same input shortly after) gets the original task back. Checked
+    # before admission: a client retrying during overload isn't asking for new work.
+    key = submission_key(client_key(x_api_key, request.client.host if request.client else None), idempotency_key, data)
+    if key is not None:
+        existing = await reserve_idempotency_key(mongo_client, *key, task_id, derived=idempotency_key is None)
+        if existing is not None:
+            if existing["fingerprint"] != key[1]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Idempotency-Key was already used for a different submission",
+                )
+            return await _replay(mongo_client, response, UUID(existing["task_id"]))
 
-    task_data = TaskData(
-        task_id=task_id, status=TaskStatus.PENDING, message="Task created and queued for processing", input_data=data
-    )
+    created = False
+    try:
+        # Shed load before spending a Mongo write and a claim-detection call on a task that can't run soon
+        ticket = _admit(request, x_api_key, data.priority.value)
+    except HTTPException:
+        if key is not None:
+            await release_idempotency_key(mongo_client, key[0], task_id)
+        raise
 
-    await create_task(mongo_client, task_data)
+    try:
+        claim_confidence = None
+        llm_calls = start_task_usage()
+        if data.content.strip():
+            result = await detect_factual_claim(groq_client, data.content)
+            claim_confidence = result.confidence
+            skip_message = None if result.is_factual_claim else "Input is not a factual claim"
+        else:
+            # URL-only submissions verify the article behind the URL
+            skip_message = None if data.url else "Input has neither content nor a url"
 
-    result = await detect_factual_claim(groq_client, data.content)
+        # Created after claim detection so the confidence is on the task: retries and recovery route models with it
+        task_data = TaskData(
+            task_id=task_id,
+            status=TaskStatus.PENDING,
+            message="Task created and queued for processing",
+            input_data=data,
+            worker_id=worker_id(),
+            claim_confidence=claim_confidence,
+        )
+
+        await create_task(mongo_client, task_data)
+        created = True
+        if llm_calls:
+            spawn(save_task_usage(mongo_client, task_id, llm_calls), name=f"usage-{task_id}")
 
-    if not result.is_factual_claim:
-        await update_task_status(mongo_client, task_id, TaskStatus.SKIPPED, "Input is not a factual claim")
-        return TaskResponse(task_id=task_id, status=TaskStatus.SKIPPED, message="Input is not a factual claim")
+        if skip_message:
+            ticket.release()
+            await update_task_status(mongo_client, task_id, TaskStatus.SKIPPED, skip_message)
+            return TaskResponse(task_id=task_id, status=TaskStatus.SKIPPED, message=skip_message)
+    except BaseException:
+        ticket.release()
+        if key is not None and not created:
+            await release_idempotency_key(mongo_client, key[0], task_id)
+        raise
 
-    background_tasks.add_task(process_fact_check_task, task_id, data, groq_client, openai_client, mongo_client)
+    background_tasks.add_task(
+        run_cancellable,
+        task_id,
+        ticket.run,
+        process_fact_check_task,
+        task_id,
+        data,
+        groq_client,
+        openai_client,
+        mongo_client,
+        None,
+        claim_confidence,
+    )
 
     return TaskResponse(task_id=task_id, status=TaskStatus.PENDING, message="Task created and queued for processing")
 
 
+@router.post("/task/{task_id}/retry", response_model=TaskResponse)
+async def retry_task(
+    task_id: UUID,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_api_key: Optional[str] = Header(default=None),
+    groq_client=Depends(get_groq_client),
+    openai_client=Depends(get_openai_client),
+    mongo_client=Depends(get_mongo_client),
+) -> TaskResponse:
+    """
+    Re-runs a failed or cancelled task from its checkpoints: only the stages that hadn't completed are run again.
+    """
+    task = await get_task_status(mongo_client, task_id)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if task.status not in RETRYABLE_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed or cancelled tasks can be retried (task is {task.status.value})",
+        )
+
+    ticket = _admit(request, x_api_key, task.input_data.priority.value)
+    claimed = await claim_task(mongo_client, task_id, RETRYABLE_STATUSES, worker_id(), "Task queued for retry")
+    if claimed is None:
+        ticket.release()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Task is already being retried")
+    task, checkpoints = claimed
+
+    TASKS_RESUMED.labels(trigger="retry").inc()
+    background_tasks.add_task(
+        run_cancellable,
+        task.task_id,
+        ticket.run,
+        process_fact_check_task,
+        task.task_id,
+        task.input_data,
+        groq_client,
+        openai_client,
+        mongo_client,
+        checkpoints,
+        task.claim_confidence,
+    )
+    return TaskResponse(task_id=task.task_id, status=TaskStatus.PENDING, message="Task queued for retry")
+
+
+@router.delete("/task/{task_id}", response_model=TaskResponse)
+async def cancel_task_endpoint(task_id: UUID, mongo_client=Depends(get_mongo_client)) -> TaskResponse:
+    """
+    Cancels a task that hasn't finished: its pending upstream calls are aborted and none of its results are stored.
+    Its checkpoints are kept, so a retry picks up where it stopped.
+    """
+    if await cancel(mongo_client, task_id, "client", "Cancelled by the client") is None:
+        task = await get_task_status(mongo_client, task_id)
+        if task is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Task has already finished (task is {task.status.value})"
+        )
+    return TaskResponse(task_id=task_id, status=TaskStatus.CANCELLED, message="Cancelled by the client")
+
+
 @router.get("/task/{task_id}/status", response_model=TaskStatusResponse)
 async def get_task_status_endpoint(
     task_id: str,
     mongo_client=Depends(get_mongo_client),
-) -> TaskStatusResponse:
+) -> ModelJSONResponse:
     try:
         from uuid import UUID
 
@@ -65,36 +225,62 @@ async def get_task_status_endpoint(
         task_data = await get_task_status(mongo_client, task_uuid)
 
         if not task_data:
-            return TaskStatusResponse(
-                task_id=task_uuid,
+            return ModelJSONResponse(
+                TaskStatusResponse.model_construct(
+                    task_id=task_uuid,
+                    status=TaskStatus.FAILED,
+                    message="Task not found",
+                    result=None,
+                    fallacy_result=None,
+                    created_at=datetime.now(),
+                    updated_at=datetime.now(),
+                )
+            )
+
+        abandon_after = task_data.input_data.abandon_after_seconds
+        if abandon_after and task_data.status in ACTIVE_TASK_STATUSES:
+            # Keeps the task from being cancelled as abandoned; a few writes per timeout at most
+            await record_poll(mongo_client, task_uuid, abandon_after / 4)
+
+        # task_data was validated when it was read from Mongo, so the response can be built without re-validating
+        return ModelJSONResponse(
+            TaskStatusResponse.model_construct(
+                task_id=task_data.task_id,
+                status=task_data.status,
+                message=task_data.message,
+                result=task_data.result,
+                created_at=task_data.created_at,
+                updated_at=task_data.updated_at,
+                fallacy_result=task_data.fallacy_result,
+                retryable=task_data.retryable,
+            )
+        )
+
+    except ValueError:
+        return ModelJSONResponse(
+            TaskStatusResponse.model_construct(
+                task_id=task_uuid if "task_uuid" in locals() else uuid4(),
                 status=TaskStatus.FAILED,
-                message="Task not found",
+                message="Invalid task ID format",
                 result=None,
                 fallacy_result=None,
                 created_at=datetime.now(),
                 updated_at=datetime.now(),
             )
-
-        return TaskStatusResponse(
-            task_id=task_data.task_id,
-            status=task_data.status,
-            message=task_data.message,
-            result=task_data.result,
-            created_at=task_data.created_at,
-            updated_at=task_data.updated_at,
-            fallacy_result=task_data.fallacy_result,
         )
 
-    except ValueError:
-        return TaskStatusResponse(
-            task_id=task_uuid if "task_uuid" in locals() else uuid4(),
-            status=TaskStatus.FAILED,
-            message="Invalid task ID format",
-            result=None,
-            fallacy_result=None,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
+
+@router.get("/stats/", response_model=TaskStatsResponse)
+async def get_task_stats(
+    bucket: Literal["hour", "day"] = "hour",
+    limit: int = Query(24, ge=1, le=168),
+    mongo_client=Depends(get_mongo_client),
+) -> TaskStatsResponse:
+    """
+    Task counts per status and verdict label, and tasks created / completed / failed / skipped / cancelled per hour or
+    day over the last ``limit`` buckets. Served from counters updated on each status change, not from a scan of the tasks.
+    """
+    return TaskStatsResponse.model_validate(await task_stats(mongo_client, bucket, limit))
 
 
 @router.get("/tasks/", response_model=list[TaskStatusResponse])
@@ -103,7 +289,7 @@ async def get_all_tasks(
     skip: int = 0,
     status: Optional[TaskStatus] = None,
     mongo_client=Depends(get_mongo_client),
-) -> list[TaskStatusResponse]:
+) -> ModelJSONResponse:
     try:
         from core.db import get_all_tasks
 
@@ -112,17 +298,21 @@ async def get_all_tasks(
 
         tasks = await get_all_tasks(mongo_client, limit=limit, skip=skip, status_filter=status)
 
-        return [
-            TaskStatusResponse(
-                task_id=task.task_id,
-                status=task.status,
-                message=task.message,
-                result=task.result,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-            )
-            for task in tasks
-        ]
+        return ModelJSONResponse(
+            [
+                TaskStatusResponse.model_construct(
+                    task_id=task.task_id,
+                    status=task.status,
+                    message=task.message,
+                    result=task.result,
+                    fallacy_result=None,
+                    created_at=task.created_at,
+                    updated_at=task.updated_at,
+                    retryable=task.retryable,
+                )
+                for task in tasks
+            ]
+        )
 
     except Exception as e:
-        return []
+        return ModelJSONResponse([])
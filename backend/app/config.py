@@ -1,8 +1,18 @@
-from typing import Optional
-from pydantic import Field
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class LLMModel(BaseModel):
+    """Model registry entry: prices in USD per million tokens, context window in tokens, typical call latency."""
+
+    provider: Literal["groq", "openai"]
+    prompt_price: float
+    completion_price: float
+    context_tokens: int
+    median_seconds: float
+
+
 class Settings(BaseSettings):
     env: str = Field(default="dev", env="ENV")
     debug: bool = False
@@ -15,6 +25,162 @@ class Settings(BaseSettings):
 
     host: str = "0.0.0.0"
     port: int = Field(default=8000, env="PORT")
+    # Production server (run.py --prod); 0 workers means one per CPU
+    workers: int = Field(default=0, env="WORKERS")
+    graceful_timeout: int = Field(default=60, env="GRACEFUL_TIMEOUT")
+    job_drain_timeout: int = Field(default=10, env="JOB_DRAIN_TIMEOUT")
+
+    # Admission control for fact-check tasks, per worker process; 0 disables the per-client limit
+    max_running_tasks: int = Field(default=16, env="MAX_RUNNING_TASKS")
+    max_queued_tasks: int = Field(default=64, env="MAX_QUEUED_TASKS")
+    max_tasks_per_client: int = Field(default=8, env="MAX_TASKS_PER_CLIENT")
+    # API keys (JSON list) that identify a client by their X-API-Key header; other callers are keyed by address
+    client_api_keys: list[str] = Field(default=[], env="CLIENT_API_KEYS")
+
+    # Interactive/bulk priority lanes (see core.scheduler): share of each slot pool bulk work can't take, and the
+    # interactive lane's weight when both lanes are waiting
+    interactive_reserved_share: float = Field(default=0.25, env="INTERACTIVE_RESERVED_SHARE")
+    interactive_weight: float = Field(default=4.0, env="INTERACTIVE_WEIGHT")
+    llm_concurrency: int = Field(default=32, env="LLM_CONCURRENCY")
+    cse_concurrency: int = Field(default=8, env="CSE_CONCURRENCY")
+
+    # Cached verdict freshness per label (see core.freshness): served as-is while younger than the fresh window,
+    # served and re-checked in the background until the expiry, a cache miss after that
+    verdict_fresh_hours: dict[str, float] = Field(
+        default={"correct": 24, "incorrect": 24 * 7, "misleading": 12}, env="VERDICT_FRESH_HOURS"
+    )
+    verdict_expire_hours: dict[str, float] = Field(
+        default={"correct": 24 * 14, "incorrect": 24 * 90, "misleading": 24 * 7}, env="VERDICT_EXPIRE_HOURS"
+    )
+    verdict_default_fresh_hours: float = Field(default=24, env="VERDICT_DEFAULT_FRESH_HOURS")
+    verdict_default_expire_hours: float = Field(default=24 * 14, env="VERDICT_DEFAULT_EXPIRE_HOURS")
+    # At most one background re-check per claim in this window, across workers
+    revalidation_interval_minutes: int = Field(default=60, env="REVALIDATION_INTERVAL_MINUTES")
+
+    # Claim decomposition (TextInputData.decompose_claims): claims kept per submission and verified concurrently
+    max_atomic_claims: int = Field(default=5, env="MAX_ATOMIC_CLAIMS")
+    claim_fanout_concurrency: int = Field(default=5, env="CLAIM_FANOUT_CONCURRENCY")
+
+    # Articles fetched for URL-only submissions are reused for this long by every URL variant that resolves to them
+    page_cache_hours: int = Field(default=24, env="PAGE_CACHE_HOURS")
+
+    # Local evidence corpus (core.evidence): web search is skipped when enough recent passages from sources scoring
+    # at least corpus_min_score in websites.csv cover corpus_min_coverage of the claim's (idf-weighted) terms
+    corpus_enabled: bool = Field(default=True, env="CORPUS_ENABLED")
+    corpus_max_age_hours: int = Field(default=72, env="CORPUS_MAX_AGE_HOURS")
+    corpus_min_passages: int = Field(default=3, env="CORPUS_MIN_PASSAGES")
+    corpus_min_score: float = Field(default=6.0, env="CORPUS_MIN_SCORE")
+    corpus_min_coverage: float = Field(default=0.6, env="CORPUS_MIN_COVERAGE")
+
+    # Per-task latency budget, counted from when the task starts running (see core.deadline). Evidence fetches
+    # still running when only verdict_reserve_seconds are left are cut off, after at least min_evidence_seconds.
+    task_deadline_seconds: float = Field(default=45, env="TASK_DEADLINE_SECONDS")
+    max_task_deadline_seconds: float = Field(default=180, env="MAX_TASK_DEADLINE_SECONDS")
+    verdict_reserve_seconds: float = Field(default=12, env="VERDICT_RESERVE_SECONDS")
+    min_evidence_seconds: float = Field(default=2, env="MIN_EVIDENCE_SECONDS")
+
+    # Per-upstream circuit breakers (see core.breakers): a breaker opens when, over the last breaker_window_seconds
+    # and at least breaker_min_calls calls, the error rate or the share of calls slower than the upstream's
+    # breaker_slow_call_seconds reaches its threshold. After breaker_open_seconds one probe call is let through.
+    breaker_window_seconds: float = Field(default=60, env="BREAKER_WINDOW_SECONDS")
+    breaker_min_calls: int = Field(default=10, env="BREAKER_MIN_CALLS")
+    breaker_error_rate: float = Field(default=0.5, env="BREAKER_ERROR_RATE")
+    breaker_slow_call_rate: float = Field(default=0.8, env="BREAKER_SLOW_CALL_RATE")
+    breaker_slow_call_seconds: dict[str, float] = Field(
+        default={"groq": 20, "openai": 30, "cse": 5, "translator": 10, "wayback": 90}, env="BREAKER_SLOW_CALL_SECONDS"
+    )
+    breaker_open_seconds: float = Field(default=30, env="BREAKER_OPEN_SECONDS")
+
+    # Crash recovery (see core.recovery): workers send a heartbeat every worker_heartbeat_seconds; unfinished tasks
+    # of a worker silent for worker_lease_seconds are resumed from their checkpoints by a live worker, unless they
+    # were created more than recovery_max_age_hours ago
+    worker_heartbeat_seconds: float = Field(default=15, env="WORKER_HEARTBEAT_SECONDS")
+    worker_lease_seconds: float = Field(default=60, env="WORKER_LEASE_SECONDS")
+    recovery_max_age_hours: float = Field(default=24, env="RECOVERY_MAX_AGE_HOURS")
+
+    # Model registry and routing (see core.routing). llm_routes lists the models each call site may use, smallest
+    # first: a call goes to the cheapest one whose context window fits the input, hard inputs (over
+    # routing_hard_input_tokens, or a claim-detection confidence under routing_min_confidence) start one model up,
+    # and a response that fails validation escalates to the next one.
+    llm_models: dict[str, LLMModel] = Field(
+        default={
+            "llama-3.1-8b-instant": LLMModel(
+                provider="groq", prompt_price=0.05, completion_price=0.08, context_tokens=131072, median_seconds=0.6
+            ),
+            "llama3-8b-8192": LLMModel(
+                provider="groq", prompt_price=0.05, completion_price=0.08, context_tokens=8192, median_seconds=0.5
+            ),
+            "llama3-70b-8192": LLMModel(
+                provider="groq", prompt_price=0.59, completion_price=0.79, context_tokens=8192, median_seconds=1.5
+            ),
+            "llama-3.3-70b-versatile": LLMModel(
+                provider="groq", prompt_price=0.59, completion_price=0.79, context_tokens=131072, median_seconds=1.6
+            ),
+            "moonshotai/kimi-k2-instruct": LLMModel(
+                provider="groq", prompt_price=1.00, completion_price=3.00, context_tokens=131072, median_seconds=2.5
+            ),
+            "gpt-4o-mini": LLMModel(
+                provider="openai", prompt_price=0.15, completion_price=0.60, context_tokens=128000, median_seconds=3.0
+            ),
+            "gpt-4o": LLMModel(
+                provider="openai", prompt_price=2.50, completion_price=10.00, context_tokens=128000, median_seconds=4.0
+            ),
+        },
+        env="LLM_MODELS",
+    )
+    llm_routes: dict[str, list[str]] = Field(
+        default={
+            "claim_detection": ["moonshotai/kimi-k2-instruct"],
+            "summarization": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+            "query_generation": ["llama3-8b-8192", "llama-3.3-70b-versatile"],
+            "claim_decomposition": ["llama3-8b-8192", "llama-3.3-70b-versatile"],
+            "fallacy_analysis": ["llama-3.1-8b-instant", "llama3-70b-8192", "llama-3.3-70b-versatile"],
+            "verdict": ["gpt-4o-mini", "gpt-4o"],
+        },
+        env="LLM_ROUTES",
+    )
+    routing_hard_input_tokens: int = Field(default=2000, env="ROUTING_HARD_INPUT_TOKENS")
+    routing_min_confidence: float = Field(default=0.6, env="ROUTING_MIN_CONFIDENCE")
+
+    # Hedged LLM calls (see core.hedging), off unless hedging_enabled. The first attempt of a call site listed in
+    # hedge_models that hasn't answered within its model's observed hedge_quantile latency (over the last
+    # hedge_latency_samples calls, at least hedge_min_samples) is also sent to the listed model on the other provider;
+    # the first valid response wins. At most hedge_max_rate of the hedgeable calls in a minute are hedged.
+    hedging_enabled: bool = Field(default=False, env="HEDGING_ENABLED")
+    hedge_models: dict[str, str] = Field(
+        default={
+            "claim_detection": "gpt-4o-mini",
+            "summarization": "gpt-4o-mini",
+            "query_generation": "gpt-4o-mini",
+        },
+        env="HEDGE_MODELS",
+    )
+    hedge_quantile: float = Field(default=0.9, env="HEDGE_QUANTILE")
+    hedge_latency_samples: int = Field(default=200, env="HEDGE_LATENCY_SAMPLES")
+    hedge_min_samples: int = Field(default=20, env="HEDGE_MIN_SAMPLES")
+    hedge_max_rate: float = Field(default=0.1, env="HEDGE_MAX_RATE")
+
+    # LLM usage accounting (see core.usage; costs come from llm_models): the per-task spend above which a budget
+    # alert fires (0 disables it) and how often the daily rollup is written
+    task_budget_usd: float = Field(default=0.02, env="TASK_BUDGET_USD")
+    usage_flush_seconds: float = Field(default=30, env="USAGE_FLUSH_SECONDS")
+
+    # Idempotent submissions (see core.idempotency): how long a client's Idempotency-Key maps to its task, and how
+    # long an identical resend without a key does (0 turns such derived keys off)
+    idempotency_key_seconds: float = Field(default=24 * 3600, env="IDEMPOTENCY_KEY_SECONDS")
+    idempotency_derived_seconds: float = Field(default=600, env="IDEMPOTENCY_DERIVED_SECONDS")
+
+    # Task cancellation (see core.cancellation): how often each worker checks whether a task it runs was cancelled
+    # through another worker or abandoned by its client
+    cancel_poll_seconds: float = Field(default=2, env="CANCEL_POLL_SECONDS")
+
+    # Task stats (see core.stats): counters kept up to date on every status change, recomputed from the tasks
+    # collection every stats_rebuild_hours (0: only when they are missing) to correct any drift
+    stats_rebuild_hours: float = Field(default=24, env="STATS_REBUILD_HOURS")
+
+    # Background Wayback archiving of non-correct verdicts
+    archive_freshness_hours: int = Field(default=24 * 7, env="ARCHIVE_FRESHNESS_HOURS")
+    archive_concurrency: int = Field(default=2, env="ARCHIVE_CONCURRENCY")
 
     allowed_origins: list[str] = ["*"]
     allowed_methods: list[str] = ["*"]
@@ -25,6 +191,20 @@ class Settings(BaseSettings):
     google_api_key: str = Field(..., env="GOOGLE_API_KEY")
     google_cse_id: str = Field(..., env="GOOGLE_CSE_ID")
 
+    logfire_token: Optional[str] = Field(default=None, env="LOGFIRE_TOKEN")
+
+    # Admin endpoints (/api/admin/...) are only mounted when an admin token is set; the profiling ones
+    # (/api/admin/profile/...) also need profiling_enabled
+    profiling_enabled: bool = Field(default=False, env="PROFILING_ENABLED")
+    admin_token: Optional[str] = Field(default=None, env="ADMIN_TOKEN")
+    max_profile_seconds: float = Field(default=60, env="MAX_PROFILE_SECONDS")
+    tracemalloc_frames: int = Field(default=16, env="TRACEMALLOC_FRAMES")
+
+    # Record/replay of upstream HTTP traffic (see core.cassette). "{pid}" in the path is expanded when recording.
+    cassette_mode: Literal["off", "record", "replay"] = Field(default="off", env="CASSETTE_MODE")
+    cassette_path: str = Field(default="cassettes/recording-{pid}.jsonl.gz", env="CASSETTE_PATH")
+    cassette_keep_timing: bool = Field(default=False, env="CASSETTE_KEEP_TIMING")
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
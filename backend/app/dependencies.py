@@ -1,5 +1,6 @@
 import logging
 import asyncio
+import os
 from typing import Optional
 
 from groq import AsyncGroq
@@ -8,6 +9,9 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ServerSelectionTimeoutError
 
 from app.config import settings
+from core.cassette import CassetteTransport
+from core.http import get_transport, sdk_http_client, set_transport
+from core.routing import register_client
 
 logger = logging.getLogger(__name__)
 
@@ -19,21 +23,23 @@ mongo_client: Optional[AsyncIOMotorClient] = None
 async def get_groq_client() -> AsyncGroq:
     global groq_client
     if groq_client is None:
-        groq_client = AsyncGroq(api_key=settings.groq_api_key)
+        groq_client = AsyncGroq(api_key=settings.groq_api_key, http_client=sdk_http_client())
+        register_client("groq", groq_client)
     return groq_client
 
 
 async def get_openai_client() -> AsyncOpenAI:
     global openai_client
     if openai_client is None:
-        openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        openai_client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=sdk_http_client())
+        register_client("openai", openai_client)
     return openai_client
 
 
 async def get_mongo_client() -> AsyncIOMotorClient:
     global mongo_client
     if mongo_client is None:
-        mongo_client = AsyncIOMotorClient(settings.mongodb_uri)
+        mongo_client = AsyncIOMotorClient(settings.mongo_uri)
     return mongo_client
 
 
@@ -49,17 +55,40 @@ async def wait_for_mongo_ready(client: AsyncIOMotorClient, retries: int = 5, del
     raise RuntimeError("MongoDB not reachable after retries.")
 
 
+def reset_clients() -> None:
+    """Drops client references; called in each worker after fork so every process builds its own."""
+    global groq_client, openai_client, mongo_client
+    groq_client = openai_client = mongo_client = None
+
+
 async def initialize_clients():
     global groq_client, openai_client, mongo_client
 
     logger.info("Initializing external clients...")
 
-    groq_client = AsyncGroq(api_key=settings.groq_api_key)
-    openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+    if settings.cassette_mode != "off":
+        # Must be installed before the SDK clients are built so their traffic goes through it too
+        path = (
+            settings.cassette_path.format(pid=os.getpid())
+            if settings.cassette_mode == "record"
+            else settings.cassette_path
+        )
+        set_transport(CassetteTransport(path, settings.cassette_mode, keep_timing=settings.cassette_keep_timing))
+        logger.info(f"Upstream traffic cassette: {settings.cassette_mode} {path}")
+
+    groq_client = AsyncGroq(api_key=settings.groq_api_key, http_client=sdk_http_client())
+    openai_client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=sdk_http_client())
+    # Routed and hedged LLM calls reach the other provider through these
+    register_client("groq", groq_client)
+    register_client("openai", openai_client)
 
     mongo_client = AsyncIOMotorClient(settings.mongo_uri, serverSelectionTimeoutMS=2000)
     await wait_for_mongo_ready(mongo_client)
 
+    from core.db import ensure_indexes
+
+    await ensure_indexes(mongo_client)
+
     logger.info("All clients initialized.")
 
 
@@ -70,3 +99,9 @@ async def cleanup_clients():
     if mongo_client:
         mongo_client.close()  # Motor uses .close(), not .aclose()
         logger.info("MongoDB connection closed.")
+
+    transport = get_transport()
+    if isinstance(transport, CassetteTransport):
+        await transport.close()
+        set_transport(None)
+        logger.info("Cassette closed.")
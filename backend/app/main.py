@@ -2,12 +2,25 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router as api_router
 from app.config import settings
-from app.dependencies import initialize_clients, cleanup_clients
+from app.dependencies import (
+    cleanup_clients,
+    get_groq_client,
+    get_mongo_client,
+    get_openai_client,
+    initialize_clients,
+)
+from app.responses import ModelJSONResponse
+from core.jobs import drain as drain_jobs
+from core.metrics import METRICS_CONTENT_TYPE, configure_logfire, render_metrics
+from core.cancellation import start_cancellation_watcher, stop_cancellation_watcher
+from core.recovery import start_recovery, stop_recovery
+from core.stats import start_stats_rebuilder, stop_stats_rebuilder
+from core.usage import start_usage_flusher, stop_usage_flusher
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("app.main")
@@ -17,9 +30,21 @@ logger = logging.getLogger("app.main")
 async def lifespan(app: FastAPI):
     logger.info(f"Lifespan starting for {app.title}...")
     await initialize_clients()
+    # Resumes tasks interrupted by a crash (of this or another worker) from their checkpoints
+    start_recovery(await get_groq_client(), await get_openai_client(), await get_mongo_client())
+    start_usage_flusher(await get_mongo_client())
+    start_cancellation_watcher(await get_mongo_client())
+    # Builds the task stats on first start, then recomputes them every STATS_REBUILD_HOURS
+    start_stats_rebuilder(await get_mongo_client())
     logger.info("Lifespan started")
     yield
     logger.info(f"Lifespan ending for {app.title}...")
+    stop_recovery()
+    stop_stats_rebuilder()
+    stop_cancellation_watcher()
+    await drain_jobs(settings.job_drain_timeout)
+    # After the drain, so the usage of tasks finishing during shutdown makes it into the rollup
+    await stop_usage_flusher(await get_mongo_client())
     await cleanup_clients()
     logger.info("Lifespan ended")
 
@@ -30,6 +55,7 @@ app = FastAPI(
     description=settings.description,
     version=settings.version,
     lifespan=lifespan,
+    default_response_class=ModelJSONResponse,
 )
 
 app.add_middleware(
@@ -40,6 +66,10 @@ app.add_middleware(
 )
 
 
+if settings.logfire_token:
+    configure_logfire(app, settings.logfire_token, service_name=settings.title)
+
+
 @app.middleware("http")
 async def log_requests(request, call_next):
     logger.info(f"Request: {request.method} {request.url}")
@@ -49,3 +79,18 @@ async def log_requests(request, call_next):
 
 
 app.include_router(api_router, prefix="/api")
+
+if settings.admin_token:
+    from app.api.admin import profiling_router, router as admin_router
+
+    app.include_router(admin_router, prefix="/api")
+    if settings.profiling_enabled:
+        app.include_router(profiling_router, prefix="/api")
+        logger.warning("Admin profiling endpoints enabled.")
+elif settings.profiling_enabled:
+    logger.warning("PROFILING_ENABLED is set but ADMIN_TOKEN is not; admin profiling endpoints stay disabled.")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
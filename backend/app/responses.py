@@ -0,0 +1,14 @@
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    JSON response that serializes pydantic models (or lists/dicts of them) straight to bytes with
+    pydantic-core, skipping FastAPI's response validation and jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
@@ -0,0 +1,76 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TruthLensWorker(UvicornWorker):
+    # loop/http "auto" pick uvloop and httptools when they are installed. Uvicorn stops waiting for in-flight
+    # requests (and the background fact-check tasks attached to them) after the graceful timeout.
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "timeout_graceful_shutdown": settings.graceful_timeout}
+
+
+def _post_fork(server, worker) -> None:
+    # Clients are built per worker in the lifespan; make sure nothing created in the master leaks across fork
+    from app.dependencies import reset_clients
+
+    reset_clients()
+
+
+def _child_exit(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def prepare_metrics_dir() -> None:
+    """Prometheus multiprocess mode: every worker writes its samples to a shared directory, /metrics merges them."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "truthlens-metrics")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn master with preloaded app and uvicorn workers."""
+
+    def __init__(self, host: str, port: int, workers: int, app_uri: str = "app.main:app"):
+        self.app_uri = app_uri
+        self.options = {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "worker_class": "app.server.TruthLensWorker",
+            "preload_app": True,
+            # Gunicorn's hard kill comes a little after uvicorn's own graceful timeout so the lifespan shutdown runs
+            "graceful_timeout": settings.graceful_timeout + 5,
+            "timeout": 120,
+            "keepalive": 5,
+            "post_fork": _post_fork,
+            "child_exit": _child_exit,
+            "accesslog": "-",
+        }
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from gunicorn.util import import_app
+
+        return import_app(self.app_uri)
+
+
+def run_production(host: str, port: int, workers: int, app_uri: str = "app.main:app") -> None:
+    workers = workers or settings.workers or multiprocessing.cpu_count()
+    prepare_metrics_dir()
+    logger.info(f"Starting {workers} workers on {host}:{port}")
+    ProductionServer(host, port, workers, app_uri).run()
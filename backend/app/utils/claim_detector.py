@@ -1,14 +1,26 @@
 import json
+from typing import Optional
 from pydantic import BaseModel
 from groq import AsyncGroq
 
+from core.breakers import fallback
+from core.metrics import UPSTREAM_ERRORS, stage
+from core.routing import CLAIM_DETECTION, call_routed, model_upstream, route
+
 
 class ClaimDetectionResult(BaseModel):
     is_factual_claim: bool
-    confidence: float
+    # None when the input wasn't classified
+    confidence: Optional[float]
     reasoning: str
 
 
+def _undetected(reason: str) -> ClaimDetectionResult:
+    # Without a classification the input is verified anyway: wrongly skipping a claim is worse than checking a
+    # non-claim, and a verdict that can't be produced fails the task as retryable further down
+    return ClaimDetectionResult(is_factual_claim=True, confidence=None, reasoning=reason)
+
+
 async def detect_with_llm(groq_client: AsyncGroq, text: str) -> ClaimDetectionResult:
     system_msg = (
         "You are a classifier that decides whether an input is a factual claim. "
@@ -45,9 +57,13 @@ async def detect_with_llm(groq_client: AsyncGroq, text: str) -> ClaimDetectionRe
         },
     }
 
-    try:
-        resp = await groq_client.chat.completions.create(
-            model="moonshotai/kimi-k2-instruct",
+    models = route(CLAIM_DETECTION, prompt_text, max_output_tokens=120)
+    if fallback(model_upstream(models[0]), "assume_claim"):
+        return _undetected("Claim detection unavailable; verifying as a claim")
+
+    async def _classify(model: str, client) -> dict:
+        resp = await client.chat.completions.create(
+            model=model,
             messages=[
                 {"role": "system", "content": system_msg},
                 {"role": "user", "content": prompt_text},
@@ -56,9 +72,12 @@ async def detect_with_llm(groq_client: AsyncGroq, text: str) -> ClaimDetectionRe
             max_tokens=120,
             response_format={"type": "json_schema", "json_schema": schema},
         )
+        # Unparseable output escalates to the next routed model
+        return json.loads(resp.choices[0].message.content)
 
-        content = resp.choices[0].message.content
-        data = json.loads(content)
+    try:
+        with stage("claim_detection"):
+            data = await call_routed(CLAIM_DETECTION, models, _classify, groq_client)
 
         label = data.get("label", "not_claim")
         # Guard confidence
@@ -77,11 +96,8 @@ async def detect_with_llm(groq_client: AsyncGroq, text: str) -> ClaimDetectionRe
             reasoning=f"[LLM JSON] {reason} (label={label}, conf={conf:.2f})",
         )
     except Exception as e:
-        return ClaimDetectionResult(
-            is_factual_claim=False,
-            confidence=0.0,
-            reasoning=f"LLM error: {e}",
-        )
+        UPSTREAM_ERRORS.labels(upstream="groq").inc()
+        return _undetected(f"LLM error: {e}")
 
 
 async def detect_factual_claim(groq_client: AsyncGroq, text: str) -> ClaimDetectionResult:
@@ -0,0 +1,127 @@
+"""
+Compares the old persistence / response path with the current one.
+
+    python -m benchmarks.codec [--iterations 20000]
+
+Old path: ``ujson.loads(model.model_dump_json())`` for writes, and re-validating a ``TaskStatusResponse`` plus
+FastAPI's ``jsonable_encoder`` + ``json.dumps`` for reads.
+New path: ``to_document`` (``model_dump(mode="json")``) for writes, and ``model_construct`` +
+``ModelJSONResponse`` for reads.
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable
+from uuid import uuid4
+
+for _key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID", "GROQ_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+
+import ujson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import app.main  # noqa: E402,F401  (resolves the schemas <-> core import cycle)
+from app.responses import ModelJSONResponse  # noqa: E402
+from core.db import to_document  # noqa: E402
+from core.fallacies_and_bias import ReasoningIssueAnalysis  # noqa: E402
+from schemas import FactCheckResponse, TaskData, TaskStatus, TaskStatusResponse, TextInputData  # noqa: E402
+
+
+def _sample_task() -> TaskData:
+    return TaskData(
+        task_id=uuid4(),
+        status=TaskStatus.COMPLETED,
+        message="Fact check completed successfully",
+        input_data=TextInputData(url="https://example.com/news/article", content="lorem ipsum " * 200),
+        result=FactCheckResponse(
+            url="https://example.com/news/article",
+            label="misleading",
+            summary="A summarized claim " * 20,
+            response="A detailed explanation of the verdict " * 30,
+            isSafe=False,
+            archive="https://web.archive.org/web/2025/https://example.com/news/article",
+            references=[f"https://source{i}.org/page" for i in range(5)],
+            updatedAt=datetime.now(),
+        ),
+        fallacy_result=ReasoningIssueAnalysis(
+            fallacies=["Strawman", "False cause"],
+            bias_indicators=["Loaded language"],
+            explanation="Some explanation " * 10,
+        ),
+    )
+
+
+def _old_write(task: TaskData) -> dict:
+    return ujson.loads(task.model_dump_json())
+
+
+def _new_write(task: TaskData) -> dict:
+    return to_document(task)
+
+
+def _old_read(task: TaskData) -> bytes:
+    response = TaskStatusResponse(
+        task_id=task.task_id,
+        status=task.status,
+        message=task.message,
+        result=task.result,
+        created_at=task.created_at,
+        updated_at=task.updated_at,
+        fallacy_result=task.fallacy_result,
+    )
+    # What FastAPI does for a returned model: validate against response_model, encode, then json.dumps
+    validated = TaskStatusResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+
+def _new_read(task: TaskData) -> bytes:
+    response = TaskStatusResponse.model_construct(
+        task_id=task.task_id,
+        status=task.status,
+        message=task.message,
+        result=task.result,
+        created_at=task.created_at,
+        updated_at=task.updated_at,
+        fallacy_result=task.fallacy_result,
+    )
+    return ModelJSONResponse(response).body
+
+
+def _measure(fn: Callable[[TaskData], object], task: TaskData, iterations: int) -> tuple[float, int]:
+    for _ in range(min(iterations, 1000)):
+        fn(task)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(task)
+    per_call_us = (time.perf_counter() - start) / iterations * 1e6
+
+    tracemalloc.start()
+    fn(task)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call_us, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    task = _sample_task()
+    print(f"{'path':<32}{'us/call':>10}{'peak alloc (B)':>16}")
+    for name, old, new in (
+        ("write (model -> document)", _old_write, _new_write),
+        ("read (task -> body)", _old_read, _new_read),
+    ):
+        for variant, fn in (("old", old), ("new", new)):
+            us, peak = _measure(fn, task, args.iterations)
+            print(f"{name + ' ' + variant:<32}{us:>10.2f}{peak:>16}")
+
+
+if __name__ == "__main__":
+    main()
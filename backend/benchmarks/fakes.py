@@ -0,0 +1,224 @@
+"""
+Local stand-ins for every upstream the fact-check pipeline talks to.
+
+``FakeUpstreams`` is an httpx transport that answers Groq, OpenAI, Google CSE and evidence-page requests in-process,
+with a configurable latency / error distribution per upstream. ``FakeTranslator`` and ``FakeWayback`` replace
+the ``requests``-based deep_translator and waybackpy calls, which do not go through httpx. Like the real clients,
+those two block the calling thread.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+import httpx
+import ujson
+
+PAGE_HOST_SUFFIX = ".bench.local"
+
+
+@dataclass
+class UpstreamProfile:
+    """Log-normal latency around ``median_ms`` (``sigma`` controls the tail) and a flat error rate."""
+
+    median_ms: float
+    sigma: float = 0.4
+    error_rate: float = 0.0
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        return self.median_ms * rng.lognormvariate(0.0, self.sigma) / 1000
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+
+@dataclass
+class FakeProfiles:
+    groq: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(350))
+    openai: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(1200))
+    cse: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(250))
+    pages: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(600, sigma=0.8))
+    translator: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(200))
+    wayback: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(8000, sigma=0.6))
+    page_paragraphs: int = 40
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def scaled(self, factor: float) -> "FakeProfiles":
+        """Returns a copy with every median latency multiplied by ``factor`` (handy for quick smoke runs)."""
+        data = self.as_dict()
+        kwargs: dict[str, Any] = {"page_paragraphs": data.pop("page_paragraphs")}
+        for name, profile in data.items():
+            kwargs[name] = UpstreamProfile(profile["median_ms"] * factor, profile["sigma"], profile["error_rate"])
+        return FakeProfiles(**kwargs)
+
+
+# -------------------------------------------
+# Fake structured LLM output
+# -------------------------------------------
+def _fake_value(name: str, schema: dict, defs: dict, digest: str, rng: random.Random) -> Any:
+    if "$ref" in schema:
+        return _fake_value(name, defs[schema["$ref"].split("/")[-1]], defs, digest, rng)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [s for s in schema[combinator] if s.get("type") != "null"] or schema[combinator]
+            return _fake_value(name, options[0], defs, digest, rng)
+    if "enum" in schema:
+        # Claim detection always answers "claim" so every submission runs the full pipeline
+        return "claim" if "claim" in schema["enum"] else rng.choice(schema["enum"])
+
+    kind = schema.get("type", "string")
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {key: _fake_value(key, value, defs, digest, rng) for key, value in props.items()}
+    if kind == "array":
+        return [_fake_value(name, schema.get("items", {}), defs, f"{digest}{i}", rng) for i in range(2)]
+    if kind in ("number", "integer"):
+        return round(rng.uniform(0.6, 0.99), 2)
+    if kind == "boolean":
+        return True
+    if name in ("sources", "references", "url", "link"):
+        return f"https://evidence-{digest[:6]}{PAGE_HOST_SUFFIX}/article"
+    return f"{name} {digest}. " + " ".join(["synthetic"] * rng.randint(8, 30))
+
+
+def _chat_completion(body: dict, rng: random.Random) -> dict:
+    # Derive the payload from the request so distinct inputs produce distinct summaries (no accidental cache hits)
+    digest = hashlib.sha1(ujson.dumps(body.get("messages", [])).encode()).hexdigest()[:12]
+    message: dict[str, Any] = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+
+    tools = body.get("tools") or []
+    response_format = body.get("response_format") or {}
+    if tools:
+        function = tools[0]["function"]
+        params = function.get("parameters", {})
+        arguments = _fake_value(function["name"], params, params.get("$defs", {}), digest, rng)
+        message["tool_calls"] = [
+            {
+                "id": f"call_{digest}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": ujson.dumps(arguments)},
+            }
+        ]
+        finish_reason = "tool_calls"
+    elif response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        message["content"] = ujson.dumps(_fake_value("root", schema, schema.get("$defs", {}), digest, rng))
+    else:
+        message["content"] = _fake_value("content", {"type": "string"}, {}, digest, rng)
+
+    prompt_tokens = sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4
+    completion_tokens = len(ujson.dumps(message)) // 4
+    return {
+        "id": f"chatcmpl-{digest}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _cse_results(query: str, num: int) -> dict:
+    digest = hashlib.sha1(query.encode()).hexdigest()[:8]
+    return {
+        "items": [
+            {
+                "title": f"Result {i} for {query[:60]}",
+                "link": f"https://evidence-{digest}-{i}{PAGE_HOST_SUFFIX}/news/{i}",
+                "snippet": f"Snippet {i} about {query[:80]}",
+            }
+            for i in range(num)
+        ]
+    }
+
+
+def _html_page(path: str, paragraphs: int, rng: random.Random) -> str:
+    words = ["report", "official", "data", "claim", "study", "percent", "according", "government", "said", "year"]
+    body = "".join(f"<p>{' '.join(rng.choices(words, k=60))}</p>" for _ in range(paragraphs))
+    nav = "".join(f"<li><a href='/x{i}'>Link {i}</a></li>" for i in range(30))
+    return (
+        f"<html><head><title>{path}</title><script>var x = 1;</script></head><body><ul>{nav}</ul>{body}</body></html>"
+    )
+
+
+class FakeUpstreams(httpx.AsyncBaseTransport):
+    """httpx transport that serves Groq, OpenAI, Google CSE and evidence pages locally."""
+
+    def __init__(self, profiles: Optional[FakeProfiles] = None, seed: int = 0):
+        self.profiles = profiles or FakeProfiles()
+        self.rng = random.Random(seed)
+        self.calls: dict[str, int] = {}
+
+    def _route(self, request: httpx.Request) -> tuple[str, Optional[UpstreamProfile]]:
+        host = request.url.host
+        if host == "api.groq.com":
+            return "groq", self.profiles.groq
+        if host == "api.openai.com":
+            return "openai", self.profiles.openai
+        if host == "www.googleapis.com":
+            return "cse", self.profiles.cse
+        if host.endswith(PAGE_HOST_SUFFIX):
+            return "pages", self.profiles.pages
+        return "unknown", None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream, profile = self._route(request)
+        self.calls[upstream] = self.calls.get(upstream, 0) + 1
+        if profile is None:
+            return httpx.Response(404, request=request)
+
+        await asyncio.sleep(profile.sample_seconds(self.rng))
+        if profile.fails(self.rng):
+            return httpx.Response(503, json={"error": {"message": f"fake {upstream} outage"}}, request=request)
+
+        if upstream in ("groq", "openai"):
+            body = ujson.loads(await request.aread())
+            return httpx.Response(200, json=_chat_completion(body, self.rng), request=request)
+        if upstream == "cse":
+            params = request.url.params
+            return httpx.Response(
+                200, json=_cse_results(params.get("q", ""), int(params.get("num", 3))), request=request
+            )
+        html = _html_page(request.url.path, self.profiles.page_paragraphs, self.rng)
+        return httpx.Response(200, text=html, headers={"Content-Type": "text/html"}, request=request)
+
+
+class FakeTranslator:
+    """Drop-in for ``get_translator``/``GoogleTranslator``; blocks like the real one and returns the text unchanged."""
+
+    profile = UpstreamProfile(200)
+    rng = random.Random(1)
+
+    def __init__(self, source: str = "auto", target: str = "en", **_: Any):
+        self.source = source
+        self.target = target
+
+    def translate(self, text: str, **_: Any) -> str:
+        time.sleep(self.profile.sample_seconds(self.rng))
+        if self.profile.fails(self.rng):
+            raise ConnectionError("fake translator outage")
+        return text
+
+
+class FakeWayback:
+    """Drop-in for ``archive_url``; blocks like ``WaybackMachineSaveAPI.save()``."""
+
+    def __init__(self, profile: UpstreamProfile, seed: int = 2):
+        self.profile = profile
+        self.rng = random.Random(seed)
+
+    def __call__(self, url: Any) -> str:
+        time.sleep(self.profile.sample_seconds(self.rng))
+        if self.profile.fails(self.rng):
+            return str(url)
+        return f"https://web.archive.org/web/20250101000000/{url}"
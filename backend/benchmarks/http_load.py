@@ -0,0 +1,84 @@
+"""
+Closed-loop HTTP load generator for a running server.
+
+    python -m benchmarks.http_load --url http://127.0.0.1:8000 --scenario verify --concurrency 64 --duration 20
+
+Scenarios: ``verify`` (POST /api/verify/text/), ``status`` (GET /api/task/{id}/status) and ``health``.
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+import httpx
+import ujson
+
+from benchmarks.pipeline import percentiles
+
+
+def _request(client: httpx.AsyncClient, scenario: str, i: int):
+    if scenario == "verify":
+        content = f"Officials reported on day {i} that the national unemployment rate fell to {i % 9}.{i % 7} percent."
+        return client.post("/api/verify/text/", json={"content": content * 5})
+    if scenario == "status":
+        return client.get(f"/api/task/{uuid4()}/status")
+    return client.get("/api/health/")
+
+
+async def run(url: str, scenario: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    rejected = 0
+    counter = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+
+        async def worker() -> None:
+            nonlocal errors, rejected, counter
+            while time.perf_counter() < deadline:
+                counter += 1
+                start = time.perf_counter()
+                try:
+                    response = await _request(client, scenario, counter)
+                    if response.status_code == 429:
+                        # Shed by admission control: back off like a well-behaved client would
+                        rejected += 1
+                        await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+                        continue
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rejected": rejected,
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "latency_seconds": percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", choices=["verify", "status", "health"], default="verify")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(ujson.dumps(asyncio.run(run(args.url, args.scenario, args.concurrency, args.duration)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Offline throughput benchmark for ``POST /api/verify/text/`` -> ``process_fact_check_task``.
+
+Every upstream is replaced by a local stand-in (see ``benchmarks.fakes``) and Mongo by mongomock-motor, so runs cost
+no API quota. For each concurrency level the harness reports tasks/sec, request latency, per-stage p50/p95/p99 (from
+the ``timings`` map stored on each task) and event-loop lag, and writes everything to a JSON file.
+
+    python -m benchmarks.pipeline --concurrency 1 4 16 --tasks 64
+    python -m benchmarks.pipeline --scale 0.1 --output /tmp/new.json --compare benchmarks/results/baseline.json
+
+With ``--cassette`` the Groq/OpenAI/CSE/page traffic is served from a recorded cassette (``CASSETTE_MODE=record``)
+instead of the synthetic fakes, so parsing, chunking and serialization run on real payloads; add ``--cprofile`` to
+capture where that CPU time goes.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import os
+import platform
+import subprocess
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+for _key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID", "GROQ_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+# All load comes from one address; the global admission limits still apply
+os.environ.setdefault("MAX_TASKS_PER_CLIENT", "0")
+
+import httpx  # noqa: E402
+import ujson  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+from benchmarks.fakes import FakeProfiles, FakeTranslator, FakeUpstreams, FakeWayback, UpstreamProfile  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+LAG_INTERVAL_SECONDS = 0.01
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Set from --decompose: submit with claim decomposition enabled
+DECOMPOSE_CLAIMS = False
+
+
+def _payload(i: int, priority: str = "interactive") -> dict[str, Any]:
+    # Long enough to go through summarization, unique so the verdict cache never short-circuits a task
+    sentence = f"Officials reported on day {i} that the national unemployment rate fell to {i % 9}.{i % 7} percent. "
+    return {
+        "url": f"https://news-{i}.bench.local/story",
+        "content": sentence * 6,
+        "priority": priority,
+        "decompose_claims": DECOMPOSE_CLAIMS,
+    }
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up a sleeping coroutine."""
+
+    def __init__(self, interval: float = LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        if self._task:
+            self._task.cancel()
+
+
+def install_fakes(
+    profiles: FakeProfiles, seed: int, cassette: Optional[Path] = None, keep_timing: bool = False
+) -> tuple[Any, httpx.AsyncBaseTransport, AsyncMongoMockClient]:
+    """Wires fakes into the app (httpx transport, translator, archive, clients) and returns the ASGI app."""
+    from groq import AsyncGroq
+    from openai import AsyncOpenAI
+
+    import app.dependencies as dependencies
+    import core.archiver
+    import core.preprocessors
+    from app.main import app
+    from core.cassette import CassetteTransport
+    from core.http import sdk_http_client, set_transport
+    from core.routing import register_client
+
+    if cassette:
+        upstreams = CassetteTransport(cassette, "replay", keep_timing=keep_timing)
+    else:
+        upstreams = FakeUpstreams(profiles, seed=seed)
+    set_transport(upstreams)
+
+    FakeTranslator.profile = profiles.translator
+    core.preprocessors.get_translator = FakeTranslator
+    core.archiver.archive_url = FakeWayback(profiles.wayback)
+
+    mongo = AsyncMongoMockClient()
+    dependencies.mongo_client = mongo
+    dependencies.groq_client = AsyncGroq(api_key="benchmark", http_client=sdk_http_client())
+    dependencies.openai_client = AsyncOpenAI(api_key="benchmark", http_client=sdk_http_client())
+    register_client("groq", dependencies.groq_client)
+    register_client("openai", dependencies.openai_client)
+    return app, upstreams, mongo
+
+
+async def run_level(
+    app: Any, mongo: AsyncMongoMockClient, concurrency: int, tasks: int, offset: int, bulk: int = 0
+) -> dict:
+    from core.db import DB_NAME, TASKS_COLLECTION
+
+    await mongo[DB_NAME][TASKS_COLLECTION].delete_many({})
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    bulk_latencies: list[float] = []
+    http_errors = 0
+    rejected = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def post(i: int, priority: str, sink: list[float]) -> None:
+            nonlocal http_errors, rejected
+            start = time.perf_counter()
+            # ASGITransport only returns once the background task has run, so this is end-to-end latency
+            response = await client.post("/api/verify/text/", json=_payload(i, priority), timeout=None)
+            if response.status_code == 429:
+                rejected += 1
+                return
+            sink.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                http_errors += 1
+
+        async def submit(i: int) -> None:
+            async with semaphore:
+                await post(offset + i, "interactive", latencies)
+
+        with LoopLagMonitor() as lag:
+            # A backfill submitted all at once, running alongside the interactive load
+            backfill = [asyncio.ensure_future(post(offset + tasks + i, "bulk", bulk_latencies)) for i in range(bulk)]
+            start = time.perf_counter()
+            await asyncio.gather(*(submit(i) for i in range(tasks)))
+            elapsed = time.perf_counter() - start
+            await asyncio.gather(*backfill)
+
+    stage_samples: dict[str, list[float]] = {}
+    statuses: dict[str, int] = {}
+    async for doc in mongo[DB_NAME][TASKS_COLLECTION].find({}, {"timings": 1, "status": 1}):
+        statuses[doc.get("status", "unknown")] = statuses.get(doc.get("status", "unknown"), 0) + 1
+        for name, seconds in (doc.get("timings") or {}).items():
+            stage_samples.setdefault(name, []).append(seconds)
+
+    return {
+        "concurrency": concurrency,
+        "tasks": tasks,
+        "elapsed_seconds": round(elapsed, 3),
+        "tasks_per_second": round(tasks / elapsed, 3) if elapsed else 0.0,
+        "request_latency_seconds": percentiles(latencies),
+        "bulk_tasks": bulk,
+        "bulk_latency_seconds": percentiles(bulk_latencies),
+        "stages_seconds": {name: percentiles(values) for name, values in sorted(stage_samples.items())},
+        "loop_lag_seconds": percentiles(lag.samples),
+        "statuses": statuses,
+        "http_errors": http_errors,
+        "rejected": rejected,
+    }
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Prints per-level throughput and p95 deltas against a previous result file."""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    print(f"\nvs {baseline.get('meta', {}).get('git_revision', '?')}:")
+    for level in current["levels"]:
+        old = previous.get(level["concurrency"])
+        if not old:
+            continue
+        tps_delta = (level["tasks_per_second"] - old["tasks_per_second"]) / (old["tasks_per_second"] or 1) * 100
+        p95_new = level["request_latency_seconds"]["p95"]
+        p95_old = old["request_latency_seconds"]["p95"]
+        print(
+            f"  c={level['concurrency']:<4} tasks/s {old['tasks_per_second']:>8.2f} -> {level['tasks_per_second']:>8.2f}"
+            f" ({tps_delta:+.1f}%)   p95 {p95_old:.3f}s -> {p95_new:.3f}s"
+        )
+
+
+def _profile_arg(value: str) -> tuple[str, UpstreamProfile]:
+    # name=median_ms[:error_rate[:sigma]], e.g. openai=1500:0.05
+    name, _, spec = value.partition("=")
+    parts = [float(p) for p in spec.split(":")]
+    profile = UpstreamProfile(parts[0])
+    if len(parts) > 1:
+        profile.error_rate = parts[1]
+    if len(parts) > 2:
+        profile.sigma = parts[2]
+    return name, profile
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    global DECOMPOSE_CLAIMS
+    DECOMPOSE_CLAIMS = args.decompose
+    profiles = FakeProfiles().scaled(args.scale)
+    for name, profile in args.profile or []:
+        setattr(profiles, name, profile)
+
+    app, upstreams, mongo = install_fakes(profiles, args.seed, args.cassette, args.keep_timing)
+    levels = []
+    for index, concurrency in enumerate(args.concurrency):
+        result = await run_level(
+            app, mongo, concurrency, args.tasks, offset=index * (args.tasks + args.bulk), bulk=args.bulk
+        )
+        levels.append(result)
+        print(
+            f"c={concurrency:<4} {result['tasks_per_second']:>8.2f} tasks/s  "
+            f"p50={result['request_latency_seconds']['p50']:.3f}s p95={result['request_latency_seconds']['p95']:.3f}s "
+            f"p99={result['request_latency_seconds']['p99']:.3f}s  loop lag p99={result['loop_lag_seconds']['p99']:.3f}s"
+        )
+        if args.bulk:
+            print(
+                f"       bulk x{args.bulk}: p50={result['bulk_latency_seconds']['p50']:.3f}s "
+                f"p95={result['bulk_latency_seconds']['p95']:.3f}s"
+            )
+
+    from core.jobs import drain
+
+    await drain(timeout=60)  # let deferred archive jobs finish before the loop closes
+
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "scale": args.scale,
+            "profiles": profiles.as_dict(),
+            "cassette": str(args.cassette) if args.cassette else None,
+            "decompose_claims": args.decompose,
+            "upstream_calls": getattr(upstreams, "calls", {}),
+        },
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--tasks", type=int, default=64, help="tasks per concurrency level")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every fake upstream latency")
+    parser.add_argument(
+        "--profile",
+        type=_profile_arg,
+        action="append",
+        help="override an upstream: name=median_ms[:error_rate[:sigma]]",
+    )
+    parser.add_argument("--bulk", type=int, default=0, help="bulk-lane tasks submitted alongside each level")
+    parser.add_argument("--decompose", action="store_true", help="submit with claim decomposition enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/pipeline-<rev>.json)")
+    parser.add_argument("--compare", type=Path, help="previous result file to diff against")
+    parser.add_argument("--cassette", type=Path, help="replay upstream traffic from a recorded cassette")
+    parser.add_argument("--keep-timing", action="store_true", help="replay cassette entries with recorded latency")
+    parser.add_argument("--cprofile", type=Path, help="write a cProfile dump of the run (open with snakeviz/pstats)")
+    args = parser.parse_args()
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        profiler.enable()
+    result = asyncio.run(main_async(args))
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"cProfile written to {args.cprofile}")
+
+    output = args.output or RESULTS_DIR / f"pipeline-{result['meta']['git_revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(ujson.dumps(result, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(result, ujson.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Runs the real app and routes against the local fakes from ``benchmarks.fakes`` so server modes can be load-tested
+offline (see ``benchmarks.http_load``).
+
+    python -m benchmarks.serve                 # single process, like `python run.py` without reload
+    python -m benchmarks.serve --workers 4     # production mode, like `python run.py --prod --workers 4`
+
+Each worker gets its own fake upstreams and its own in-memory Mongo.
+"""
+
+import os
+
+import click
+
+for _key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID", "GROQ_API_KEY"):
+    os.environ.setdefault(_key, "benchmark")
+# All load comes from one address; the global admission limits still apply
+os.environ.setdefault("MAX_TASKS_PER_CLIENT", "0")
+
+from benchmarks.fakes import FakeProfiles  # noqa: E402
+
+
+async def _initialize_fake_clients() -> None:
+    from benchmarks.pipeline import install_fakes
+
+    install_fakes(FakeProfiles().scaled(float(os.getenv("FAKE_LATENCY_SCALE", "1.0"))), seed=os.getpid())
+
+
+def create_app():
+    # Imported here so production mode can set up Prometheus multiprocess mode before the app (and metrics) load
+    import app.main
+
+    # The lifespan looks the initializer up at startup, i.e. after the fork in production mode
+    app.main.initialize_clients = _initialize_fake_clients
+    return app.main.app
+
+
+@click.command()
+@click.option("--workers", type=int, default=0, help="0 runs a single uvicorn process")
+@click.option("--scale", type=float, default=1.0, help="multiply every fake upstream latency")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", type=int, default=8000)
+def main(workers: int, scale: float, host: str, port: int) -> None:
+    os.environ["FAKE_LATENCY_SCALE"] = str(scale)
+    if workers:
+        from app.server import run_production
+
+        run_production(host, port, workers, app_uri="benchmarks.serve:create_app()")
+    else:
+        import uvicorn
+
+        uvicorn.run(
+            "benchmarks.serve:create_app",
+            factory=True,
+            host=host,
+            port=port,
+            loop="auto",
+            http="auto",
+            log_level="warning",
+        )
+
+
+if __name__ == "__main__":
+    main()
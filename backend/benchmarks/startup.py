@@ -0,0 +1,148 @@
+"""
+Worker cold-start profile and budget check.
+
+    python -m benchmarks.startup profile [--top 25]   # -X importtime breakdown of `import app.main`
+    python -m benchmarks.startup check                # exit 1 if RSS / module count exceed the budget
+
+Budgets default to STARTUP_BUDGET_RSS_MB / STARTUP_BUDGET_MODULES (or --max-rss-mb / --max-modules), so CI can run
+``check`` as a gate. Import time swings by a few tenths of a second between runs on the same machine, so by default
+it is only reported, with a warning past WARN_SECONDS; STARTUP_BUDGET_SECONDS (or --max-seconds) makes it part of
+the gate too. Every measurement runs in a fresh interpreter.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TARGET_MODULE = "app.main"
+# Measured at ~114 MB and 2227 modules (import time 2.4-2.6s)
+DEFAULT_BUDGET_RSS_MB = 200.0
+DEFAULT_BUDGET_MODULES = 2500
+WARN_SECONDS = 3.0
+
+_MEASURE_SNIPPET = f"""
+import json, resource, sys, time
+start = time.perf_counter()
+import {TARGET_MODULE}
+elapsed = time.perf_counter() - start
+rss_kb = 0
+with open("/proc/self/status") as fh:
+    for line in fh:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+if not rss_kb:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024, "modules": len(sys.modules)}}))
+"""
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    # Settings refuse to load without these; their values are irrelevant for an import
+    for key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID", "GROQ_API_KEY"):
+        env.setdefault(key, "startup-check")
+    return env
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True)
+
+
+def profile(top: int) -> None:
+    proc = _run(["-X", "importtime", "-c", f"import {TARGET_MODULE}"])
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+
+    modules: list[tuple[int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        modules.append((int(self_us), int(cumulative_us), name))
+
+    by_package: dict[str, int] = {}
+    for self_us, _, name in modules:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    total = sum(by_package.values())
+    print(f"Total import time of {TARGET_MODULE}: {total / 1e6:.3f}s ({len(modules)} modules)\n")
+    print(f"{'package':<32}{'self [s]':>10}{'share':>8}")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{package:<32}{self_us / 1e6:>10.3f}{self_us / total:>8.1%}")
+
+    print(f"\n{'module':<56}{'cumulative [s]':>16}")
+    for _, cumulative_us, name in sorted(modules, key=lambda m: m[1], reverse=True)[:top]:
+        print(f"{name:<56}{cumulative_us / 1e6:>16.3f}")
+
+
+def measure(runs: int) -> dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        proc = _run(["-c", _MEASURE_SNIPPET])
+        if proc.returncode != 0:
+            sys.exit(proc.stderr)
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(s["seconds"] for s in samples),
+        "rss_mb": statistics.median(s["rss_mb"] for s in samples),
+        "modules": max(s["modules"] for s in samples),
+    }
+
+
+def check(max_seconds: Optional[float], max_rss_mb: float, max_modules: int, runs: int) -> None:
+    result = measure(runs)
+    seconds_budget = f"budget {max_seconds:.3f}s" if max_seconds is not None else f"warning past {WARN_SECONDS:.3f}s"
+    print(
+        f"import {TARGET_MODULE}: {result['seconds']:.3f}s ({seconds_budget}), "
+        f"RSS {result['rss_mb']:.1f} MB (budget {max_rss_mb:.1f} MB), "
+        f"{result['modules']} modules (budget {max_modules}), median of {runs} runs"
+    )
+    failures = []
+    if max_seconds is not None and result["seconds"] > max_seconds:
+        failures.append(f"import time {result['seconds']:.3f}s > {max_seconds:.3f}s")
+    elif max_seconds is None and result["seconds"] > WARN_SECONDS:
+        print(f"Warning: import time {result['seconds']:.3f}s > {WARN_SECONDS:.3f}s")
+    if result["rss_mb"] > max_rss_mb:
+        failures.append(f"RSS {result['rss_mb']:.1f} MB > {max_rss_mb:.1f} MB")
+    if result["modules"] > max_modules:
+        failures.append(f"{result['modules']} modules > {max_modules}")
+    if failures:
+        print("Startup budget exceeded: " + "; ".join(failures))
+        print("Run `python -m benchmarks.startup profile` to see which imports are responsible.")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    profile_parser = sub.add_parser("profile", help="print an -X importtime breakdown")
+    profile_parser.add_argument("--top", type=int, default=25)
+
+    check_parser = sub.add_parser("check", help="fail when startup exceeds the budget")
+    budget_seconds = os.getenv("STARTUP_BUDGET_SECONDS")
+    check_parser.add_argument("--max-seconds", type=float, default=float(budget_seconds) if budget_seconds else None)
+    check_parser.add_argument(
+        "--max-rss-mb", type=float, default=float(os.getenv("STARTUP_BUDGET_RSS_MB", DEFAULT_BUDGET_RSS_MB))
+    )
+    check_parser.add_argument(
+        "--max-modules", type=int, default=int(os.getenv("STARTUP_BUDGET_MODULES", DEFAULT_BUDGET_MODULES))
+    )
+    check_parser.add_argument("--runs", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "profile":
+        profile(args.top)
+    else:
+        check(args.max_seconds, args.max_rss_mb, args.max_modules, args.runs)
+
+
+if __name__ == "__main__":
+    main()
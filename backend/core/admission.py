@@ -0,0 +1,154 @@
+import hmac
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+from core.metrics import ADMISSION_REJECTIONS, TASKS_IN_FLIGHT, TASKS_QUEUED
+from core.scheduler import LANES, LaneScheduler, pipeline_scheduler, set_lane
+
+logger = logging.getLogger(__name__)
+
+# Completions older than this don't count towards the drain rate
+DRAIN_WINDOW_SECONDS = 60.0
+# Retry-After when nothing has completed recently, so there is no rate to extrapolate from
+DEFAULT_RETRY_AFTER = 5
+MAX_RETRY_AFTER = 300
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"Too many fact-check tasks ({scope} limit)")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A task admitted for one client. Run it with ``run`` or give the slot back with ``release``."""
+
+    def __init__(self, controller: "AdmissionController", client: str, lane: str):
+        self._controller = controller
+        self.client = client
+        self.lane = lane
+        self._released = False
+
+    async def run(self, func: Callable[..., Awaitable[None]], *args) -> None:
+        set_lane(self.lane)
+        started = False
+        try:
+            async with self._controller.scheduler.slot(self.lane):
+                self._controller._start(self.client, self.lane)
+                started = True
+                try:
+                    await func(*args)
+                finally:
+                    self._controller._completions.append(time.monotonic())
+        finally:
+            self.release(started=started)
+
+    def release(self, *, started: bool = False) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._leave(self.client, self.lane, started)
+
+
+class AdmissionController:
+    """
+    Bounds fact-check tasks per worker: the scheduler decides which of them execute, at most ``max_queued`` per lane
+    wait for a slot, and a single client may hold ``max_per_client`` tasks. Everything over those limits is rejected
+    with a Retry-After derived from how fast tasks have been completing.
+    """
+
+    def __init__(self, scheduler: LaneScheduler, max_queued: int, max_per_client: int):
+        self.scheduler = scheduler
+        self.max_queued = max(0, max_queued)
+        self.max_per_client = max_per_client
+        self.running = 0
+        # Each lane has its own queue, so a backfill filling up never gets interactive requests rejected
+        self.queued = {lane: 0 for lane in LANES}
+        self._per_client: dict[str, int] = {}
+        # Of those, the tasks still waiting for a slot
+        self._client_queued: dict[str, int] = {}
+        self._completions: deque[float] = deque()
+
+    def drain_rate(self) -> Optional[float]:
+        """Tasks completed per second over the last ``DRAIN_WINDOW_SECONDS``."""
+        now = time.monotonic()
+        while self._completions and now - self._completions[0] > DRAIN_WINDOW_SECONDS:
+            self._completions.popleft()
+        if not self._completions:
+            return None
+        return len(self._completions) / max(now - self._completions[0], 1.0)
+
+    def retry_after(self, ahead: int) -> int:
+        """Seconds until ``ahead`` more tasks should have completed at the current drain rate."""
+        rate = self.drain_rate()
+        if not rate:
+            return DEFAULT_RETRY_AFTER
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(ahead / rate)))
+
+    def admit(self, client: str, lane: str) -> Ticket:
+        held = self._per_client.get(client, 0)
+        if self.max_per_client and held >= self.max_per_client:
+            # One of the client's own tasks has to finish; in the worst case the last one of them queued
+            self._reject("client", lane, self._client_queued.get(client, 0) + 1)
+        # Tasks still waiting for their claim-detection call hold a queue place too, so count every admitted task
+        free_slots = max(0, self.scheduler.capacity - self.running)
+        if self.queued[lane] >= self.max_queued + free_slots:
+            self._reject("global", lane, 1)
+
+        self._per_client[client] = held + 1
+        self._client_queued[client] = self._client_queued.get(client, 0) + 1
+        self.queued[lane] += 1
+        TASKS_QUEUED.labels(lane=lane).inc()
+        return Ticket(self, client, lane)
+
+    def _reject(self, scope: str, lane: str, ahead: int) -> None:
+        ADMISSION_REJECTIONS.labels(scope=scope, lane=lane).inc()
+        retry_after = self.retry_after(ahead)
+        logger.warning(
+            f"Rejecting {lane} fact-check task ({scope} limit): {self.running} running, {self.queued[lane]} queued, "
+            f"retry after {retry_after}s"
+        )
+        raise AdmissionRejected(scope, retry_after)
+
+    def _start(self, client: str, lane: str) -> None:
+        self._decrement(self._client_queued, client)
+        self.queued[lane] -= 1
+        self.running += 1
+        TASKS_QUEUED.labels(lane=lane).dec()
+        TASKS_IN_FLIGHT.labels(lane=lane).inc()
+
+    def _leave(self, client: str, lane: str, started: bool) -> None:
+        if started:
+            self.running -= 1
+            TASKS_IN_FLIGHT.labels(lane=lane).dec()
+        else:
+            self._decrement(self._client_queued, client)
+            self.queued[lane] -= 1
+            TASKS_QUEUED.labels(lane=lane).dec()
+        self._decrement(self._per_client, client)
+
+    @staticmethod
+    def _decrement(counts: dict[str, int], client: str) -> None:
+        remaining = counts.get(client, 1) - 1
+        if remaining > 0:
+            counts[client] = remaining
+        else:
+            counts.pop(client, None)
+
+
+admission = AdmissionController(pipeline_scheduler, settings.max_queued_tasks, settings.max_tasks_per_client)
+
+
+def client_key(api_key: Optional[str], host: Optional[str]) -> str:
+    """
+    Identifies the caller for per-client limits: the API key when it is one of CLIENT_API_KEYS, the client address
+    otherwise (an unchecked key would let a caller get a fresh quota per request by sending a new one).
+    """
+    if api_key and any(hmac.compare_digest(api_key.encode(), known.encode()) for known in settings.client_api_keys):
+        return f"key:{api_key}"
+    return f"ip:{host or 'unknown'}"
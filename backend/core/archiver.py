@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import AnyHttpUrl
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.breakers import WAYBACK, breaker, fallback
+from core.db import ARCHIVES_COLLECTION, COLLECTION_NAME, DB_NAME, TASKS_COLLECTION
+from core.jobs import spawn
+from core.metrics import CACHE_LOOKUPS, UPSTREAM_ERRORS, stage
+from core.postprocessors import archive_url
+from core.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Caps concurrent Wayback saves per worker; created lazily so it binds to the running loop
+_wayback_slots: Optional[asyncio.Semaphore] = None
+# canonical url -> in-flight archive job, so concurrent requests for the same page share one save
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def _slots() -> asyncio.Semaphore:
+    global _wayback_slots
+    if _wayback_slots is None:
+        _wayback_slots = asyncio.Semaphore(settings.archive_concurrency)
+    return _wayback_slots
+
+
+async def get_cached_archive(client: AsyncIOMotorClient, canonical_url: str) -> Optional[str]:
+    """Returns the stored archive url if it was taken within the freshness window."""
+    try:
+        fresh_after = datetime.now(UTC) - timedelta(hours=settings.archive_freshness_hours)
+        doc = await client[DB_NAME][ARCHIVES_COLLECTION].find_one(
+            {"url": canonical_url, "archived_at": {"$gte": fresh_after}}, {"archive": 1}
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    CACHE_LOOKUPS.labels(cache="archive", result="hit" if doc else "miss").inc()
+    return doc["archive"] if doc else None
+
+
+async def _archive(client: AsyncIOMotorClient, canonical_url: str, url: str) -> Optional[str]:
+    cached = await get_cached_archive(client, canonical_url)
+    if cached:
+        return cached
+
+    async with _slots():
+        # Archiving is best effort: skipped outright while Wayback is failing instead of tying up a slot for minutes
+        wayback = breaker(WAYBACK)
+        if fallback(WAYBACK, "skip_archive") or (token := wayback.allow()) is None:
+            return None
+        start = time.perf_counter()
+        try:
+            with stage("archive"):
+                # waybackpy is synchronous and can block for tens of seconds
+                archive = await asyncio.to_thread(archive_url, url)
+        except Exception as e:
+            wayback.record(token, time.perf_counter() - start, failed=True)
+            UPSTREAM_ERRORS.labels(upstream="wayback").inc()
+            logger.debug("Archiving failed for %s: %s", url, e)
+            return None
+        except BaseException:
+            wayback.cancelled(token)
+            raise
+        # archive_url returns the original url when Wayback gave up after its retries
+        wayback.record(token, time.perf_counter() - start, failed=not archive or archive == url)
+
+    # archive_url falls back to the original url when Wayback gives up; don't cache that as an archive
+    if archive and archive != url:
+        try:
+            await client[DB_NAME][ARCHIVES_COLLECTION].update_one(
+                {"url": canonical_url},
+                {"$set": {"archive": archive, "archived_at": datetime.now(UTC)}},
+                upsert=True,
+            )
+        except PyMongoError:
+            UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+    return archive
+
+
+async def _archive_for_task(client: AsyncIOMotorClient, task_id: UUID, url: str) -> None:
+    canonical_url = canonicalize_url(url)
+    job = _in_flight.get(canonical_url)
+    if job is None:
+        job = asyncio.ensure_future(_archive(client, canonical_url, url))
+        _in_flight[canonical_url] = job
+        job.add_done_callback(lambda _: _in_flight.pop(canonical_url, None))
+
+    archive = await asyncio.shield(job)
+    if not archive:
+        return
+
+    try:
+        db = client[DB_NAME]
+        await db[TASKS_COLLECTION].update_one({"task_id": str(task_id)}, {"$set": {"result.archive": archive}})
+        await db[COLLECTION_NAME].update_many({"url": url, "archive": None}, {"$set": {"archive": archive}})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+
+
+def schedule_archive(client: AsyncIOMotorClient, task_id: UUID, url: AnyHttpUrl) -> None:
+    """Archives ``url`` in the background after the verdict is published and fills in ``result.archive`` later."""
+    spawn(_archive_for_task(client, task_id, str(url)), name=f"archive-{task_id}")
@@ -0,0 +1,180 @@
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.config import settings
+from core.metrics import BREAKER_REJECTIONS, BREAKER_STATE, UPSTREAM_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Token allow() hands out for ordinary calls; the half-open probe gets one of its own
+CALL = object()
+
+# Upstreams guarded outside core.http (blocking client libraries called from a thread)
+TRANSLATOR = "translator"
+WAYBACK = "wayback"
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream whose breaker is open; work failing with it can be retried later."""
+
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} is temporarily unavailable, retry in {retry_after}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def groq_upstream(model: str) -> str:
+    """Groq models fail independently (per-model capacity and rate limits), so each gets its own breaker."""
+    return f"groq:{model}"
+
+
+class CircuitBreaker:
+    """
+    Error-rate and slow-call breaker for one upstream.
+
+    Closed: calls go through and their outcomes are kept for ``breaker_window_seconds``. Once the window holds
+    ``breaker_min_calls`` calls and the failure or slow-call share reaches its threshold, the breaker opens and calls
+    fail fast. After ``breaker_open_seconds`` it goes half-open and lets a single probe through: a good probe closes
+    it, a failed or slow one opens it again. Calls admitted before the breaker went half-open don't decide anything
+    when they finish: only the probe, recognised by the token allow() gave it, does.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.slow_call_seconds = settings.breaker_slow_call_seconds.get(name.partition(":")[0], math.inf)
+        # (finished at, failed, slow)
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        # Token of the half-open probe in flight
+        self._probe: Optional[object] = None
+        BREAKER_STATE.labels(upstream=name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            log = logger.warning if state == OPEN else logger.info
+            log("Circuit breaker %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        BREAKER_STATE.labels(upstream=self.name).set(STATE_VALUES[state])
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._probe = None
+        self._calls.clear()
+        self._set_state(OPEN)
+
+    def retry_after(self) -> int:
+        if self.state != OPEN:
+            return 1
+        return max(1, math.ceil(self._opened_at + settings.breaker_open_seconds - time.monotonic()))
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through; unlike allow() it doesn't take the half-open probe."""
+        if self.state == OPEN:
+            return time.monotonic() - self._opened_at >= settings.breaker_open_seconds
+        return not (self.state == HALF_OPEN and self._probe is not None)
+
+    def allow(self) -> Optional[object]:
+        """
+        Admits a call: returns its token (None when it is rejected), which must then be passed to record() or
+        cancelled().
+        """
+        if self.state == OPEN and time.monotonic() - self._opened_at >= settings.breaker_open_seconds:
+            self._set_state(HALF_OPEN)
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probe is not None):
+            BREAKER_REJECTIONS.labels(upstream=self.name).inc()
+            return None
+        if self.state == HALF_OPEN:
+            self._probe = object()
+            return self._probe
+        return CALL
+
+    def record(self, token: object, seconds: float, failed: bool) -> None:
+        slow = seconds >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if token is not self._probe:
+                # Admitted before the breaker opened; its outcome says nothing about the upstream's recovery
+                return
+            if failed or slow:
+                self._trip()
+            else:
+                self._probe = None
+                self._set_state(CLOSED)
+            return
+        if self.state == OPEN:
+            # A call admitted before the breaker opened
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, failed, slow))
+        while self._calls and self._calls[0][0] < now - settings.breaker_window_seconds:
+            self._calls.popleft()
+        if len(self._calls) < settings.breaker_min_calls:
+            return
+        failures = sum(1 for _, f, _ in self._calls if f)
+        slow_calls = sum(1 for _, _, s in self._calls if s)
+        if failures >= settings.breaker_error_rate * len(
+            self._calls
+        ) or slow_calls >= settings.breaker_slow_call_rate * len(self._calls):
+            self._trip()
+
+    def cancelled(self, token: object) -> None:
+        """An admitted call was abandoned without an outcome (e.g. its task was cancelled)."""
+        if self.state == HALF_OPEN and token is self._probe:
+            self._probe = None
+
+    @asynccontextmanager
+    async def call(self) -> AsyncIterator[None]:
+        """Guards a call: raises UpstreamUnavailable when open, otherwise records the call's outcome and latency."""
+        token = self.allow()
+        if token is None:
+            raise UpstreamUnavailable(self.name, self.retry_after())
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(token, time.perf_counter() - start, failed=True)
+            raise
+        except BaseException:
+            self.cancelled(token)
+            raise
+        self.record(token, time.perf_counter() - start, failed=False)
+
+
+# Per worker process, like the schedulers: each worker learns about a failing upstream from its own calls
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker(upstream: str) -> CircuitBreaker:
+    cb = _breakers.get(upstream)
+    if cb is None:
+        cb = _breakers[upstream] = CircuitBreaker(upstream)
+    return cb
+
+
+def fallback(upstream: str, name: str) -> bool:
+    """
+    True when ``upstream`` is unavailable and the caller should take its ``name`` degraded path instead of calling;
+    the degraded path is counted.
+    """
+    if breaker(upstream).available():
+        return False
+    UPSTREAM_FALLBACKS.labels(upstream=upstream, fallback=name).inc()
+    return True
+
+
+def breaker_states() -> dict[str, str]:
+    """State of every breaker this worker has created (reported by /api/health/)."""
+    # An open breaker whose cool-down is over is half-open, even before the next call moves it there
+    return {
+        name: HALF_OPEN if cb.state == OPEN and cb.available() else cb.state for name, cb in sorted(_breakers.items())
+    }
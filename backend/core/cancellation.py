@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+from uuid import UUID
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.db import DB_NAME, TASKS_COLLECTION, cancel_task
+from core.metrics import TASKS_CANCELLED, UPSTREAM_ERRORS
+from schemas import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Fact-check runs (queued or executing) on this worker, so a cancellation can stop them mid-flight
+_running: dict[UUID, asyncio.Task] = {}
+_watch_task: Optional[asyncio.Task] = None
+
+
+async def run_cancellable(task_id: UUID, func: Callable[..., Awaitable[None]], *args: Any) -> None:
+    """
+    Runs ``func(*args)`` (a task's run through admission and the pipeline) as its own asyncio task, which
+    cancel_running stops: every pending HTTP and LLM call is aborted and nothing after it is written.
+    """
+    job = asyncio.ensure_future(func(*args))
+    _running[task_id] = job
+    try:
+        await job
+    except asyncio.CancelledError:
+        # Cancelled from outside (shutdown): passed on; cancelled through cancel_running: done
+        if asyncio.current_task().cancelling():
+            raise
+    finally:
+        if _running.get(task_id) is job:
+            del _running[task_id]
+
+
+def cancel_running(task_id: UUID) -> bool:
+    """Cancels the task's run if it is on this worker."""
+    job = _running.get(task_id)
+    if job is None or job.done():
+        return False
+    job.cancel()
+    return True
+
+
+async def cancel(mongo_client: AsyncIOMotorClient, task_id: UUID, reason: str, message: str) -> Optional[str]:
+    """
+    Cancels an unfinished task: marks it cancelled (so no later write of its pipeline sticks) and stops its run if it
+    is on this worker; the worker running it otherwise stops it within CANCEL_POLL_SECONDS. Returns the status the
+    task was in, or None if it had already finished or doesn't exist.
+    """
+    previous = await cancel_task(mongo_client, task_id, message)
+    if previous is None:
+        return None
+    TASKS_CANCELLED.labels(reason=reason).inc()
+    cancel_running(task_id)
+    logger.info(f"Task {task_id} cancelled ({reason}) while {previous}")
+    return previous
+
+
+async def sweep_cancellations(mongo_client: AsyncIOMotorClient) -> None:
+    """Stops this worker's runs of tasks cancelled through another worker, and cancels the abandoned ones."""
+    if not _running:
+        return
+    try:
+        docs = await (
+            mongo_client[DB_NAME][TASKS_COLLECTION]
+            .find(
+                {
+                    "task_id": {"$in": [str(task_id) for task_id in _running]},
+                    "$or": [
+                        {"status": TaskStatus.CANCELLED.value},
+                        {"input_data.abandon_after_seconds": {"$ne": None}},
+                    ],
+                },
+                {"_id": 0, "task_id": 1, "status": 1, "polled_at": 1, "input_data.abandon_after_seconds": 1},
+            )
+            .to_list(length=None)
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return
+
+    now = datetime.now(UTC)
+    for doc in docs:
+        task_id = UUID(doc["task_id"])
+        if doc["status"] == TaskStatus.CANCELLED.value:
+            cancel_running(task_id)
+            continue
+        abandon_after = doc["input_data"]["abandon_after_seconds"]
+        polled_at = doc.get("polled_at")
+        if polled_at is not None and polled_at.replace(tzinfo=UTC) + timedelta(seconds=abandon_after) < now:
+            await cancel(mongo_client, task_id, "abandoned", f"Cancelled: not polled for {abandon_after:g}s")
+
+
+async def _watch_loop(mongo_client: AsyncIOMotorClient) -> None:
+    while True:
+        await asyncio.sleep(settings.cancel_poll_seconds)
+        await sweep_cancellations(mongo_client)
+
+
+def start_cancellation_watcher(mongo_client: AsyncIOMotorClient) -> None:
+    global _watch_task
+    _watch_task = asyncio.get_running_loop().create_task(_watch_loop(mongo_client), name="task-cancellation")
+
+
+def stop_cancellation_watcher() -> None:
+    global _watch_task
+    if _watch_task is not None:
+        _watch_task.cancel()
+        _watch_task = None
@@ -0,0 +1,217 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import logging
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Literal, Optional
+
+import httpx
+import ujson
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+CassetteMode = Literal["off", "record", "replay"]
+
+# Never written to a cassette
+REDACTED_HEADERS = {"authorization", "api-key", "x-api-key", "cookie", "set-cookie", "x-goog-api-key"}
+REDACTED_PARAMS = {"key"}
+# Describe the original wire encoding, which no longer applies to the decoded body we store
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class CassetteMiss(httpx.TransportError):
+    pass
+
+
+def _redacted_url(url: httpx.URL) -> str:
+    params = [(k, v) for k, v in url.params.multi_items() if k not in REDACTED_PARAMS]
+    return str(url.copy_with(params=params))
+
+
+def _json_body(body: bytes) -> Optional[dict]:
+    try:
+        parsed = ujson.loads(body)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _exact_key(method: str, url: str, body: bytes) -> str:
+    return f"{method} {url} {hashlib.sha256(body).hexdigest()[:16]}"
+
+
+def _loose_key(method: str, url: httpx.URL, body: bytes) -> str:
+    """Input-independent key: the endpoint plus, for LLM calls, the model and the structured output it asks for."""
+    key = f"{method} {url.host}{url.path}"
+    payload = _json_body(body) if body else None
+    if payload:
+        tools = payload.get("tools") or [{}]
+        response_format = payload.get("response_format") or {}
+        output = tools[0].get("function", {}).get("name") or response_format.get("json_schema", {}).get("name", "")
+        key += f" {payload.get('model', '')} {output}"
+    return key
+
+
+def _encode_body(content: bytes) -> dict[str, str]:
+    try:
+        return {"text": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(entry: dict) -> bytes:
+    if "b64" in entry:
+        return base64.b64decode(entry["b64"])
+    return entry.get("text", "").encode("utf-8")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Records every upstream request/response (bodies and timings) to a gzipped JSON-lines cassette, or replays one.
+
+    Replay matches on the exact request first (method, URL, body hash) and falls back to the endpoint + model +
+    response schema, cycling through recorded responses in order, so the pipeline can be re-run deterministically
+    on inputs that differ from the recorded ones.
+
+    Recorded entries are queued and written by a background task in a worker thread, one batch at a time, so gzip
+    compression and file I/O stay off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: CassetteMode,
+        *,
+        keep_timing: bool = False,
+        strict: bool = False,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.path = Path(path)
+        self.mode = mode
+        self.keep_timing = keep_timing
+        self.strict = strict
+        self._inner: Optional[httpx.AsyncBaseTransport] = None
+        self._file = None
+        # Record mode: lines waiting to be written, and the task writing them
+        self._pending: list[str] = []
+        self._writer: Optional[asyncio.Task] = None
+        self._exact: dict[str, list[dict]] = {}
+        self._loose: dict[str, list[dict]] = {}
+        self._cursor: dict[str, int] = {}
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._inner = inner or httpx.AsyncHTTPTransport()
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._pending.append(
+                ujson.dumps({"version": CASSETTE_VERSION, "recorded_at": datetime.now(UTC).isoformat()})
+            )
+        elif mode == "replay":
+            self._load()
+        else:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+
+    def _load(self) -> None:
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                entry = ujson.loads(line)
+                if "request" not in entry:
+                    continue
+                self._exact.setdefault(entry["exact_key"], []).append(entry)
+                self._loose.setdefault(entry["loose_key"], []).append(entry)
+                count += 1
+        logger.info("Loaded %d cassette entries from %s", count, self.path)
+
+    def _next(self, index: dict[str, list[dict]], key: str) -> Optional[dict]:
+        entries = index.get(key)
+        if not entries:
+            return None
+        position = self._cursor.get(key, 0)
+        self._cursor[key] = position + 1
+        return entries[position % len(entries)]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        url = _redacted_url(request.url)
+        exact_key = _exact_key(request.method, url, body)
+        loose_key = _loose_key(request.method, request.url, body)
+
+        if self.mode == "replay":
+            return await self._replay(request, exact_key, loose_key)
+
+        start = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        content = await response.aread()
+        elapsed = time.perf_counter() - start
+
+        entry = {
+            "exact_key": exact_key,
+            "loose_key": loose_key,
+            "elapsed": round(elapsed, 4),
+            "request": {
+                "method": request.method,
+                "url": url,
+                "headers": {k: v for k, v in request.headers.items() if k.lower() not in REDACTED_HEADERS},
+                "body": _encode_body(body),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in REDACTED_HEADERS},
+                "body": _encode_body(content),
+            },
+        }
+        self._pending.append(ujson.dumps(entry, escape_forward_slashes=False))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write_pending())
+
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in HOP_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def _replay(self, request: httpx.Request, exact_key: str, loose_key: str) -> httpx.Response:
+        entry = self._next(self._exact, exact_key) or (None if self.strict else self._next(self._loose, loose_key))
+        if entry is None:
+            logger.warning("Cassette miss: %s", loose_key)
+            raise CassetteMiss(f"No cassette entry for {loose_key}", request=request)
+
+        if self.keep_timing:
+            await asyncio.sleep(entry["elapsed"])
+
+        recorded = entry["response"]
+        headers = [(k, v) for k, v in recorded["headers"].items() if k.lower() not in HOP_HEADERS]
+        return httpx.Response(
+            recorded["status"], headers=headers, content=_decode_body(recorded["body"]), request=request
+        )
+
+    async def _write_pending(self) -> None:
+        # Entries recorded while a batch is being written go out with the next one
+        while self._pending and self._file is not None:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except OSError as e:
+                logger.warning(f"Could not write {len(batch)} cassette entries: {e}")
+
+    def _write(self, lines: list[str]) -> None:
+        self._file.write("".join(line + "\n" for line in lines))
+        self._file.flush()
+
+    async def aclose(self) -> None:
+        # Shared by every client created through core.http, which close their transport on exit; see close()
+        pass
+
+    async def close(self) -> None:
+        if self._file is not None:
+            if self._writer is not None:
+                await self._writer
+            # Header only, when nothing was recorded
+            await self._write_pending()
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+        if self._inner is not None:
+            await self._inner.aclose()
+            self._inner = None
@@ -0,0 +1,81 @@
+import hashlib
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from core.db import DB_NAME, TASKS_COLLECTION
+from core.metrics import CHECKPOINTS_RESTORED, UPSTREAM_ERRORS, stage
+
+logger = logging.getLogger(__name__)
+
+# Stages whose output is checkpointed; per-claim stages are keyed by claim_key()
+ENGLISH_CONTENT = "english_content"
+SUMMARY = "summary"
+FALLACY_RESULT = "fallacy_result"
+CLAIMS = "claims"
+SEARCH_QUERY = "search_query"
+EVIDENCE = "evidence"
+
+
+def claim_key(claim: str) -> str:
+    return hashlib.sha256(claim.encode()).hexdigest()[:16]
+
+
+class TaskCheckpoints:
+    """
+    Stage outputs of one task, persisted under ``checkpoints`` on its task document as each stage completes, so a
+    retried or resumed task continues after the last completed stage instead of starting over.
+    """
+
+    def __init__(self, mongo_client: AsyncIOMotorClient, task_id: UUID, saved: Optional[dict[str, Any]] = None):
+        self._mongo_client = mongo_client
+        self.task_id = task_id
+        self.values: dict[str, Any] = dict(saved or {})
+
+    def get(self, name: str, key: Optional[str] = None) -> Any:
+        value = self.values.get(name)
+        if key is not None:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            CHECKPOINTS_RESTORED.labels(stage=name).inc()
+        return value
+
+    async def save(self, name: str, value: Any, key: Optional[str] = None) -> None:
+        """Persists a stage's (JSON-ready) output; a failed write only costs redoing the stage on resume."""
+        if key is None:
+            self.values[name] = value
+            path = f"checkpoints.{name}"
+        else:
+            self.values.setdefault(name, {})[key] = value
+            path = f"checkpoints.{name}.{key}"
+        try:
+            with stage("mongo_write"):
+                # updated_at doubles as the task's progress marker
+                await self._mongo_client[DB_NAME][TASKS_COLLECTION].update_one(
+                    {"task_id": str(self.task_id)},
+                    {"$set": {path: value, "updated_at": datetime.now().isoformat()}},
+                )
+        except PyMongoError:
+            UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+            logger.debug(f"Could not checkpoint {path} of task {self.task_id}")
+
+
+# Set by the task runner; stages further down the call tree (search query, evidence) checkpoint through it
+_task_checkpoints: ContextVar[Optional[TaskCheckpoints]] = ContextVar("task_checkpoints", default=None)
+
+
+def start_checkpoints(
+    mongo_client: AsyncIOMotorClient, task_id: UUID, saved: Optional[dict[str, Any]] = None
+) -> TaskCheckpoints:
+    checkpoints = TaskCheckpoints(mongo_client, task_id, saved)
+    _task_checkpoints.set(checkpoints)
+    return checkpoints
+
+
+def current_checkpoints() -> Optional[TaskCheckpoints]:
+    return _task_checkpoints.get()
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+from groq import AsyncGroq
+from motor.motor_asyncio import AsyncIOMotorClient
+from openai import AsyncOpenAI
+from pydantic import AnyHttpUrl, BaseModel, Field
+
+from app.config import settings
+from core.breakers import fallback
+from core.checkpoints import CLAIMS, current_checkpoints
+from core.db import add_to_db
+from core.deadline import time_before_evidence
+from core.fact import fact_check_process
+from core.freshness import STALE, verdict_freshness
+from core.metrics import UPSTREAM_ERRORS, stage
+from core.revalidation import schedule_revalidation
+from core.routing import CLAIM_DECOMPOSITION, call_routed, model_upstream, route, structured
+from schemas import ClaimVerdict, FactCheckLabel, FactCheckResponse, TextInputData
+
+logger = logging.getLogger(__name__)
+
+# Worst label wins when combining per-claim verdicts
+LABEL_SEVERITY = {FactCheckLabel.CORRECT: 0, FactCheckLabel.MISLEADING: 1, FactCheckLabel.INCORRECT: 2}
+DECOMPOSITION_MAX_TOKENS = 500
+
+
+class AtomicClaims(BaseModel):
+    claims: list[str] = Field(description="Self-contained, individually verifiable factual claims")
+
+
+async def verify_claim(
+    groq_client: AsyncGroq,
+    openai_client: AsyncOpenAI,
+    mongo_client: AsyncIOMotorClient,
+    text_data: TextInputData,
+) -> FactCheckResponse:
+    """Verifies one claim through the verdict cache: stores new verdicts and re-checks stale cached ones."""
+    result, is_cached = await fact_check_process(
+        groq_client=groq_client,
+        openai_client=openai_client,
+        text_data=text_data,
+        mongo_client=mongo_client,
+    )
+    if not is_cached:
+        await add_to_db(mongo_client, result)
+    elif result.partial_evidence or verdict_freshness(result.label.value, result.updatedAt) == STALE:
+        # Serve the cached verdict now; a re-check refreshes (or versions) it for later requests. Verdicts built on
+        # deadline-truncated evidence are re-checked with the full evidence right away.
+        schedule_revalidation(groq_client, openai_client, mongo_client, result)
+    return result
+
+
+async def decompose_claims(groq_client: AsyncGroq, text: str) -> list[str]:
+    """Splits text into atomic claims; falls back to the whole text as a single claim."""
+    models = route(CLAIM_DECOMPOSITION, text, DECOMPOSITION_MAX_TOKENS)
+    if fallback(model_upstream(models[0]), "single_claim"):
+        return [text]
+    try:
+        with stage("claim_decomposition"):
+            decomposition = await asyncio.wait_for(
+                call_routed(
+                    CLAIM_DECOMPOSITION,
+                    models,
+                    lambda model, client: structured(client).chat.completions.create(
+                        model=model,
+                        response_model=AtomicClaims,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": (
+                                    "Split the text into the distinct factual claims it makes. Each claim must be a "
+                                    "single self-contained sentence that can be verified on its own: resolve pronouns, "
+                                    "keep names, numbers and dates, and leave out opinions. "
+                                    f"Return at most {settings.max_atomic_claims} claims, most important first."
+                                ),
+                            },
+                            {"role": "user", "content": text},
+                        ],
+                        max_tokens=DECOMPOSITION_MAX_TOKENS,
+                        max_retries=2,
+                    ),
+                    groq_client,
+                ),
+                timeout=time_before_evidence(),
+            )
+    except asyncio.TimeoutError:
+        logger.warning("Claim decomposition out of time budget; checking the text as one claim")
+        return [text]
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream="groq").inc()
+        logger.error("Error decomposing claims: %s", e)
+        return [text]
+
+    claims = list(dict.fromkeys(c.strip() for c in decomposition.claims if c and c.strip()))
+    return claims[: settings.max_atomic_claims] or [text]
+
+
+def combine_verdicts(
+    text_data: TextInputData, claims: list[str], verdicts: list[FactCheckResponse]
+) -> FactCheckResponse:
+    label = max((v.label for v in verdicts), key=LABEL_SEVERITY.__getitem__)
+    references: list[AnyHttpUrl] = list(dict.fromkeys(ref for v in verdicts for ref in v.references))
+    return FactCheckResponse(
+        url=text_data.url,
+        label=label,
+        summary=text_data.content,
+        response="\n".join(f"{claim} [{v.label.value}] {v.response}" for claim, v in zip(claims, verdicts)),
+        references=references,
+        isSafe=verdicts[0].isSafe,
+        archive=None,
+        partial_evidence=any(v.partial_evidence for v in verdicts),
+        claims=[
+            ClaimVerdict(claim=claim, label=v.label, response=v.response, references=v.references)
+            for claim, v in zip(claims, verdicts)
+        ],
+    )
+
+
+async def fact_check_claims(
+    groq_client: AsyncGroq,
+    openai_client: AsyncOpenAI,
+    mongo_client: AsyncIOMotorClient,
+    text_data: TextInputData,
+) -> FactCheckResponse:
+    """
+    Splits the content into atomic claims and verifies them concurrently (each through its own search, verdict and
+    cache entry), then combines them: the overall label is the worst per-claim label.
+    """
+    checkpoints = current_checkpoints()
+    claims = checkpoints.get(CLAIMS) if checkpoints else None
+    if claims is None:
+        claims = await decompose_claims(groq_client, text_data.content)
+        # The whole text as the single claim is decompose_claims' fallback; a retry tries to split it again
+        if checkpoints and claims != [text_data.content]:
+            await checkpoints.save(CLAIMS, claims)
+    slots = asyncio.Semaphore(settings.claim_fanout_concurrency)
+
+    async def verify(claim: str) -> FactCheckResponse:
+        async with slots:
+            return await verify_claim(
+                groq_client, openai_client, mongo_client, TextInputData(url=text_data.url, content=claim)
+            )
+
+    verdicts = await asyncio.gather(*(verify(claim) for claim in claims))
+    return combine_verdicts(text_data, claims, verdicts)
@@ -1,19 +1,49 @@
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
-import ujson
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import AsyncMongoClient
-from pymongo.errors import PyMongoError
+from pydantic import BaseModel
+from pymongo import AsyncMongoClient, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from pymongo.typings import _DocumentType
-from datetime import datetime
+from datetime import datetime, timedelta, UTC
+import logging
 
+from core.freshness import EXPIRED, verdict_freshness
+from core.metrics import CACHE_LOOKUPS, UPSTREAM_ERRORS, stage
 from schemas import FactCheckResponse, TextInputData, TaskData, TaskStatus
 
-
 DB_NAME = "truthLens"
 COLLECTION_NAME = "articles"
 TASKS_COLLECTION = "tasks"
+ARCHIVES_COLLECTION = "archives"
+VERDICT_HISTORY_COLLECTION = "verdict_history"
+PAGES_COLLECTION = "pages"
+URL_ALIASES_COLLECTION = "url_aliases"
+EVIDENCE_COLLECTION = "evidence"
+WORKERS_COLLECTION = "workers"
+LLM_USAGE_COLLECTION = "llm_usage"
+TASK_STATS_COLLECTION = "task_stats"
+TASK_STATS_HOURLY_COLLECTION = "task_stats_hourly"
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+
+logger = logging.getLogger(__name__)
+
+# Fields the status endpoints never read; keeping them out of the projection avoids decoding large text blobs.
+TASK_STATUS_PROJECTION = {"_id": 0, "original_content": 0, "summarized_content": 0, "checkpoints": 0}
+# Statuses of a task that has not finished; one left in them by a dead worker is resumed (see core.recovery)
+ACTIVE_TASK_STATUSES = [TaskStatus.PENDING, TaskStatus.PROCESSING, TaskStatus.SUMMARIZING, TaskStatus.FACT_CHECKING]
+# Statuses counted as events in the hourly task stats (see count_transition)
+FINISHED_TASK_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.SKIPPED, TaskStatus.CANCELLED]
+# _id of the task_stats document holding the current counts per status and label
+STATS_TOTALS_ID = "totals"
+# Rounds add_to_db tries before giving up when concurrent writes of the same claim keep overtaking it
+VERDICT_WRITE_ATTEMPTS = 5
+
+
+def to_document(model: BaseModel, **kwargs: Any) -> dict[str, Any]:
+    """Converts a model into a BSON-ready dict (same shape as its JSON form, without the string round trip)."""
+    return model.model_dump(mode="json", **kwargs)
 
 
 async def db_is_working(client: AsyncMongoClient[_DocumentType]) -> bool:
@@ -24,38 +54,205 @@ async def db_is_working(client: AsyncMongoClient[_DocumentType]) -> bool:
         return False
 
 
-async def add_to_db(client: AsyncMongoClient[_DocumentType], data: FactCheckResponse) -> None:
+async def ensure_indexes(client: AsyncIOMotorClient) -> None:
+    """Creates the indexes the lookups rely on; safe to run on every startup."""
+    try:
+        db = client[DB_NAME]
+        await db[TASKS_COLLECTION].create_index("task_id", unique=True)
+        await db[TASKS_COLLECTION].create_index([("created_at", -1)])
+        await db[TASKS_COLLECTION].create_index([("status", 1), ("worker_id", 1)])
+        await db[WORKERS_COLLECTION].create_index("worker_id", unique=True)
+        # Entries of workers that are long gone expire on their own
+        await db[WORKERS_COLLECTION].create_index("heartbeat_at", expireAfterSeconds=24 * 3600)
+        await _ensure_unique_summary_index(db)
+        await db[VERDICT_HISTORY_COLLECTION].create_index([("summary", 1), ("version", -1)])
+        await db[ARCHIVES_COLLECTION].create_index("url", unique=True)
+        await db[PAGES_COLLECTION].create_index("url", unique=True)
+        await db[URL_ALIASES_COLLECTION].create_index("alias", unique=True)
+        await db[LLM_USAGE_COLLECTION].create_index([("day", 1), ("model", 1), ("stage", 1)], unique=True)
+        await db[TASK_STATS_HOURLY_COLLECTION].create_index("hour", unique=True)
+        await db[IDEMPOTENCY_COLLECTION].create_index("key", unique=True)
+        # Each key document carries its own expiry
+        await db[IDEMPOTENCY_COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+        await db[EVIDENCE_COLLECTION].create_index("url")
+        # Multikey index on the passage terms: the inverted index evidence lookups run against
+        await db[EVIDENCE_COLLECTION].create_index([("terms", 1), ("fetched_at", -1)])
+    except PyMongoError as e:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        logger.warning(f"Could not create indexes: {e}")
+
+
+async def _ensure_unique_summary_index(db: Any) -> None:
+    """
+    Makes ``summary`` unique in the verdict collection (one current verdict per claim). Older deployments have a plain
+    index there, which is replaced, and may hold several verdicts of a claim: all but the newest move to the history.
+    """
+    collection = db[COLLECTION_NAME]
+    index = (await collection.index_information()).get("summary_1")
+    if index is not None and index.get("unique"):
+        return
+    duplicates = await collection.aggregate(
+        [
+            {"$sort": {"updatedAt": -1}},
+            {"$group": {"_id": "$summary", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+    ).to_list(length=None)
+    for group in duplicates:
+        async for previous in collection.find({"_id": {"$in": group["ids"][1:]}}):
+            del previous["_id"]
+            previous.setdefault("version", 1)
+            previous["supersededAt"] = datetime.now(UTC)
+            await db[VERDICT_HISTORY_COLLECTION].insert_one(previous)
+        await collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+    if duplicates:
+        logger.info(f"Moved older duplicate verdicts of {len(duplicates)} claims to the history")
+    if index is not None:
+        await collection.drop_index("summary_1")
+    await collection.create_index("summary", unique=True)
+
+
+async def add_to_db(client: AsyncMongoClient[_DocumentType], data: FactCheckResponse) -> bool:
+    """
+    Stores the current verdict for a claim, replacing the previous one. When the label changed, the previous verdict
+    is kept in the history collection and the version is bumped. Returns whether the label changed.
+
+    Concurrent writes of the same claim don't lose versions: the replacement only applies to the verdict it was
+    computed from (matched on its ``updatedAt``), and a write that was overtaken starts over from the newer verdict.
+    """
     try:
         collection = client[DB_NAME][COLLECTION_NAME]
-        payload = ujson.loads(data.model_dump_json())
-        await collection.insert_one(payload)
+        with stage("mongo_write"):
+            for _ in range(VERDICT_WRITE_ATTEMPTS):
+                existing = await collection.find_one(
+                    {"summary": data.summary}, {"label": 1, "version": 1, "url": 1, "archive": 1, "updatedAt": 1}
+                )
+                if existing is None:
+                    try:
+                        await collection.insert_one(to_document(data))
+                    except DuplicateKeyError:
+                        # Another write of the claim got in first (the summary index is unique)
+                        continue
+                    return False
+
+                changed = existing.get("label") != data.label.value
+                data.version = existing.get("version", 1) + (1 if changed else 0)
+                if data.archive is None and str(data.url) == str(existing.get("url")):
+                    data.archive = existing.get("archive")
+                previous = await collection.find_one_and_replace(
+                    {"_id": existing["_id"], "updatedAt": existing.get("updatedAt")},
+                    to_document(data),
+                    projection={"_id": 0},
+                    return_document=ReturnDocument.BEFORE,
+                )
+                if previous is None:
+                    continue
+                if changed:
+                    previous.setdefault("version", 1)
+                    previous["supersededAt"] = datetime.now(UTC)
+                    await client[DB_NAME][VERDICT_HISTORY_COLLECTION].insert_one(previous)
+                return changed
+        logger.warning(f"Verdict not stored: {VERDICT_WRITE_ATTEMPTS} concurrent writes of the claim overtook it")
+        return False
     except PyMongoError:
-        pass
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return False
 
 
 async def fetch_from_db_if_exists(
     client: AsyncIOMotorClient,
     data: TextInputData,
 ) -> Optional[FactCheckResponse]:
+    """Returns the cached verdict for the claim unless it has expired (see core.freshness)."""
     try:
         collection = client[DB_NAME][COLLECTION_NAME]
-        existing = await collection.find_one({"summary": data.content})
-        if existing:
-            print(existing)
-            return FactCheckResponse.model_validate(existing)
-        return None
+        existing = await collection.find_one({"summary": data.content}, sort=[("updatedAt", DESCENDING)])
+        if not existing:
+            CACHE_LOOKUPS.labels(cache="verdict", result="miss").inc()
+            return None
+        cached = FactCheckResponse.model_validate(existing)
     except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
         return None
 
+    freshness = verdict_freshness(cached.label.value, cached.updatedAt)
+    CACHE_LOOKUPS.labels(cache="verdict", result="hit" if freshness != EXPIRED else "miss").inc()
+    CACHE_LOOKUPS.labels(cache="verdict_freshness", result=freshness).inc()
+    return cached if freshness != EXPIRED else None
+
+
+async def claim_revalidation(client: AsyncIOMotorClient, summary: str, interval_minutes: int) -> bool:
+    """Marks a claim as being re-checked; False if another re-check started within the interval (on any worker)."""
+    now = datetime.now(UTC)
+    try:
+        claimed = await client[DB_NAME][COLLECTION_NAME].find_one_and_update(
+            {
+                "summary": summary,
+                "$or": [
+                    {"revalidatingAt": {"$exists": False}},
+                    {"revalidatingAt": {"$lt": now - timedelta(minutes=interval_minutes)}},
+                ],
+            },
+            {"$set": {"revalidatingAt": now}},
+            projection={"_id": 1},
+            sort=[("updatedAt", DESCENDING)],
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return False
+    return claimed is not None
+
+
+def stats_hour(moment: datetime) -> str:
+    """Hourly stats bucket of a time, the same prefix as the ISO timestamps stored on tasks (2024-05-01T13)."""
+    return moment.strftime("%Y-%m-%dT%H")
+
+
+async def count_transition(
+    client: AsyncIOMotorClient, previous: Optional[str], status: TaskStatus, label: Optional[str] = None
+) -> None:
+    """
+    Moves a task from the ``previous`` status (None for a new task) to ``status`` in the task stats: the count per
+    status, the count per label of completed tasks, and the hourly created / finished counts.
+    """
+    if previous == status.value:
+        return
+    totals: dict[str, int] = {f"status.{status.value}": 1}
+    if previous is not None:
+        totals[f"status.{previous}"] = -1
+    hourly: dict[str, int] = {}
+    if previous is None:
+        hourly["created"] = 1
+    if status in FINISHED_TASK_STATUSES:
+        hourly[status.value] = 1
+    if status == TaskStatus.COMPLETED and label:
+        totals[f"label.{label}"] = 1
+        hourly[f"label.{label}"] = 1
+
+    db = client[DB_NAME]
+    try:
+        await db[TASK_STATS_COLLECTION].update_one({"_id": STATS_TOTALS_ID}, {"$inc": totals}, upsert=True)
+        if hourly:
+            await db[TASK_STATS_HOURLY_COLLECTION].update_one(
+                {"hour": stats_hour(datetime.now())}, {"$inc": hourly}, upsert=True
+            )
+    except PyMongoError:
+        # Left to the next stats rebuild to correct
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+
 
 async def create_task(client: AsyncIOMotorClient, task_data: TaskData) -> None:
     """Create a new task in the database"""
     try:
         collection = client[DB_NAME][TASKS_COLLECTION]
-        payload = ujson.loads(task_data.model_dump_json())
-        await collection.insert_one(payload)
+        payload = to_document(task_data)
+        # Tasks with an abandonment timeout are cancelled once nobody has polled them for that long (see core.cancellation)
+        payload["polled_at"] = datetime.now(UTC)
+        with stage("mongo_write"):
+            await collection.insert_one(payload)
+            await count_transition(client, None, task_data.status)
     except PyMongoError:
-        pass
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
 
 
 async def update_task_status(
@@ -64,29 +261,81 @@ async def update_task_status(
     status: TaskStatus,
     message: str = "",
     result: Optional[FactCheckResponse] = None,
+    timings: Optional[dict[str, float]] = None,
+    retryable: bool = False,
 ) -> None:
-    """Update the status of a task"""
+    """Update the status of a task, and the task stats with it"""
     try:
         collection = client[DB_NAME][TASKS_COLLECTION]
-        update_data = {"status": status.value, "message": message, "updated_at": datetime.now().isoformat()}
+        update_data = {
+            "status": status.value,
+            "message": message,
+            "updated_at": datetime.now().isoformat(),
+            "retryable": retryable,
+        }
         if result:
-            update_data["result"] = ujson.loads(result.model_dump_json())
+            update_data["result"] = to_document(result)
+        if timings is not None:
+            update_data["timings"] = timings
+
+        with stage("mongo_write"):
+            # The document as it was before the update: its status is the one the task leaves
+            # A cancelled task stays cancelled, whatever its pipeline still gets to write
+            previous = await collection.find_one_and_update(
+                {"task_id": str(task_id), "status": {"$ne": TaskStatus.CANCELLED.value}},
+                {"$set": update_data},
+                projection={"_id": 0, "status": 1},
+            )
+            if previous is not None:
+                await count_transition(client, previous.get("status"), status, result.label.value if result else None)
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+
+
+async def cancel_task(client: AsyncIOMotorClient, task_id: UUID, message: str) -> Optional[str]:
+    """Cancels a task that hasn't finished. Returns the status it was in, or None if it was finished or doesn't exist."""
+    try:
+        with stage("mongo_write"):
+            previous = await client[DB_NAME][TASKS_COLLECTION].find_one_and_update(
+                {"task_id": str(task_id), "status": {"$in": [s.value for s in ACTIVE_TASK_STATUSES]}},
+                {
+                    "$set": {
+                        "status": TaskStatus.CANCELLED.value,
+                        "message": message,
+                        "updated_at": datetime.now().isoformat(),
+                        "retryable": False,
+                    }
+                },
+                projection={"_id": 0, "status": 1},
+            )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    if previous is None:
+        return None
+    await count_transition(client, previous.get("status"), TaskStatus.CANCELLED)
+    return previous.get("status")
 
-        await collection.update_one({"task_id": str(task_id)}, {"$set": update_data})
+
+async def record_poll(client: AsyncIOMotorClient, task_id: UUID, min_interval_seconds: float) -> None:
+    """Notes that a task's client is still polling it; written at most once per ``min_interval_seconds``."""
+    now = datetime.now(UTC)
+    try:
+        await client[DB_NAME][TASKS_COLLECTION].update_one(
+            {"task_id": str(task_id), "polled_at": {"$lt": now - timedelta(seconds=min_interval_seconds)}},
+            {"$set": {"polled_at": now}},
+        )
     except PyMongoError:
-        pass
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
 
 
 async def get_task_status(client: AsyncIOMotorClient, task_id: UUID) -> Optional[TaskData]:
     """Get the current status of a task"""
     try:
         collection = client[DB_NAME][TASKS_COLLECTION]
-        task_doc = await collection.find_one({"task_id": str(task_id)})
+        task_doc = await collection.find_one({"task_id": str(task_id)}, TASK_STATUS_PROJECTION)
         if task_doc:
-            # Convert task_id back to UUID and create a new dict
-            task_dict = dict(task_doc)
-            task_dict["task_id"] = UUID(task_dict["task_id"])
-            return TaskData.model_validate(task_dict)
+            return TaskData.model_validate(task_doc)
         return None
     except (PyMongoError, ValueError):
         return None
@@ -102,14 +351,12 @@ async def get_all_tasks(
         if status_filter:
             query["status"] = status_filter.value
 
-        cursor = collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        cursor = collection.find(query, TASK_STATUS_PROJECTION).sort("created_at", -1).skip(skip).limit(limit)
 
         tasks = []
         async for task_doc in cursor:
             try:
-                task_dict = dict(task_doc)
-                task_dict["task_id"] = UUID(task_dict["task_id"])
-                task_data = TaskData.model_validate(task_dict)
+                task_data = TaskData.model_validate(task_doc)
                 tasks.append(task_data)
             except (ValueError, Exception) as e:
                 continue
@@ -118,3 +365,79 @@ async def get_all_tasks(
 
     except PyMongoError:
         return []
+
+
+async def claim_task(
+    client: AsyncIOMotorClient,
+    task_id: UUID,
+    statuses: list[TaskStatus],
+    worker_id: str,
+    message: str,
+    *,
+    check_owner: bool = False,
+    previous_worker: Optional[str] = None,
+) -> Optional[tuple[TaskData, dict[str, Any]]]:
+    """
+    Moves a task in one of ``statuses`` back to pending under ``worker_id`` (with ``check_owner``, only if it is
+    still owned by ``previous_worker``). Returns the task and its stage checkpoints, or None if another request or
+    worker got there first.
+    """
+    query: dict[str, Any] = {"task_id": str(task_id), "status": {"$in": [s.value for s in statuses]}}
+    if check_owner:
+        query["worker_id"] = previous_worker
+    update = {
+        "status": TaskStatus.PENDING.value,
+        "message": message,
+        "worker_id": worker_id,
+        "retryable": False,
+        "updated_at": datetime.now().isoformat(),
+        # A retry or takeover restarts the abandonment clock
+        "polled_at": datetime.now(UTC),
+    }
+    try:
+        doc = await client[DB_NAME][TASKS_COLLECTION].find_one_and_update(
+            query,
+            {"$set": update},
+            projection={"_id": 0, "original_content": 0, "summarized_content": 0, "llm_calls": 0},
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    if doc is None:
+        return None
+    # doc is the task as it was before the claim
+    await count_transition(client, doc.get("status"), TaskStatus.PENDING)
+    return TaskData.model_validate(doc), doc.get("checkpoints") or {}
+
+
+async def record_heartbeat(client: AsyncIOMotorClient, worker_id: str) -> None:
+    try:
+        await client[DB_NAME][WORKERS_COLLECTION].update_one(
+            {"worker_id": worker_id}, {"$set": {"heartbeat_at": datetime.now(UTC)}}, upsert=True
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+
+
+async def find_orphaned_tasks(
+    client: AsyncIOMotorClient, lease_seconds: float, created_after: datetime, limit: int
+) -> list[dict[str, Any]]:
+    """Unfinished tasks created after ``created_after`` whose worker hasn't sent a heartbeat within the lease."""
+    db = client[DB_NAME]
+    try:
+        live = await db[WORKERS_COLLECTION].distinct(
+            "worker_id", {"heartbeat_at": {"$gte": datetime.now(UTC) - timedelta(seconds=lease_seconds)}}
+        )
+        cursor = db[TASKS_COLLECTION].find(
+            {
+                "status": {"$in": [s.value for s in ACTIVE_TASK_STATUSES]},
+                "worker_id": {"$nin": live},
+                "created_at": {"$gte": created_after.isoformat()},
+            },
+            {"_id": 0, "task_id": 1, "worker_id": 1, "input_data.priority": 1},
+            sort=[("created_at", 1)],
+        )
+        return await cursor.to_list(length=limit)
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return []
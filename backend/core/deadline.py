@@ -0,0 +1,59 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.config import settings
+
+
+class TaskDeadline:
+    """End-to-end latency budget of one task; stages read what is left of it."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+# Set by the task runner; concurrent per-claim checks of a task share the same deadline
+_task_deadline: ContextVar[Optional[TaskDeadline]] = ContextVar("task_deadline", default=None)
+# Set when evidence gathering for the claim being checked stopped before every source was fetched. Reset per claim
+# (see core.fact.fact_check), which runs in its own asyncio task, so a cut on one claim doesn't flag its siblings
+_partial_evidence: ContextVar[bool] = ContextVar("partial_evidence", default=False)
+
+
+def start_deadline(seconds: Optional[float] = None) -> TaskDeadline:
+    """Starts the budget for the task in the current context; clients may shorten or extend it up to the maximum."""
+    budget = min(seconds or settings.task_deadline_seconds, settings.max_task_deadline_seconds)
+    deadline = TaskDeadline(budget)
+    _task_deadline.set(deadline)
+    return deadline
+
+
+def current_deadline() -> Optional[TaskDeadline]:
+    return _task_deadline.get()
+
+
+def time_left(reserve: float = 0.0, floor: float = 0.0) -> Optional[float]:
+    """Seconds a stage may take while leaving ``reserve`` for later stages; None when no deadline is set."""
+    deadline = _task_deadline.get()
+    if deadline is None:
+        return None
+    return max(floor, deadline.remaining() - reserve)
+
+
+def time_before_evidence() -> Optional[float]:
+    """Seconds a stage ahead of the evidence may take: what is left after the evidence's minimum and the verdict."""
+    return time_left(reserve=settings.verdict_reserve_seconds + settings.min_evidence_seconds)
+
+
+def start_claim_evidence() -> None:
+    _partial_evidence.set(False)
+
+
+def mark_partial_evidence() -> None:
+    _partial_evidence.set(True)
+
+
+def evidence_is_partial() -> bool:
+    return _partial_evidence.get()
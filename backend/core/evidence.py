@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import math
+import re
+from datetime import UTC, datetime, timedelta
+from urllib.parse import urlsplit
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.db import DB_NAME, EVIDENCE_COLLECTION
+from core.metrics import CACHE_LOOKUPS, UPSTREAM_ERRORS, stage
+from core.postprocessors import website_scores
+from core.preprocessors import ENGLISH_MARKERS
+
+logger = logging.getLogger(__name__)
+
+PASSAGE_CHARS = 600
+MAX_PASSAGES_PER_PAGE = 20
+# Best-ranked candidates read back from Mongo; the per-source cap is applied to them in Python
+CANDIDATE_LIMIT = 200
+MAX_PASSAGES_PER_SOURCE = 2
+
+_TERM_RE = re.compile(r"[a-z0-9]{3,}")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+STOP_WORDS = ENGLISH_MARKERS | {"said", "says", "also", "one", "two", "new", "year", "years", "per", "cent"}
+
+
+def index_terms(text: str) -> list[str]:
+    """The distinct, lowercased content words of ``text``; the keys of the inverted index."""
+    return sorted({term for term in _TERM_RE.findall(text.lower()) if term not in STOP_WORDS})
+
+
+def reputation(url: str) -> float:
+    """Score of the closest listed parent domain in websites.csv (0 for unlisted sites)."""
+    host = (urlsplit(url).hostname or "").lower().removeprefix("www.")
+    scores = website_scores()
+    while host:
+        if host in scores:
+            return scores[host]
+        _, _, host = host.partition(".")
+    return 0.0
+
+
+def split_passages(text: str) -> list[str]:
+    passages: list[str] = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for sentence in _SENTENCE_END_RE.split(paragraph.strip()):
+            if current and len(current) + len(sentence) + 1 > PASSAGE_CHARS:
+                passages.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            passages.append(current[: PASSAGE_CHARS * 2])
+    return passages[:MAX_PASSAGES_PER_PAGE]
+
+
+async def store_evidence(mongo_client: AsyncIOMotorClient, url: str, title: str, text: str) -> None:
+    """Adds the passages of a fetched page to the corpus, replacing earlier passages from the same URL."""
+    fetched_at = datetime.now(UTC)
+    score = reputation(url)
+    documents = [
+        {"url": url, "title": title, "text": passage, "terms": terms, "score": score, "fetched_at": fetched_at}
+        for passage in split_passages(text)
+        if len(terms := index_terms(passage)) >= 3
+    ]
+    if not documents:
+        return
+    try:
+        collection = mongo_client[DB_NAME][EVIDENCE_COLLECTION]
+        with stage("evidence_store"):
+            await collection.delete_many({"url": url})
+            await collection.insert_many(documents, ordered=False)
+    except PyMongoError as e:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        logger.debug("Storing evidence from %s failed: %s", url, e)
+
+
+async def find_evidence(mongo_client: AsyncIOMotorClient, claim: str, limit: int) -> list[dict[str, str]]:
+    """
+    Returns up to ``limit`` recent passages from reputable sources that cover the claim's terms, formatted like
+    search_tool results, or nothing when the corpus doesn't hold ``corpus_min_passages`` such passages.
+    """
+    terms = index_terms(claim)
+    if len(terms) < 2:
+        return []
+
+    query = {
+        "terms": {"$in": terms},
+        "score": {"$gte": settings.corpus_min_score},
+        "fetched_at": {"$gte": datetime.now(UTC) - timedelta(hours=settings.corpus_max_age_hours)},
+    }
+    collection = mongo_client[DB_NAME][EVIDENCE_COLLECTION]
+    try:
+        with stage("evidence_lookup"):
+            # Rare claim terms weigh more: a passage matching the names and numbers beats one matching generic words.
+            # Document frequencies are counted over the whole corpus, from the terms index alone.
+            corpus_size, *document_frequency = await asyncio.gather(
+                collection.estimated_document_count(),
+                *(collection.count_documents({"terms": term}) for term in terms),
+            )
+            weights = [math.log(1 + (corpus_size + 1) / (df + 1)) for df in document_frequency]
+            coverage = {
+                "$divide": [
+                    {"$add": [{"$cond": [{"$in": [term, "$terms"]}, w, 0]} for term, w in zip(terms, weights)]},
+                    sum(weights),
+                ]
+            }
+            # Passages are ranked by coverage (then source reputation) in Mongo, so the best of them come back
+            candidates = await collection.aggregate(
+                [
+                    {"$match": query},
+                    {"$project": {"_id": 0, "url": 1, "title": 1, "text": 1, "score": 1, "coverage": coverage}},
+                    {"$match": {"coverage": {"$gte": settings.corpus_min_coverage}}},
+                    {"$sort": {"coverage": -1, "score": -1}},
+                    {"$limit": CANDIDATE_LIMIT},
+                ]
+            ).to_list(length=None)
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return []
+
+    results: list[dict[str, str]] = []
+    per_source: dict[str, int] = {}
+    for candidate in candidates:
+        if per_source.get(candidate["url"], 0) >= MAX_PASSAGES_PER_SOURCE:
+            continue
+        per_source[candidate["url"]] = per_source.get(candidate["url"], 0) + 1
+        results.append({"title": candidate["title"], "link": candidate["url"], "content": candidate["text"]})
+        if len(results) >= limit:
+            break
+
+    hit = len(results) >= settings.corpus_min_passages
+    CACHE_LOOKUPS.labels(cache="evidence_corpus", result="hit" if hit else "miss").inc()
+    return results if hit else []
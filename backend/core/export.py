@@ -0,0 +1,104 @@
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+import pydantic_core
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from core.db import COLLECTION_NAME, DB_NAME, TASKS_COLLECTION
+from core.metrics import UPSTREAM_ERRORS
+from schemas import FactCheckLabel, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Exportable collections: (Mongo collection, time field the range filters on, label field, fields left out by default)
+EXPORT_SOURCES: dict[str, tuple[str, str, str, tuple[str, ...]]] = {
+    "tasks": (TASKS_COLLECTION, "created_at", "result.label", ("checkpoints",)),
+    "articles": (COLLECTION_NAME, "updatedAt", "label", ()),
+}
+# Documents fetched per cursor round trip, and the size the NDJSON lines are batched up to before being sent
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def export_query(
+    source: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[TaskStatus] = None,
+    label: Optional[FactCheckLabel] = None,
+    after: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Mongo filter of an export: documents of ``source`` in [since, until), with a status (tasks only) and label, after
+    the ``_cursor`` token of the last line a previous export got to. Raises ValueError for a filter that can't apply.
+    """
+    _, time_field, label_field, _ = EXPORT_SOURCES[source]
+    query: dict[str, Any] = {}
+    if since or until:
+        # Timestamps are stored as ISO strings, which sort chronologically
+        query[time_field] = {
+            **({"$gte": since.isoformat()} if since else {}),
+            **({"$lt": until.isoformat()} if until else {}),
+        }
+    if status is not None:
+        if source != "tasks":
+            raise ValueError("Only tasks can be filtered by status")
+        query["status"] = status.value
+    if label is not None:
+        query[label_field] = label.value
+    if after:
+        try:
+            query["_id"] = {"$gt": ObjectId(after)}
+        except InvalidId:
+            raise ValueError(f"Invalid export cursor: {after}")
+    return query
+
+
+async def export_ndjson(
+    mongo_client: AsyncIOMotorClient, source: str, query: dict[str, Any], fields: Optional[list[str]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Streams the matching documents in insertion (_id) order as NDJSON, a chunk of whole lines at a time; only one
+    cursor batch and one chunk are held in memory. Each line carries a ``_cursor`` token: an export cut short is
+    resumed by passing the last line's token as ``after``. ``fields`` limits the fields exported.
+    """
+    collection, _, _, excluded = EXPORT_SOURCES[source]
+    if fields:
+        projection = dict.fromkeys(fields, 1)
+    else:
+        projection = dict.fromkeys(excluded, 0) or None
+    cursor = mongo_client[DB_NAME][collection].find(query, projection, sort=[("_id", 1)], batch_size=EXPORT_BATCH_SIZE)
+
+    chunk = bytearray()
+    exported = 0
+    try:
+        async for doc in cursor:
+            chunk += pydantic_core.to_json({"_cursor": str(doc.pop("_id")), **doc}, fallback=str)
+            chunk += b"\n"
+            exported += 1
+            if len(chunk) >= EXPORT_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        logger.error(f"Export of {source} failed after {exported} documents")
+        raise
+    finally:
+        await cursor.close()
+    if chunk:
+        yield bytes(chunk)
+    logger.info(f"Exported {exported} {source}")
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip-compresses a stream chunk by chunk."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
@@ -4,17 +4,30 @@ from typing import Literal, TypedDict, Optional, List
 
 import httpx
 import ujson
-from bs4 import BeautifulSoup
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, AnyHttpUrl
 from groq import AsyncGroq
 from openai import AsyncOpenAI
-import instructor
 
 from app.config import settings
+from core.breakers import UpstreamUnavailable, breaker, fallback
+from core.checkpoints import EVIDENCE, SEARCH_QUERY, claim_key, current_checkpoints
 from core.db import fetch_from_db_if_exists
-from core.preprocessors import summarize  # existing summarize; may or may not accept target_lang
-from core.postprocessors import archive_url, is_safe
+from core.deadline import (
+    evidence_is_partial,
+    mark_partial_evidence,
+    start_claim_evidence,
+    time_before_evidence,
+    time_left,
+)
+from core.evidence import find_evidence, store_evidence
+from core.http import async_client
+from core.jobs import spawn
+from core.metrics import EVIDENCE_FETCHES_CUT, UPSTREAM_ERRORS, stage
+from core.pages import extract_article
+from core.preprocessors import TextPreprocessor, summarize  # existing summarize; may or may not accept target_lang
+from core.postprocessors import is_safe
+from core.routing import QUERY_GENERATION, SUMMARIZATION, VERDICT, call_routed, model_upstream, route, structured
 from schemas.schemas import (
     FactCheckLabel,
     FactCheckResponse,
@@ -40,6 +53,10 @@ MAX_ITEMS_FOR_MODEL = 5  # cap results before serializing to keep token budget t
 
 DEFAULT_SUMMARY_LANG: Literal["en", "source", "auto"] = "en"
 
+# Output caps of the routed calls; routing reserves this much of the model's context for the answer
+QUERY_MAX_TOKENS = 100
+VERDICT_MAX_TOKENS = 800
+
 
 class SearchResult(TypedDict):
     title: str
@@ -81,28 +98,32 @@ async def get_content(
     client: httpx.AsyncClient,
     *,
     summary_lang: Literal["en", "source", "auto"] = DEFAULT_SUMMARY_LANG,
+    mongo_client: Optional[AsyncIOMotorClient] = None,
 ) -> Optional[str]:
     """
     Fetches a URL and returns a summarized text of its content.
-    Returns None if fetch fails.
+    Returns None if fetch fails. With ``mongo_client`` the page's passages are also added to the evidence corpus.
     """
     if not url:
         return None
 
     try:
-        resp = await client.get(url, timeout=HTTP_TIMEOUT_SECONDS, headers={"User-Agent": USER_AGENT})
-        resp.raise_for_status()
+        with stage("page_fetch"):
+            resp = await client.get(url, timeout=HTTP_TIMEOUT_SECONDS, headers={"User-Agent": USER_AGENT})
+            resp.raise_for_status()
     except httpx.HTTPError as e:
+        UPSTREAM_ERRORS.labels(upstream="page").inc()
         logger.debug("HTTP fetch failed for %s: %s", url, e)
         return None
 
     try:
-        # Use a space separator to avoid concatenating words from different nodes
-        soup = BeautifulSoup(resp.text, "html.parser")
-        text = soup.get_text(" ", strip=True)
+        title, text, _ = extract_article(resp.text)
         if not text:
             return None
-        return await _summarize_text(groq_client, text, target_lang=summary_lang)
+        if mongo_client is not None:
+            spawn(store_evidence(mongo_client, url, title, text), name="store-evidence")
+        with stage("page_summary"):
+            return await _summarize_text(groq_client, text, target_lang=summary_lang)
     except Exception as e:
         logger.debug("Parsing/summarization failed for %s: %s", url, e)
         return None
@@ -114,12 +135,13 @@ async def get_url_content(
     client: httpx.AsyncClient,
     *,
     summary_lang: Literal["en", "source", "auto"] = DEFAULT_SUMMARY_LANG,
+    mongo_client: Optional[AsyncIOMotorClient] = None,
 ) -> SearchResult:
     link = str(item.get("link") or "")
     title = str(item.get("title") or "")[:TITLE_MAX_CHARS]
     snippet = str(item.get("snippet") or "")
 
-    content = await get_content(groq_client, link, client, summary_lang=summary_lang)
+    content = await get_content(groq_client, link, client, summary_lang=summary_lang, mongo_client=mongo_client)
     return {
         "title": title,
         "link": link,
@@ -127,6 +149,14 @@ async def get_url_content(
     }
 
 
+def _snippet_result(item: dict) -> SearchResult:
+    return {
+        "title": str(item.get("title") or "")[:TITLE_MAX_CHARS],
+        "link": str(item.get("link") or ""),
+        "content": str(item.get("snippet") or ""),
+    }
+
+
 # -------------------------------------------
 # Google CSE search
 # -------------------------------------------
@@ -136,10 +166,19 @@ async def search_tool(
     num_results: int = 3,
     *,
     summary_lang: Literal["en", "source", "auto"] = DEFAULT_SUMMARY_LANG,
+    mongo_client: Optional[AsyncIOMotorClient] = None,
 ) -> List[SearchResult]:
     """
     Runs a Google CSE query, fetches each result, extracts & summarizes page text, and returns results.
+
+    Under a task deadline, fetches still running at the evidence cut-off are cancelled and those results fall back
+    to their CSE snippet; the task's evidence is then flagged as partial. So is evidence gathered while CSE or the
+    page summarizer is unavailable (no results, or CSE snippets only), so the verdict is re-checked later.
     """
+    if fallback("cse", "no_web_evidence"):
+        mark_partial_evidence()
+        return []
+
     params = {
         "key": settings.google_api_key,
         "cx": settings.google_cse_id,
@@ -150,13 +189,15 @@ async def search_tool(
 
     headers = {"User-Agent": USER_AGENT}
 
-    async with httpx.AsyncClient(headers=headers, timeout=HTTP_TIMEOUT_SECONDS) as client:
+    async with async_client(headers=headers, timeout=HTTP_TIMEOUT_SECONDS) as client:
         try:
-            resp = await client.get(GOOGLE_CSE_URL, params=params)
-            resp.raise_for_status()
+            with stage("cse"):
+                resp = await client.get(GOOGLE_CSE_URL, params=params)
+                resp.raise_for_status()
             search_data = ujson.loads(resp.text)
             items = search_data.get("items", []) or []
         except httpx.HTTPError as e:
+            UPSTREAM_ERRORS.labels(upstream="cse").inc()
             logger.error("CSE request failed: %s", e)
             items = []
         except ValueError as e:
@@ -171,58 +212,143 @@ async def search_tool(
 
         async def bound_fetch(it: dict) -> SearchResult:
             async with sem:
-                return await get_url_content(groq_client, it, client, summary_lang=summary_lang)
+                return await get_url_content(
+                    groq_client, it, client, summary_lang=summary_lang, mongo_client=mongo_client
+                )
 
         if not items:
             return []
 
-        return await asyncio.gather(*[bound_fetch(it) for it in items])
+        # Fetching pages is only worth it if they can be summarized (by the model page summaries are routed to)
+        page_summary_model = route(SUMMARIZATION, "", TextPreprocessor.SUMMARY_MAX_TOKENS)[0]
+        if fallback(model_upstream(page_summary_model), "snippets_only"):
+            mark_partial_evidence()
+            return [_snippet_result(it) for it in items]
+
+        # Leave enough of the task's budget for the verdict call after the evidence is in
+        cutoff = time_left(reserve=settings.verdict_reserve_seconds, floor=settings.min_evidence_seconds)
+        fetches = [asyncio.ensure_future(bound_fetch(it)) for it in items]
+        with stage("evidence"):
+            _, pending = await asyncio.wait(fetches, timeout=cutoff)
+        for fetch in pending:
+            fetch.cancel()
+        if pending:
+            # Let the cancelled fetches unwind (release their semaphore slot and connection) before the client closes
+            await asyncio.gather(*pending, return_exceptions=True)
+            EVIDENCE_FETCHES_CUT.inc(len(pending))
+            mark_partial_evidence()
+            logger.info("Evidence cut-off after %.1fs: %d of %d fetches unfinished", cutoff, len(pending), len(items))
+
+        results: List[SearchResult] = []
+        for item, fetch in zip(items, fetches):
+            if fetch in pending or fetch.exception() is not None:
+                results.append(_snippet_result(item))
+            else:
+                results.append(fetch.result())
+        return results
 
 
 # -------------------------------------------
 # Fact-check orchestration
 # -------------------------------------------
-async def fact_check(groq_client: AsyncGroq, openai_client: AsyncOpenAI, data: TextInputData) -> GPTFactCheckModel:
-    """
-    Uses the LLM to:
-    1) Craft a focused search query for the claim
-    2) Search + fetch + summarize top hits
-    3) Ask the LLM to classify: correct / incorrect / misleading
-    """
-    claim = data.content
-    groq_instructor_client = instructor.from_groq(groq_client)
-
-    # Step 1: Generate a search query using Groq
-    try:
-        search_query = await groq_instructor_client.chat.completions.create(
-            model="llama3-8b-8192",
-            response_model=SearchQuery,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a fact-check researcher. Frame an appropriate search query "
-                        "to retrieve information helpful for fact-checking the given claim. "
-                        "Return only a simple search query string."
+async def web_evidence(
+    groq_client: AsyncGroq, claim: str, mongo_client: Optional[AsyncIOMotorClient] = None
+) -> List[SearchResult]:
+    """Searches the web for evidence on the claim: an LLM-framed CSE query, then fetched and summarized hits."""
+    # Step 1: Generate a search query using Groq (the claim itself is the query when Groq is unavailable)
+    checkpoints = current_checkpoints()
+    saved_query = checkpoints.get(SEARCH_QUERY, claim_key(claim)) if checkpoints else None
+    query_text = saved_query or (claim or "")[:100] or "news"
+    query_models = route(QUERY_GENERATION, claim, QUERY_MAX_TOKENS)
+    if saved_query is None and not fallback(model_upstream(query_models[0]), "claim_as_query"):
+        try:
+            with stage("query_generation"):
+                search_query = await asyncio.wait_for(
+                    call_routed(
+                        QUERY_GENERATION,
+                        query_models,
+                        lambda model, client: structured(client).chat.completions.create(
+                            model=model,
+                            response_model=SearchQuery,
+                            messages=[
+                                {
+                                    "role": "system",
+                                    "content": (
+                                        "You are a fact-check researcher. Frame an appropriate search query "
+                                        "to retrieve information helpful for fact-checking the given claim. "
+                                        "Return only a simple search query string."
+                                    ),
+                                },
+                                {"role": "user", "content": claim},
+                            ],
+                            max_tokens=QUERY_MAX_TOKENS,
+                            max_retries=2,
+                        ),
+                        groq_client,
                     ),
-                },
-                {"role": "user", "content": claim},
-            ],
-            max_retries=2,
-        )
-        query_text = search_query.query
-    except Exception as e:
-        logger.error("Error generating search query: %s", e)
-        query_text = (claim or "")[:100] or "news"
+                    timeout=time_before_evidence(),
+                )
+            query_text = search_query.query
+            if checkpoints:
+                await checkpoints.save(SEARCH_QUERY, query_text, claim_key(claim))
+        except asyncio.TimeoutError:
+            logger.warning("Search query generation out of time budget; searching for the claim")
+        except Exception as e:
+            UPSTREAM_ERRORS.labels(upstream="groq").inc()
+            logger.error("Error generating search query: %s", e)
 
     # Step 2: Retrieve search results (summarized in English for coherence)
-    search_results = await search_tool(
+    return await search_tool(
         groq_client=groq_client,
         query=query_text,
         num_results=3,
         summary_lang="en",
+        mongo_client=mongo_client,
     )
 
+
+async def fact_check(
+    groq_client: AsyncGroq,
+    openai_client: AsyncOpenAI,
+    data: TextInputData,
+    *,
+    raise_on_error: bool = False,
+    mongo_client: Optional[AsyncIOMotorClient] = None,
+    use_corpus: bool = True,
+) -> GPTFactCheckModel:
+    """
+    Uses the LLM to:
+    1) Craft a focused search query for the claim
+    2) Search + fetch + summarize top hits
+    3) Ask the LLM to classify: correct / incorrect / misleading
+
+    With ``mongo_client``, steps 1-2 are skipped when the local evidence corpus already covers the claim (unless
+    ``use_corpus`` is off), and fetched pages are added to it.
+    A failed classification returns a placeholder 'misleading' verdict, or raises with ``raise_on_error``. While the
+    classifier's circuit breaker is open it raises UpstreamUnavailable instead (before gathering any evidence), so
+    the task fails as retryable rather than publishing (and caching) a placeholder.
+    """
+    verdict_breaker = breaker("openai")
+    if not verdict_breaker.available():
+        raise UpstreamUnavailable(verdict_breaker.name, verdict_breaker.retry_after())
+
+    claim = data.content
+    start_claim_evidence()
+    # A resumed task reuses the evidence it gathered before it failed (at the verdict, most likely)
+    checkpoints = current_checkpoints()
+    saved_evidence = checkpoints.get(EVIDENCE, claim_key(claim)) if checkpoints else None
+    if saved_evidence is not None:
+        search_results = saved_evidence["results"]
+    else:
+        search_results = []
+        if mongo_client is not None and use_corpus and settings.corpus_enabled:
+            search_results = await find_evidence(mongo_client, claim, limit=MAX_ITEMS_FOR_MODEL)
+        if not search_results:
+            search_results = await web_evidence(groq_client, claim, mongo_client)
+        # Evidence cut short (deadline, breakers open) isn't checkpointed, so a retry gathers all of it
+        if checkpoints and not evidence_is_partial():
+            await checkpoints.save(EVIDENCE, {"results": search_results}, claim_key(claim))
+
     # Build a compact payload for the model: trim length *before* serialization
     truncated_results: List[SearchResult] = []
     for res in search_results:
@@ -248,48 +374,66 @@ async def fact_check(groq_client: AsyncGroq, openai_client: AsyncOpenAI, data: T
 
     # Step 3: Ask the OpenAI model to classify the claim
     try:
-        openai_instructor_client = instructor.from_openai(openai_client)
-        final_response = await openai_instructor_client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_model=GPTFactCheckModel,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a professional fact-checker evaluating short news claims. "
-                        "You will receive a claim and supporting evidence from reputable sources. "
-                        "Classify the claim using exactly one of the following labels:\n\n"
-                        "- 'correct': The claim is factually accurate and properly contextualized.\n"
-                        "- 'incorrect': The claim is factually false or contradicted by evidence.\n"
-                        "- 'misleading': The claim contains some truth but omits key context, uses ambiguous language, or misrepresents the facts.\n\n"
-                        "Your job is to strictly evaluate the *factual content and framing* of the claim. Pay attention to:\n"
-                        "- Whether recent developments have changed the situation.\n"
-                        "- Whether the claim presents partial truths as definitive.\n"
-                        "- Whether phrasing exaggerates or downplays important facts.\n"
-                        "- Whether time-based trends are properly described.\n\n"
-                        "Return:\n"
-                        "1. A label (correct, incorrect, or misleading)\n"
-                        "2. A concise but specific explanation grounded in the evidence\n"
-                        "3. A list of URLs used to support your judgment"
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f'Claim to fact-check:\n"{claim}"\n\n'
-                        f"Supporting search results:\n{search_results_text}\n\n"
-                        f"Please provide:\n"
-                        f"1. A classification (correct / incorrect / misleading)\n"
-                        f"2. A brief explanation\n"
-                        f"3. A list of source URLs"
+        verdict_models = route(VERDICT, claim + search_results_text, VERDICT_MAX_TOKENS)
+        with stage("verdict"):
+            final_response = await asyncio.wait_for(
+                call_routed(
+                    VERDICT,
+                    verdict_models,
+                    lambda model, client: structured(client).chat.completions.create(
+                        model=model,
+                        response_model=GPTFactCheckModel,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": (
+                                    "You are a professional fact-checker evaluating short news claims. "
+                                    "You will receive a claim and supporting evidence from reputable sources. "
+                                    "Classify the claim using exactly one of the following labels:\n\n"
+                                    "- 'correct': The claim is factually accurate and properly contextualized.\n"
+                                    "- 'incorrect': The claim is factually false or contradicted by evidence.\n"
+                                    "- 'misleading': The claim contains some truth but omits key context, uses ambiguous language, or misrepresents the facts.\n\n"
+                                    "Your job is to strictly evaluate the *factual content and framing* of the claim. Pay attention to:\n"
+                                    "- Whether recent developments have changed the situation.\n"
+                                    "- Whether the claim presents partial truths as definitive.\n"
+                                    "- Whether phrasing exaggerates or downplays important facts.\n"
+                                    "- Whether time-based trends are properly described.\n\n"
+                                    "Return:\n"
+                                    "1. A label (correct, incorrect, or misleading)\n"
+                                    "2. A concise but specific explanation grounded in the evidence\n"
+                                    "3. A list of URLs used to support your judgment"
+                                ),
+                            },
+                            {
+                                "role": "user",
+                                "content": (
+                                    f'Claim to fact-check:\n"{claim}"\n\n'
+                                    f"Supporting search results:\n{search_results_text}\n\n"
+                                    f"Please provide:\n"
+                                    f"1. A classification (correct / incorrect / misleading)\n"
+                                    f"2. A brief explanation\n"
+                                    f"3. A list of source URLs"
+                                ),
+                            },
+                        ],
+                        max_tokens=VERDICT_MAX_TOKENS,
+                        max_retries=3,
                     ),
-                },
-            ],
-            max_retries=3,
-        )
+                    openai_client,
+                ),
+                timeout=time_left(),
+            )
         return final_response
+    except asyncio.TimeoutError:
+        # Out of the task's budget: failing (retryably) beats publishing and caching a placeholder verdict
+        raise
     except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream="openai").inc()
         logger.error("Error in fact checking with instructor: %s", e)
+        if raise_on_error:
+            raise
+        if not verdict_breaker.available():
+            raise UpstreamUnavailable(verdict_breaker.name, verdict_breaker.retry_after()) from e
         return GPTFactCheckModel(
             label=FactCheckLabel.MISLEADING,
             explanation=f"Unable to complete fact-check due to technical error. Claim: {claim}",
@@ -303,12 +447,16 @@ async def fact_check_process(
     text_data: TextInputData,
     mongo_client: AsyncIOMotorClient,
 ) -> tuple[FactCheckResponse, bool]:
-    cached_result = await fetch_from_db_if_exists(mongo_client, text_data)
+    with stage("cache_lookup"):
+        cached_result = await fetch_from_db_if_exists(mongo_client, text_data)
     if cached_result:
         return cached_result, True
 
-    fact_check_result = await fact_check(groq_client, openai_client, text_data)
+    fact_check_result = await fact_check(groq_client, openai_client, text_data, mongo_client=mongo_client)
+    return build_fact_check_response(text_data, fact_check_result), False
+
 
+def build_fact_check_response(text_data: TextInputData, fact_check_result: GPTFactCheckModel) -> FactCheckResponse:
     valid_references: List[AnyHttpUrl] = []
     for src in fact_check_result.sources or []:
         if not src or not isinstance(src, str):
@@ -325,13 +473,9 @@ async def fact_check_process(
         summary=text_data.content,
         references=valid_references,
         isSafe=is_safe(text_data.url) if text_data.url else False,
+        # Filled in later by the background archiver (core.archiver) so it doesn't delay the verdict
         archive=None,
+        partial_evidence=evidence_is_partial(),
     )
 
-    if response.label != FactCheckLabel.CORRECT and response.url:
-        try:
-            response.archive = archive_url(response.url)
-        except Exception as e:
-            logger.debug("Archiving failed for %s: %s", response.url, e)
-
-    return response, False
+    return response
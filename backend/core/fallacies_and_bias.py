@@ -1,8 +1,11 @@
-import instructor
 from pydantic import BaseModel
 from typing import List
 from groq import AsyncGroq
 
+from core.routing import FALLACY_ANALYSIS, call_routed, route, structured
+
+FALLACY_MAX_TOKENS = 300
+
 
 class ReasoningIssueAnalysis(BaseModel):
     fallacies: List[str]
@@ -10,6 +13,10 @@ class ReasoningIssueAnalysis(BaseModel):
     explanation: str
 
 
+def fallacy_models(text: str) -> list[str]:
+    return route(FALLACY_ANALYSIS, text, FALLACY_MAX_TOKENS)
+
+
 async def detect_fallacies_and_bias(groq_client: AsyncGroq, text: str) -> ReasoningIssueAnalysis:
     prompt = (
         "Analyze the following statement for logical fallacies or signs of bias.\n\n"
@@ -20,12 +27,15 @@ async def detect_fallacies_and_bias(groq_client: AsyncGroq, text: str) -> Reason
         f'Text: "{text.strip()}"'
     )
 
-    groq_instructor_client = instructor.from_groq(groq_client)
-
-    response = await groq_instructor_client.chat.completions.create(
-        model="llama3-70b-8192",
-        response_model=ReasoningIssueAnalysis,
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=300,
+    response = await call_routed(
+        FALLACY_ANALYSIS,
+        fallacy_models(text),
+        lambda model, client: structured(client).chat.completions.create(
+            model=model,
+            response_model=ReasoningIssueAnalysis,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=FALLACY_MAX_TOKENS,
+        ),
+        groq_client,
     )
     return response
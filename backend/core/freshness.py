@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from app.config import settings
+
+Freshness = Literal["fresh", "stale", "expired"]
+
+FRESH: Freshness = "fresh"
+STALE: Freshness = "stale"
+EXPIRED: Freshness = "expired"
+
+
+def verdict_age_hours(updated_at: datetime, now: Optional[datetime] = None) -> float:
+    if now is None:
+        now = datetime.now(updated_at.tzinfo)
+    return max(0.0, (now - updated_at).total_seconds() / 3600)
+
+
+def verdict_freshness(label: str, updated_at: datetime, now: Optional[datetime] = None) -> Freshness:
+    """
+    Where a cached verdict stands under the per-label freshness rules: fresh verdicts are served as they are, stale
+    ones are served while a background re-check runs, expired ones are not served at all.
+    """
+    age = verdict_age_hours(updated_at, now)
+    if age < settings.verdict_fresh_hours.get(label, settings.verdict_default_fresh_hours):
+        return FRESH
+    if age < settings.verdict_expire_hours.get(label, settings.verdict_default_expire_hours):
+        return STALE
+    return EXPIRED
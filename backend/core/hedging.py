@@ -0,0 +1,107 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.config import settings
+from core.metrics import LLM_HEDGE_WINS, LLM_HEDGES
+
+T = TypeVar("T")
+
+# Window the hedge rate is capped over
+HEDGE_WINDOW_SECONDS = 60
+
+# Per worker process, like the breakers: latencies of each model's recent calls
+_latencies: dict[str, deque[float]] = {}
+# Start times of the hedgeable calls and of the hedges sent over the last window
+_hedgeable: deque[float] = deque()
+_hedges: deque[float] = deque()
+
+
+def observe_latency(model: str, seconds: float) -> None:
+    samples = _latencies.get(model)
+    if samples is None:
+        samples = _latencies[model] = deque(maxlen=settings.hedge_latency_samples)
+    samples.append(seconds)
+
+
+def hedge_delay(model: str) -> float:
+    """
+    How long a call to ``model`` runs before it is hedged: the HEDGE_QUANTILE (p90) of its recent latencies, or
+    twice the registry's median_seconds until HEDGE_MIN_SAMPLES calls have been seen.
+    """
+    samples = _latencies.get(model)
+    if samples is None or len(samples) < settings.hedge_min_samples:
+        spec = settings.llm_models.get(model)
+        return 2 * spec.median_seconds if spec is not None else math.inf
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(settings.hedge_quantile * len(ordered)))]
+
+
+def _trim(times: deque[float], now: float) -> None:
+    while times and times[0] < now - HEDGE_WINDOW_SECONDS:
+        times.popleft()
+
+
+def _take_hedge() -> bool:
+    """Whether one more hedge keeps the hedges at most HEDGE_MAX_RATE of the hedgeable calls in the window."""
+    now = time.monotonic()
+    _trim(_hedgeable, now)
+    _trim(_hedges, now)
+    if len(_hedges) + 1 > settings.hedge_max_rate * len(_hedgeable):
+        return False
+    _hedges.append(now)
+    return True
+
+
+def _discard(task: Optional[asyncio.Future]) -> None:
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        # Retrieved so a losing call's error isn't logged as never retrieved
+        task.exception()
+
+
+async def hedged(
+    task: str,
+    model: str,
+    attempt: Awaitable[T],
+    hedge_model: str,
+    start_hedge: Callable[[], Awaitable[T]],
+    hedge_available: Callable[[], bool],
+) -> tuple[T, str]:
+    """
+    Awaits ``attempt`` (a call to ``model``). If it hasn't answered within hedge_delay(model), the hedge budget allows
+    and ``hedge_available()``, the same request also goes to ``hedge_model`` via ``start_hedge()``. The first valid
+    response wins and the other call is cancelled; a call that fails (including failed validation) leaves the other
+    one running. Returns the response and the model that produced it.
+    """
+    _hedgeable.append(time.monotonic())
+    primary = asyncio.ensure_future(attempt)
+    secondary: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay(model))
+        if done or not hedge_available() or not _take_hedge():
+            return await primary, model
+
+        LLM_HEDGES.labels(task=task).inc()
+        secondary = asyncio.ensure_future(start_hedge())
+        racers = {primary: (model, "primary"), secondary: (hedge_model, "hedge")}
+        pending: set[asyncio.Future] = {primary, secondary}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # The primary wins a tie
+            for finished in sorted(done, key=lambda f: f is not primary):
+                if finished.exception() is None:
+                    winner, role = racers[finished]
+                    LLM_HEDGE_WINS.labels(task=task, winner=role).inc()
+                    return finished.result(), winner
+                error = error or finished.exception()
+        raise error
+    finally:
+        _discard(primary)
+        _discard(secondary)
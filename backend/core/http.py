@@ -0,0 +1,162 @@
+import time
+from contextlib import nullcontext
+from typing import Any, Iterable, Optional
+
+import httpcore
+import httpx
+import ujson
+
+from core.breakers import CircuitBreaker, breaker, groq_upstream
+from core.scheduler import current_lane, upstream_schedulers
+from core.urls import resolve_public
+from core.usage import record_llm_response
+
+# Optional transport every upstream HTTP call is routed through (benchmark fakes, record/replay cassettes).
+# None means the default network transport.
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+# Upstreams whose calls take a slot from the matching priority-lane scheduler; other hosts (evidence pages) don't
+SCHEDULED_HOSTS = {
+    "api.groq.com": "llm",
+    "api.openai.com": "llm",
+    "www.googleapis.com": "cse",
+}
+# Upstreams with a circuit breaker; Groq calls get one breaker per model
+BREAKER_HOSTS = {
+    "api.groq.com": "groq",
+    "api.openai.com": "openai",
+    "www.googleapis.com": "cse",
+}
+# Connection pool of the Groq/OpenAI SDKs' own default client
+SDK_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised by the transport instead of sending a request to an upstream whose circuit breaker is open."""
+
+
+def _request_breaker(request: httpx.Request) -> Optional[CircuitBreaker]:
+    upstream = BREAKER_HOSTS.get(request.url.host)
+    if upstream is None:
+        return None
+    if upstream == "groq":
+        try:
+            model = ujson.loads(request.content).get("model")
+        except (httpx.RequestNotRead, ValueError, AttributeError):
+            model = None
+        upstream = groq_upstream(model or "unknown")
+    return breaker(upstream)
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """
+    Fails fast when the upstream's circuit breaker is open, otherwise waits for a slot in the current lane before
+    calling a scheduled upstream and reports the outcome (transport errors, 429 and 5xx count as failures) to the
+    breaker. LLM responses have their token usage recorded.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, *, owns_inner: bool):
+        self._inner = inner
+        self._owns_inner = owns_inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cb = _request_breaker(request)
+        token = cb.allow() if cb is not None else None
+        if cb is not None and token is None:
+            raise CircuitOpenError(f"{cb.name} circuit breaker is open", request=request)
+
+        scheduler = upstream_schedulers.get(SCHEDULED_HOSTS.get(request.url.host, ""))
+        if cb is None:
+            async with scheduler.slot(current_lane()) if scheduler else nullcontext():
+                return await self._inner.handle_async_request(request)
+
+        start = time.perf_counter()
+        try:
+            async with scheduler.slot(current_lane()) if scheduler else nullcontext():
+                # Time spent waiting for a slot is ours, not the upstream's
+                start = time.perf_counter()
+                response = await self._inner.handle_async_request(request)
+        except httpx.TransportError:
+            cb.record(token, time.perf_counter() - start, failed=True)
+            raise
+        except BaseException:
+            cb.cancelled(token)
+            raise
+        seconds = time.perf_counter() - start
+        cb.record(token, seconds, failed=response.status_code == 429 or response.status_code >= 500)
+        await record_llm_response(request, response, seconds)
+        return response
+
+    async def aclose(self) -> None:
+        if self._owns_inner:
+            await self._inner.aclose()
+
+
+def set_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    global _transport
+    _transport = transport
+
+
+def get_transport() -> Optional[httpx.AsyncBaseTransport]:
+    return _transport
+
+
+class PublicNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Dials public addresses only. The host is resolved and checked here and the connection goes to the checked
+    address, so a host re-resolving to an internal one in between (DNS rebinding) can't slip through. The Host header
+    and TLS SNI still carry the original name.
+    """
+
+    def __init__(self) -> None:
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        error: Optional[Exception] = None
+        for address in await resolve_public(host, port):
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error or httpcore.ConnectError(f"No address for {host}")
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None, socket_options: Optional[Iterable[Any]] = None
+    ) -> httpcore.AsyncNetworkStream:
+        raise httpcore.ConnectError("Unix sockets are not public")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def _scheduled_transport(public_only: bool = False, **kwargs: Any) -> ScheduledTransport:
+    if _transport is not None:
+        return ScheduledTransport(_transport, owns_inner=False)
+    inner = httpx.AsyncHTTPTransport(**kwargs)
+    if public_only:
+        # httpx has no option for the network backend; its connection pool takes one
+        inner._pool._network_backend = PublicNetworkBackend()
+    return ScheduledTransport(inner, owns_inner=True)
+
+
+def async_client(*, public_only: bool = False, **kwargs: Any) -> httpx.AsyncClient:
+    """
+    Creates an httpx client for upstream calls, using the installed transport when there is one. With
+    ``public_only`` (client-supplied URLs) it only connects to public addresses, and never through a proxy.
+    """
+    kwargs.setdefault("transport", _scheduled_transport(public_only))
+    if public_only:
+        kwargs["trust_env"] = False
+    return httpx.AsyncClient(**kwargs)
+
+
+def sdk_http_client() -> httpx.AsyncClient:
+    """http_client for the Groq/OpenAI SDKs, sized like the SDK's own client; timeouts stay the SDK defaults."""
+    return httpx.AsyncClient(transport=_scheduled_transport(limits=SDK_LIMITS), follow_redirects=True)
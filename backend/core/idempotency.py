@@ -0,0 +1,106 @@
+import hashlib
+from datetime import UTC, datetime, timedelta
+from typing import Any, Optional
+from uuid import UUID
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.config import settings
+from core.db import DB_NAME, IDEMPOTENCY_COLLECTION, TASKS_COLLECTION
+from core.metrics import IDEMPOTENT_REPLAYS, UPSTREAM_ERRORS
+from schemas import TaskStatus, TextInputData
+
+# Statuses of a task whose derived key a resend takes over, starting a new task instead of replaying the outcome
+TAKEOVER_STATUSES = [TaskStatus.FAILED.value, TaskStatus.CANCELLED.value]
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def submission_key(client: str, header: Optional[str], data: TextInputData) -> Optional[tuple[str, str, float]]:
+    """
+    Idempotency key of a submission, the fingerprint of its input and how long the key holds, in seconds. The client's
+    Idempotency-Key header when it sent one; otherwise a key derived from the input, so a plain resend of the same
+    input is absorbed too (None when IDEMPOTENCY_DERIVED_SECONDS is 0). Keys are scoped to the client and hashed, so
+    neither API keys nor content are stored.
+    """
+    fingerprint = _digest(data.model_dump_json(exclude={"deadline_seconds"}))
+    if header:
+        return _digest("header", client, header), fingerprint, settings.idempotency_key_seconds
+    if settings.idempotency_derived_seconds:
+        return _digest("derived", client, fingerprint), fingerprint, settings.idempotency_derived_seconds
+    return None
+
+
+async def reserve_idempotency_key(
+    mongo_client: AsyncIOMotorClient,
+    key: str,
+    fingerprint: str,
+    seconds: float,
+    task_id: UUID,
+    *,
+    derived: bool = False,
+) -> Optional[dict[str, Any]]:
+    """
+    Records ``task_id`` as the task of ``key`` for ``seconds``. Returns None when the key is new (or can't be
+    checked), and the earlier submission's record when it is a repeat. A ``derived`` key (no Idempotency-Key header)
+    whose task failed or was cancelled is taken over: resending the same input is how a plain client tries again.
+    """
+    collection = mongo_client[DB_NAME][IDEMPOTENCY_COLLECTION]
+    now = datetime.now(UTC)
+    try:
+        await collection.insert_one(
+            {
+                "key": key,
+                "fingerprint": fingerprint,
+                "task_id": str(task_id),
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=seconds),
+            }
+        )
+        return None
+    except DuplicateKeyError:
+        pass
+    except PyMongoError:
+        # Without Mongo the submission fails further on anyway; don't fail it here
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+
+    try:
+        existing = await collection.find_one({"key": key}, {"_id": 0})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    # The TTL monitor runs once a minute, so an expired key may still be there: it is taken over
+    if (
+        existing is None
+        or existing["expires_at"].replace(tzinfo=UTC) <= now
+        or (derived and await _task_status(mongo_client, existing["task_id"]) in TAKEOVER_STATUSES)
+    ):
+        try:
+            await collection.delete_one({"key": key, "task_id": existing["task_id"]} if existing else {"key": key})
+        except PyMongoError:
+            UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+            return None
+        return await reserve_idempotency_key(mongo_client, key, fingerprint, seconds, task_id, derived=derived)
+    IDEMPOTENT_REPLAYS.inc()
+    return existing
+
+
+async def _task_status(mongo_client: AsyncIOMotorClient, task_id: str) -> Optional[str]:
+    try:
+        task = await mongo_client[DB_NAME][TASKS_COLLECTION].find_one({"task_id": task_id}, {"_id": 0, "status": 1})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    return task["status"] if task else None
+
+
+async def release_idempotency_key(mongo_client: AsyncIOMotorClient, key: str, task_id: UUID) -> None:
+    """Frees a key whose submission failed before its task was created, so a retry can go through."""
+    try:
+        await mongo_client[DB_NAME][IDEMPOTENCY_COLLECTION].delete_one({"key": key, "task_id": str(task_id)})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
@@ -0,0 +1,39 @@
+import asyncio
+import contextvars
+import logging
+from typing import Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+# Detached background jobs (not tied to a request), tracked so shutdown can let them finish
+_jobs: set[asyncio.Task] = set()
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _jobs.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background job {task.get_name()} failed: {task.exception()}")
+
+
+def spawn(coro: Coroutine, *, name: Optional[str] = None) -> asyncio.Task:
+    """Runs a coroutine as a tracked background job in a fresh context (it won't write into the caller's timings)."""
+    task = asyncio.get_running_loop().create_task(coro, name=name, context=contextvars.Context())
+    _jobs.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+def pending_jobs() -> int:
+    return len(_jobs)
+
+
+async def drain(timeout: float) -> None:
+    """Waits up to ``timeout`` seconds for running jobs, then cancels whatever is left."""
+    if not _jobs:
+        return
+    logger.info(f"Draining {len(_jobs)} background jobs...")
+    _, pending = await asyncio.wait(set(_jobs), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Cancelled {len(pending)} background jobs still running after {timeout}s.")
@@ -0,0 +1,216 @@
+import logging
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "truthlens_stage_seconds",
+    "Latency of fact-check pipeline stages",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    "truthlens_upstream_errors_total",
+    "Failed calls to upstream dependencies",
+    ["upstream"],
+)
+UPSTREAM_RETRIES = Counter(
+    "truthlens_upstream_retries_total",
+    "Retried calls to upstream dependencies (instructor validation retries)",
+    ["upstream"],
+)
+CACHE_LOOKUPS = Counter(
+    "truthlens_cache_lookups_total",
+    "Cache lookups by cache and outcome",
+    ["cache", "result"],
+)
+TRANSLATIONS_SKIPPED = Counter(
+    "truthlens_translations_skipped_total",
+    "Inputs detected as English locally and not sent to the translator",
+)
+VERDICT_REVALIDATIONS = Counter(
+    "truthlens_verdict_revalidations_total",
+    "Background re-checks of stale cached verdicts by outcome",
+    ["outcome"],
+)
+EVIDENCE_FETCHES_CUT = Counter(
+    "truthlens_evidence_fetches_cut_total",
+    "Evidence page fetches cancelled at the task deadline's evidence cut-off (CSE snippet used instead)",
+)
+TASKS_IN_FLIGHT = Gauge(
+    "truthlens_tasks_in_flight",
+    "Fact-check tasks currently executing",
+    ["lane"],
+    multiprocess_mode="livesum",
+)
+TASKS_QUEUED = Gauge(
+    "truthlens_tasks_queued",
+    "Admitted fact-check tasks waiting for an execution slot",
+    ["lane"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTIONS = Counter(
+    "truthlens_admission_rejections_total",
+    "Fact-check requests rejected with 429 by admission control",
+    ["scope", "lane"],
+)
+LANE_QUEUE_WAIT_SECONDS = Histogram(
+    "truthlens_lane_queue_wait_seconds",
+    "Time spent waiting for a pipeline or upstream slot, by priority lane",
+    ["scheduler", "lane"],
+    buckets=STAGE_BUCKETS,
+)
+BREAKER_STATE = Gauge(
+    "truthlens_breaker_state",
+    "Upstream circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+BREAKER_REJECTIONS = Counter(
+    "truthlens_breaker_rejections_total",
+    "Upstream calls failed fast because the upstream's circuit breaker was open",
+    ["upstream"],
+)
+UPSTREAM_FALLBACKS = Counter(
+    "truthlens_upstream_fallbacks_total",
+    "Degraded paths taken instead of calling an unavailable upstream",
+    ["upstream", "fallback"],
+)
+CHECKPOINTS_RESTORED = Counter(
+    "truthlens_checkpoints_restored_total",
+    "Pipeline stages skipped on a retried or resumed task because their checkpointed output was reused",
+    ["stage"],
+)
+TASKS_RESUMED = Counter(
+    "truthlens_tasks_resumed_total",
+    "Tasks restarted from their checkpoints, by trigger (retry request or recovery from a dead worker)",
+    ["trigger"],
+)
+LLM_TOKENS = Counter(
+    "truthlens_llm_tokens_total",
+    "Tokens used by LLM calls, by model, pipeline stage and kind (prompt or completion)",
+    ["model", "stage", "kind"],
+)
+LLM_COST_USD = Counter(
+    "truthlens_llm_cost_usd_total",
+    "Estimated LLM spend in USD (see LLM_MODELS), by model and pipeline stage",
+    ["model", "stage"],
+)
+TASK_BUDGET_EXCEEDED = Counter(
+    "truthlens_task_budget_exceeded_total",
+    "Tasks whose estimated LLM spend went over TASK_BUDGET_USD",
+)
+TASKS_CANCELLED = Counter(
+    "truthlens_tasks_cancelled_total",
+    "Unfinished tasks cancelled, by reason (client request or abandoned: not polled within its timeout)",
+    ["reason"],
+)
+IDEMPOTENT_REPLAYS = Counter(
+    "truthlens_idempotent_replays_total",
+    "Repeat submissions answered with the task of an earlier submission with the same idempotency key",
+)
+LLM_ROUTED = Counter(
+    "truthlens_llm_routed_total",
+    "Routed LLM calls (see core.routing), by call site and the model that produced the accepted response",
+    ["task", "model"],
+)
+LLM_HEDGES = Counter(
+    "truthlens_llm_hedges_total",
+    "LLM calls also sent to the hedge model after the primary ran past its p90 latency, by call site",
+    ["task"],
+)
+LLM_HEDGE_WINS = Counter(
+    "truthlens_llm_hedge_wins_total",
+    "Hedged LLM calls by call site and whose response was used (primary or hedge)",
+    ["task", "winner"],
+)
+LLM_ESCALATIONS = Counter(
+    "truthlens_llm_escalations_total",
+    "LLM calls moved to a larger model after a response failed validation, by call site and the model escalated to",
+    ["task", "model"],
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Per-task stage timings; set by the task runner, filled by stage() wherever it is used down the call tree.
+_task_timings: ContextVar[Optional[dict[str, float]]] = ContextVar("task_timings", default=None)
+# Innermost stage running in the current context; LLM usage is attributed to it (see core.usage)
+_current_stage: ContextVar[Optional[str]] = ContextVar("current_stage", default=None)
+
+_logfire = None
+
+
+def configure_logfire(app, token: str, service_name: str) -> None:
+    """Sends FastAPI request spans and pipeline stage spans to logfire."""
+    global _logfire
+    import logfire
+
+    logfire.configure(token=token, service_name=service_name)
+    logfire.instrument_fastapi(app)
+    _logfire = logfire
+    logger.info("Logfire tracing enabled.")
+
+
+def start_task_timings() -> dict[str, float]:
+    """Starts collecting stage timings for the task running in the current context."""
+    timings: dict[str, float] = {}
+    _task_timings.set(timings)
+    return timings
+
+
+def record_timing(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _task_timings.get()
+    if timings is not None:
+        # Stages that run several times per task (page fetches, page summaries) accumulate
+        timings[name] = round(timings.get(name, 0.0) + seconds, 4)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Times a pipeline stage into the histogram, the task's timings map and (if configured) a logfire span."""
+    with ExitStack() as stack:
+        if _logfire is not None:
+            stack.enter_context(_logfire.span("stage {stage}", stage=name))
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record_timing(name, time.perf_counter() - start)
+            _current_stage.reset(token)
+
+
+def current_stage() -> Optional[str]:
+    return _current_stage.get()
+
+
+def count_retries(instructor_client, upstream: str):
+    """Registers a hook that counts instructor's re-asks against the given upstream."""
+    instructor_client.on("parse:error", lambda *_: UPSTREAM_RETRIES.labels(upstream=upstream).inc())
+    return instructor_client
+
+
+def render_metrics() -> bytes:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Multi-worker server: merge the samples every worker process wrote
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
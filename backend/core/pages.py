@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import AnyHttpUrl, BaseModel
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.db import DB_NAME, PAGES_COLLECTION, URL_ALIASES_COLLECTION, to_document
+from core.fallacies_and_bias import ReasoningIssueAnalysis
+from core.http import async_client
+from core.metrics import CACHE_LOOKUPS, UPSTREAM_ERRORS, stage
+from core.urls import UnsafeURL, canonicalize_url, check_public_url
+
+logger = logging.getLogger(__name__)
+
+PAGE_TIMEOUT_SECONDS = 15
+MAX_REDIRECTS = 5
+ARTICLE_MAX_CHARS = 20000
+USER_AGENT = "Mozilla/5.0 (compatible; fact-checker/1.0; +https://example.org/bot)"
+# Page chrome that never belongs to the article text
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure"]
+
+# canonical url -> in-flight fetch, so concurrent first requests for a page share one download and extraction
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+class ArticlePage(BaseModel):
+    """An extracted article, shared by every request for any URL variant that resolves to it."""
+
+    url: str
+    title: str = ""
+    content: str
+    fetched_at: datetime
+    # Filled in by the first task that processes the page, so later ones skip translation, summarization and analysis
+    summary: Optional[str] = None
+    fallacy_result: Optional[ReasoningIssueAnalysis] = None
+
+
+def extract_article(html: str) -> tuple[str, str, Optional[str]]:
+    """Returns the title, the article text and the page's rel=canonical URL (if any)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    link = soup.find("link", rel="canonical")
+    canonical = link.get("href") if link else None
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    paragraphs = [p.get_text(" ", strip=True) for p in root.find_all("p")]
+    text = "\n".join(p for p in paragraphs if p) or root.get_text(" ", strip=True)
+    return title, text[:ARTICLE_MAX_CHARS], canonical
+
+
+async def _cached_page(mongo_client: AsyncIOMotorClient, canonical_url: str) -> Optional[ArticlePage]:
+    db = mongo_client[DB_NAME]
+    try:
+        alias = await db[URL_ALIASES_COLLECTION].find_one({"alias": canonical_url}, {"url": 1})
+        doc = await db[PAGES_COLLECTION].find_one({"url": alias["url"] if alias else canonical_url}, {"_id": 0})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return None
+    if doc is None:
+        return None
+    page = ArticlePage.model_validate(doc)
+    if datetime.now(UTC) - page.fetched_at.replace(tzinfo=page.fetched_at.tzinfo or UTC) > timedelta(
+        hours=settings.page_cache_hours
+    ):
+        return None
+    return page
+
+
+async def _get_public(client: httpx.AsyncClient, url: str) -> httpx.Response:
+    """
+    GETs a client-supplied URL, following redirects by hand so every hop is checked with check_public_url first. The
+    client comes from async_client(public_only=True), which checks each host's addresses as it connects.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        check_public_url(url)
+        response = await client.get(url)
+        if not response.is_redirect:
+            return response
+        url = str(response.url.join(response.headers["location"]))
+    raise httpx.TooManyRedirects(f"More than {MAX_REDIRECTS} redirects", request=response.request)
+
+
+async def _fetch_page(mongo_client: AsyncIOMotorClient, canonical_url: str, url: str) -> Optional[ArticlePage]:
+    try:
+        async with async_client(
+            public_only=True, headers={"User-Agent": USER_AGENT}, timeout=PAGE_TIMEOUT_SECONDS
+        ) as client:
+            with stage("article_fetch"):
+                response = await _get_public(client, url)
+                response.raise_for_status()
+    except UnsafeURL as e:
+        logger.warning(f"Refused to fetch {url}: {e}")
+        return None
+    except httpx.HTTPError as e:
+        UPSTREAM_ERRORS.labels(upstream="page").inc()
+        logger.warning(f"Fetching {url} failed: {e}")
+        return None
+
+    with stage("article_extraction"):
+        title, content, rel_canonical = extract_article(response.text)
+    if not content:
+        return None
+
+    # Redirects (and the page's own canonical link) are resolved once; every variant becomes an alias of the result
+    final_url = canonicalize_url(str(response.url))
+    resolved_url = final_url
+    if rel_canonical:
+        candidate = canonicalize_url(urljoin(str(response.url), rel_canonical))
+        # A page may only point at its own site, so no page can take over another site's cache entry
+        if urlsplit(candidate).hostname == urlsplit(final_url).hostname:
+            resolved_url = candidate
+    page = ArticlePage(url=resolved_url, title=title, content=content, fetched_at=datetime.now(UTC))
+    db = mongo_client[DB_NAME]
+    try:
+        await db[PAGES_COLLECTION].replace_one({"url": resolved_url}, to_document(page), upsert=True)
+        for alias in {canonical_url, final_url, resolved_url}:
+            await db[URL_ALIASES_COLLECTION].update_one({"alias": alias}, {"$set": {"url": resolved_url}}, upsert=True)
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+    return page
+
+
+async def get_article(mongo_client: AsyncIOMotorClient, url: AnyHttpUrl | str) -> Optional[ArticlePage]:
+    """Returns the extracted article behind ``url``, fetching it only if no variant of the URL was fetched recently."""
+    canonical_url = canonicalize_url(url)
+    page = await _cached_page(mongo_client, canonical_url)
+    CACHE_LOOKUPS.labels(cache="page", result="hit" if page else "miss").inc()
+    if page is not None:
+        return page
+
+    job = _in_flight.get(canonical_url)
+    if job is None:
+        job = asyncio.ensure_future(_fetch_page(mongo_client, canonical_url, str(url)))
+        _in_flight[canonical_url] = job
+        job.add_done_callback(lambda _: _in_flight.pop(canonical_url, None))
+    return await asyncio.shield(job)
+
+
+async def save_page_analysis(
+    mongo_client: AsyncIOMotorClient,
+    page: ArticlePage,
+    summary: Optional[str],
+    fallacy_result: Optional[ReasoningIssueAnalysis],
+) -> None:
+    """Shares a page's summary and reasoning analysis with later requests for it; None leaves a field as it is."""
+    update: dict = {}
+    if summary is not None:
+        update["summary"] = summary
+    if fallacy_result is not None:
+        update["fallacy_result"] = to_document(fallacy_result)
+    if not update:
+        return
+    try:
+        await mongo_client[DB_NAME][PAGES_COLLECTION].update_one({"url": page.url}, {"$set": update})
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
@@ -1,10 +1,17 @@
-import pandas as pd
+import csv
+from functools import lru_cache
+from pathlib import Path
 
 from pydantic import AnyHttpUrl
 
-import requests
-from waybackpy import WaybackMachineSaveAPI
-from waybackpy.exceptions import MaximumSaveRetriesExceeded
+WEBSITES_CSV = Path(__file__).resolve().parent.parent / "assets" / "websites.csv"
+
+
+@lru_cache(maxsize=1)
+def website_scores() -> dict[str, float]:
+    """hostname -> popularity score from assets/websites.csv, loaded once per process."""
+    with WEBSITES_CSV.open(newline="", encoding="utf-8") as fh:
+        return {row["hostname"]: float(row["score"] or 0) for row in csv.DictReader(fh)}
 
 
 def is_safe(url: AnyHttpUrl) -> bool:
@@ -21,8 +28,7 @@ def is_safe(url: AnyHttpUrl) -> bool:
         return False
 
     # check if the url is a very popular website
-    websites = pd.read_csv("./assets/websites.csv")["hostname"]  # type: ignore
-    if host in websites:
+    if host in website_scores():
         return True
 
     # check if the url is a safe tld
@@ -32,6 +38,10 @@ def is_safe(url: AnyHttpUrl) -> bool:
 
 def archive_url(url: AnyHttpUrl) -> str | None:
     """returns the archive url of given url"""
+    # waybackpy (and requests) are only needed once something is archived; keep them off the import path
+    import requests
+    from waybackpy import WaybackMachineSaveAPI
+    from waybackpy.exceptions import MaximumSaveRetriesExceeded
 
     try:
         user_agent = "Mozilla/5.0 (iPad; U; CPU OS 3_2_1 like Mac OS X; en-us) AppleWebKit/531.21.10 (KHTML, like Gecko) Mobile/7B405"
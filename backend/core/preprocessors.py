@@ -1,14 +1,38 @@
+import asyncio
+import hashlib
 import logging
+import re
+from collections import OrderedDict
 from typing import Optional, Literal, List
 
-import instructor
-from deep_translator import GoogleTranslator
-from deep_translator.exceptions import TranslationNotFound
 from groq import AsyncGroq
 from pydantic import BaseModel, Field
 
+from core.breakers import TRANSLATOR, UpstreamUnavailable, breaker, fallback
+from core.metrics import CACHE_LOOKUPS, TRANSLATIONS_SKIPPED, UPSTREAM_ERRORS
+from core.routing import SUMMARIZATION, call_routed, model_upstream, route, structured
+
 logger = logging.getLogger(__name__)
 
+# Function words that are common in English and rare elsewhere (words like "a"/"no" that also occur in other
+# languages are left out), used to skip translating text that is already English
+ENGLISH_MARKERS = frozenset(
+    "the and of to that it for are with his they this have from or by not but what all were we when your "
+    "can said there which she do their if will would about been has more who its into than them these could "
+    "our other also after should because".split()
+)
+_WORD_RE = re.compile(r"[a-z']+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s+")
+
+_translation_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def get_translator(source: str, target: str):
+    # deep_translator (requests + bs4) is imported on first use rather than at worker start
+    from deep_translator import GoogleTranslator
+
+    return GoogleTranslator(source=source, target=target)
+
 
 class SummaryModel(BaseModel):
     summary: str = Field(..., description="The concise summary of the article content")
@@ -16,10 +40,17 @@ class SummaryModel(BaseModel):
 
 class TextPreprocessor:
     MIN_SUMMARY_WORDS = 40
-    DEFAULT_MODEL = "llama-3.1-8b-instant"
+    SUMMARY_MAX_TOKENS = 500
     # ~1000–1500 tokens is usually safe; keep char cap conservative unless you add tokenization
     MAX_INPUT_CHARS = 6000
 
+    # GoogleTranslator rejects payloads over 5000 chars; stay under it with some margin
+    TRANSLATION_CHUNK_CHARS = 4500
+    TRANSLATION_CONCURRENCY = 4
+    TRANSLATION_CACHE_SIZE = 4096
+    ENGLISH_MARKER_RATIO = 0.2
+    ENGLISH_SAMPLE_CHARS = 2000
+
     @staticmethod
     def _normalize_text(text: str) -> str:
         # Preserve paragraph structure while collapsing intra-paragraph whitespace
@@ -28,29 +59,116 @@ class TextPreprocessor:
         return normalized
 
     @staticmethod
-    def to_english(text: str) -> str:
-        if not text or not text.strip():
-            raise ValueError("Input text cannot be empty or None")
+    def _is_english(text: str) -> bool:
+        """Cheap local check: mostly ASCII letters and a healthy share of English function words."""
+        sample = text[: TextPreprocessor.ENGLISH_SAMPLE_CHARS]
+        letters = [c for c in sample if c.isalpha()]
+        if not letters or sum(c.isascii() for c in letters) / len(letters) < 0.9:
+            return False
+        words = _WORD_RE.findall(sample.lower())
+        if len(words) < 4:
+            # Too short to tell; let the translator decide
+            return False
+        return sum(w in ENGLISH_MARKERS for w in words) / len(words) >= TextPreprocessor.ENGLISH_MARKER_RATIO
 
-        cleaned_text = TextPreprocessor._normalize_text(text)
+    @staticmethod
+    def _translation_chunks(text: str) -> List[str]:
+        limit = TextPreprocessor.TRANSLATION_CHUNK_CHARS
+        chunks: List[str] = []
+        for chunk in TextPreprocessor._chunk(text, chunk_chars=limit):
+            if not chunk.strip():
+                continue
+            if len(chunk) <= limit:
+                chunks.append(chunk)
+                continue
+            # A single paragraph over the limit: split on sentence ends, hard-cut as a last resort
+            current = ""
+            for sentence in filter(None, _SENTENCE_END_RE.split(chunk)):
+                while len(sentence) > limit:
+                    chunks.append(sentence[:limit])
+                    sentence = sentence[limit:]
+                if current and len(current) + len(sentence) + 1 > limit:
+                    chunks.append(current)
+                    current = sentence
+                else:
+                    current = f"{current} {sentence}" if current else sentence
+            if current:
+                chunks.append(current)
+        return chunks
 
-        if not cleaned_text:
-            raise ValueError("Text becomes empty after cleaning")
+    @staticmethod
+    def _translate_blocking(chunk: str) -> str:
+        from deep_translator.exceptions import TranslationNotFound
 
         try:
-            translator = GoogleTranslator(source="auto", target="en")
-            translated_text = translator.translate(cleaned_text)
+            translator = get_translator(source="auto", target="en")
+            translated_text = translator.translate(chunk)
             if not translated_text:
                 logger.warning("Translation returned empty result, using original text")
-                return cleaned_text
+                return chunk
             return translated_text
         except TranslationNotFound as e:
             logger.error(f"Translation not found: {e}")
-            return cleaned_text
+            return chunk
+
+    @staticmethod
+    async def _translate_chunk(chunk: str, slots: asyncio.Semaphore) -> str:
+        key = hashlib.sha256(f"auto:en:{chunk}".encode()).hexdigest()
+        cached = _translation_cache.get(key)
+        if cached is not None:
+            _translation_cache.move_to_end(key)
+            CACHE_LOOKUPS.labels(cache="translation", result="hit").inc()
+            return cached
+        CACHE_LOOKUPS.labels(cache="translation", result="miss").inc()
+
+        async with slots, breaker(TRANSLATOR).call():
+            # deep_translator is blocking (requests); keep it off the event loop
+            translated = await asyncio.to_thread(TextPreprocessor._translate_blocking, chunk)
+
+        _translation_cache[key] = translated
+        if len(_translation_cache) > TextPreprocessor.TRANSLATION_CACHE_SIZE:
+            _translation_cache.popitem(last=False)
+        return translated
+
+    @staticmethod
+    async def to_english(text: str) -> str:
+        english, _ = await TextPreprocessor.to_english_checked(text)
+        return english
+
+    @staticmethod
+    async def to_english_checked(text: str) -> tuple[str, bool]:
+        """
+        The text in English, and whether that is a real result: False when it is the text passed through untranslated
+        because the translator is unavailable.
+        """
+        if not text or not text.strip():
+            raise ValueError("Input text cannot be empty or None")
+
+        cleaned_text = TextPreprocessor._normalize_text(text)
+
+        if not cleaned_text:
+            raise ValueError("Text becomes empty after cleaning")
+
+        if TextPreprocessor._is_english(cleaned_text):
+            TRANSLATIONS_SKIPPED.inc()
+            return cleaned_text, True
+
+        # The summarizer reads most languages and answers in English, so untranslated text beats failing the task
+        if fallback(TRANSLATOR, "untranslated"):
+            return cleaned_text, False
+
+        chunks = TextPreprocessor._translation_chunks(cleaned_text)
+        slots = asyncio.Semaphore(TextPreprocessor.TRANSLATION_CONCURRENCY)
+        try:
+            translated = await asyncio.gather(*(TextPreprocessor._translate_chunk(c, slots) for c in chunks))
+        except UpstreamUnavailable:
+            return cleaned_text, False
         except Exception as e:
             # Let callers decide how to handle translation failures
+            UPSTREAM_ERRORS.labels(upstream="translator").inc()
             logger.error(f"Translation failed: {e}")
             raise RuntimeError(f"Failed to translate text: {e}") from e
+        return "\n".join(translated), True
 
     @staticmethod
     def _needs_summary(text: str) -> bool:
@@ -99,39 +217,44 @@ class TextPreprocessor:
             logger.debug(f"Text length ({len(text.split())} words) below minimum; returning as-is.")
             return original_text
 
-        model_name = model or TextPreprocessor.DEFAULT_MODEL
-        instructor_client = instructor.from_groq(client)
-
         async def _summarize_once(payload: str) -> Optional[str]:
+            # Truncate the payload we send, but keep original_text for fallback.
+            clipped = TextPreprocessor._maybe_truncate(payload, TextPreprocessor.MAX_INPUT_CHARS)
+            # An explicit model is used as is; otherwise the call is routed on the clipped payload
+            models = [model] if model else route(SUMMARIZATION, clipped, TextPreprocessor.SUMMARY_MAX_TOKENS)
+            if fallback(model_upstream(models[0]), "unsummarized"):
+                return None
             try:
-                # Truncate the payload we send, but keep original_text for fallback.
-                clipped = TextPreprocessor._maybe_truncate(payload, TextPreprocessor.MAX_INPUT_CHARS)
-
                 language_instruction = (
                     "Respond in English."
                     if output_language == "en"
                     else "Respond in the original language of the text."
                 )
 
-                response = await instructor_client.chat.completions.create(
-                    model=model_name,
-                    response_model=SummaryModel,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an expert text summarizer. Generate a concise, accurate summary "
-                                "that captures the main points and key information. "
-                                f"{language_instruction} Write 4–7 sentences, removing redundancy."
-                            ),
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Summarize the following text:\n\n{clipped}",
-                        },
-                    ],
-                    max_tokens=500,
-                    temperature=0.3,
+                response = await call_routed(
+                    SUMMARIZATION,
+                    models,
+                    lambda model_name, llm_client: structured(llm_client).chat.completions.create(
+                        model=model_name,
+                        response_model=SummaryModel,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": (
+                                    "You are an expert text summarizer. Generate a concise, accurate summary "
+                                    "that captures the main points and key information. "
+                                    f"{language_instruction} Write 4–7 sentences, removing redundancy."
+                                ),
+                            },
+                            {
+                                "role": "user",
+                                "content": f"Summarize the following text:\n\n{clipped}",
+                            },
+                        ],
+                        max_tokens=TextPreprocessor.SUMMARY_MAX_TOKENS,
+                        temperature=0.3,
+                    ),
+                    client,
                 )
 
                 if isinstance(response, SummaryModel) and response.summary.strip():
@@ -141,6 +264,7 @@ class TextPreprocessor:
                 return None
 
             except Exception as e:
+                UPSTREAM_ERRORS.labels(upstream="groq").inc()
                 logger.error(f"Summarization failed: {e}")
                 return None
 
@@ -173,8 +297,12 @@ class TextPreprocessor:
         return original_text
 
 
-def to_english(text: str) -> str:
-    return TextPreprocessor.to_english(text=text)
+async def to_english(text: str) -> str:
+    return await TextPreprocessor.to_english(text=text)
+
+
+async def to_english_checked(text: str) -> tuple[str, bool]:
+    return await TextPreprocessor.to_english_checked(text=text)
 
 
 async def summarize(client: AsyncGroq, text: str) -> str:
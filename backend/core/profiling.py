@@ -0,0 +1,137 @@
+"""
+On-demand diagnostics for a live worker: a sampling CPU profiler that knows which asyncio task was running, and a
+tracemalloc diff grouped by module. Nothing here runs unless the admin profiling endpoints are enabled.
+"""
+
+import asyncio
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+# Packages whose frames an allocation is attributed to, when one of them is on its traceback
+APP_PACKAGES = ("app", "core", "schemas", "benchmarks")
+# Task names carry task ids (archive-<uuid>, resume-<uuid>) or counters (Task-123); stripped so samples aggregate
+_TASK_SUFFIX_RE = re.compile(r"[-_](?:[0-9a-f]{8}-[0-9a-f-]{27}|\d+)$")
+# Leaf frames of idle pool threads waiting for work; sampling them would only bury the busy ones
+IDLE_THREAD_LEAVES = {"concurrent.futures.thread._worker", "threading.Condition.wait"}
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when another profile or memory diff is already running in this worker."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_qualname}"
+
+
+def _task_label(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return "(event loop)"
+    return f"task:{_TASK_SUFFIX_RE.sub('', task.get_name())}"
+
+
+def _stack(frame: Optional[FrameType]) -> list[str]:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def sample_cpu(loop: asyncio.AbstractEventLoop, seconds: float, interval: float) -> Counter[str]:
+    """
+    Samples every thread's Python stack each ``interval`` seconds for ``seconds`` and returns collapsed stacks
+    (``root;frame;...;leaf`` -> samples). Event-loop stacks are rooted at the asyncio task that was running, so
+    time spent in a pipeline stage shows up under the task that ran it; worker threads (to_thread calls, the
+    translator, Wayback) are rooted at their thread name. Runs in a thread of its own; only one sampler at a time.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        loop_thread = getattr(loop, "_thread_id", None)
+        me = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            threads = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = _stack(frame)
+                if thread_id == loop_thread:
+                    root = _task_label(asyncio.current_task(loop))
+                elif stack[-1] in IDLE_THREAD_LEAVES:
+                    continue
+                else:
+                    root = f"thread:{_TASK_SUFFIX_RE.sub('', threads.get(thread_id, str(thread_id)))}"
+                stacks[";".join([root, *stack])] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _lock.release()
+
+
+def collapsed(stacks: Counter[str]) -> str:
+    """Brendan Gregg's collapsed-stack format, readable by flamegraph.pl, speedscope and inferno."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _module_names() -> dict[str, str]:
+    return {
+        module.__file__: name
+        for name, module in list(sys.modules.items())
+        if getattr(module, "__file__", None) is not None
+    }
+
+
+def _owner(traceback: tracemalloc.Traceback, modules: dict[str, str], depth: Optional[int]) -> str:
+    # Innermost application frame, so a bs4 or json allocation made for core.fact counts against core.fact
+    names = [modules.get(frame.filename, frame.filename) for frame in reversed(traceback)]
+    owner = next((name for name in names if name.split(".")[0] in APP_PACKAGES), names[0] if names else "?")
+    return ".".join(owner.split(".")[:depth]) if depth else owner
+
+
+def memory_diff(seconds: float, frames: int, depth: Optional[int] = None, limit: int = 30) -> list[dict]:
+    """
+    Traces allocations for ``seconds`` (tracemalloc is only on for that window) and returns the memory still held
+    at the end, grouped by owning module, largest growth first. ``depth`` truncates module names to their top
+    ``depth`` components (1 groups by package).
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    started = not tracemalloc.is_tracing()
+    try:
+        if started:
+            tracemalloc.start(frames)
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+        _lock.release()
+
+    modules = _module_names()
+    groups: dict[str, dict] = {}
+    for diff in after.compare_to(before, "traceback"):
+        owner = _owner(diff.traceback, modules, depth)
+        group = groups.setdefault(owner, {"module": owner, "size_diff": 0, "count_diff": 0, "size": 0, "top": None})
+        group["size_diff"] += diff.size_diff
+        group["count_diff"] += diff.count_diff
+        group["size"] += diff.size
+        if diff.size_diff > 0 and (group["top"] is None or diff.size_diff > group["top"][1]):
+            frame = diff.traceback[-1]
+            group["top"] = (f"{frame.filename}:{frame.lineno}", diff.size_diff)
+    ranked = sorted(groups.values(), key=lambda g: g["size_diff"], reverse=True)[:limit]
+    for group in ranked:
+        group["top"] = group["top"][0] if group["top"] else None
+    return ranked
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID, uuid4
+
+from groq import AsyncGroq
+from motor.motor_asyncio import AsyncIOMotorClient
+from openai import AsyncOpenAI
+
+from app.config import settings
+from core.admission import AdmissionRejected, admission
+from core.cancellation import run_cancellable
+from core.db import ACTIVE_TASK_STATUSES, claim_task, find_orphaned_tasks, record_heartbeat
+from core.jobs import spawn
+from core.metrics import TASKS_RESUMED
+from core.tasks import process_fact_check_task
+
+logger = logging.getLogger(__name__)
+
+# Per-client admission key of resumed tasks, so recovery never takes more than max_tasks_per_client slots at once
+RECOVERY_CLIENT = "internal:recovery"
+
+_worker_id: Optional[str] = None
+_worker_pid: Optional[int] = None
+_loop_task: Optional[asyncio.Task] = None
+
+
+def worker_id() -> str:
+    """Identity of this worker process; tasks it admits are owned by it until it stops sending heartbeats."""
+    global _worker_id, _worker_pid
+    # Regenerated after a fork so every worker process owns its tasks separately
+    if _worker_id is None or _worker_pid != os.getpid():
+        _worker_pid = os.getpid()
+        _worker_id = f"{socket.gethostname()}-{_worker_pid}-{uuid4().hex[:8]}"
+    return _worker_id
+
+
+async def recover_orphaned_tasks(
+    groq_client: AsyncGroq, openai_client: AsyncOpenAI, mongo_client: AsyncIOMotorClient
+) -> int:
+    """
+    Takes over unfinished tasks whose worker died and resumes them from their checkpoints, as far as admission
+    control has room; the rest wait for the next sweep. Returns the number of tasks resumed.
+    """
+    created_after = datetime.now() - timedelta(hours=settings.recovery_max_age_hours)
+    orphans = await find_orphaned_tasks(
+        mongo_client, settings.worker_lease_seconds, created_after, limit=settings.max_queued_tasks
+    )
+    resumed = 0
+    for orphan in orphans:
+        try:
+            ticket = admission.admit(RECOVERY_CLIENT, orphan.get("input_data", {}).get("priority", "interactive"))
+        except AdmissionRejected:
+            break
+        claimed = await claim_task(
+            mongo_client,
+            UUID(orphan["task_id"]),
+            ACTIVE_TASK_STATUSES,
+            worker_id(),
+            "Resuming after the worker running the task stopped",
+            check_owner=True,
+            previous_worker=orphan.get("worker_id"),
+        )
+        if claimed is None:
+            # Another worker took it over first
+            ticket.release()
+            continue
+        task, checkpoints = claimed
+        TASKS_RESUMED.labels(trigger="recovery").inc()
+        logger.info(f"Resuming task {task.task_id} left by worker {orphan.get('worker_id')}")
+        spawn(
+            run_cancellable(
+                task.task_id,
+                ticket.run,
+                process_fact_check_task,
+                task.task_id,
+                task.input_data,
+                groq_client,
+                openai_client,
+                mongo_client,
+                checkpoints,
+                task.claim_confidence,
+            ),
+            name=f"resume-{task.task_id}",
+        )
+        resumed += 1
+    return resumed
+
+
+async def _recovery_loop(groq_client: AsyncGroq, openai_client: AsyncOpenAI, mongo_client: AsyncIOMotorClient) -> None:
+    sweep_every = max(1, round(settings.worker_lease_seconds / settings.worker_heartbeat_seconds))
+    beats = 0
+    while True:
+        await record_heartbeat(mongo_client, worker_id())
+        # The first sweep runs at startup; after that once per lease
+        if beats % sweep_every == 0:
+            try:
+                await recover_orphaned_tasks(groq_client, openai_client, mongo_client)
+            except Exception as e:
+                logger.error(f"Task recovery sweep failed: {e}")
+        beats += 1
+        await asyncio.sleep(settings.worker_heartbeat_seconds)
+
+
+def start_recovery(groq_client: AsyncGroq, openai_client: AsyncOpenAI, mongo_client: AsyncIOMotorClient) -> None:
+    """Starts this worker's heartbeat and the periodic sweep for tasks orphaned by workers that died."""
+    global _loop_task
+    # Not a core.jobs job: it runs for the life of the worker and must not hold up the shutdown drain
+    _loop_task = asyncio.get_running_loop().create_task(
+        _recovery_loop(groq_client, openai_client, mongo_client), name="task-recovery"
+    )
+
+
+def stop_recovery() -> None:
+    # The heartbeat is left to expire rather than removed: tasks still finishing during shutdown stay ours until then
+    global _loop_task
+    if _loop_task is not None:
+        _loop_task.cancel()
+        _loop_task = None
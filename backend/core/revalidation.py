@@ -0,0 +1,50 @@
+import logging
+
+from groq import AsyncGroq
+from motor.motor_asyncio import AsyncIOMotorClient
+from openai import AsyncOpenAI
+
+from app.config import settings
+from core.db import add_to_db, claim_revalidation
+from core.fact import build_fact_check_response, fact_check
+from core.jobs import spawn
+from core.metrics import VERDICT_REVALIDATIONS, stage
+from core.scheduler import BULK, set_lane
+from schemas import FactCheckResponse, TextInputData
+
+logger = logging.getLogger(__name__)
+
+
+async def _revalidate(
+    groq_client: AsyncGroq, openai_client: AsyncOpenAI, mongo_client: AsyncIOMotorClient, cached: FactCheckResponse
+) -> None:
+    if not await claim_revalidation(mongo_client, cached.summary, settings.revalidation_interval_minutes):
+        VERDICT_REVALIDATIONS.labels(outcome="throttled").inc()
+        return
+
+    # Re-checks are backfill work; they must not compete with interactive requests for upstream capacity
+    set_lane(BULK)
+    text_data = TextInputData(url=cached.url, content=cached.summary)
+    try:
+        with stage("revalidation"):
+            # Fresh web evidence rather than the corpus the stale verdict may have been built from
+            result = await fact_check(
+                groq_client, openai_client, text_data, raise_on_error=True, mongo_client=mongo_client, use_corpus=False
+            )
+    except Exception as e:
+        # Keep serving the stale verdict; the next request after the interval tries again
+        VERDICT_REVALIDATIONS.labels(outcome="failed").inc()
+        logger.warning(f"Re-check of a stale verdict failed: {e}")
+        return
+
+    changed = await add_to_db(mongo_client, build_fact_check_response(text_data, result))
+    VERDICT_REVALIDATIONS.labels(outcome="changed" if changed else "unchanged").inc()
+    if changed:
+        logger.info(f"Re-check changed a cached verdict from {cached.label.value} to {result.label.value}")
+
+
+def schedule_revalidation(
+    groq_client: AsyncGroq, openai_client: AsyncOpenAI, mongo_client: AsyncIOMotorClient, cached: FactCheckResponse
+) -> None:
+    """Re-checks a stale cached verdict in the background; the caller keeps serving the cached one."""
+    spawn(_revalidate(groq_client, openai_client, mongo_client, cached), name="revalidate-verdict")
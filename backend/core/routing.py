@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from openai import AsyncOpenAI
+from pydantic import ValidationError
+
+from app.config import settings
+from core.breakers import breaker, groq_upstream
+from core.hedging import hedged, observe_latency
+from core.metrics import LLM_ESCALATIONS, LLM_ROUTED, count_retries
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Call sites with a route in settings.llm_routes; named after the stage each runs in
+CLAIM_DETECTION = "claim_detection"
+SUMMARIZATION = "summarization"
+QUERY_GENERATION = "query_generation"
+CLAIM_DECOMPOSITION = "claim_decomposition"
+FALLACY_ANALYSIS = "fallacy_analysis"
+VERDICT = "verdict"
+
+# System prompt and message framing, on top of the routed text
+PROMPT_OVERHEAD_TOKENS = 300
+
+# Claim-detection confidence of the task running in the current context; set by the task runner
+_claim_confidence: ContextVar[Optional[float]] = ContextVar("claim_confidence", default=None)
+# SDK client per provider, registered by app.dependencies; calls routed to the other provider than the call site's
+# client (hedges) use these
+_clients: dict[str, Any] = {}
+
+
+def set_claim_confidence(confidence: Optional[float]) -> None:
+    _claim_confidence.set(confidence)
+
+
+def register_client(provider: str, client: Any) -> None:
+    _clients[provider] = client
+
+
+def client_provider(client: Any) -> str:
+    return "openai" if isinstance(client, AsyncOpenAI) else "groq"
+
+
+def structured(client: Any):
+    """instructor client over a Groq or OpenAI SDK client, counting re-asks against its provider."""
+    import instructor
+
+    provider = client_provider(client)
+    patched = instructor.from_openai(client) if provider == "openai" else instructor.from_groq(client)
+    return count_retries(patched, provider)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English; close enough to size a context window without a tokenizer
+    return len(text) // 4 + 1
+
+
+def model_upstream(model: str) -> str:
+    """Breaker name of a registry model: one per Groq model, one for all of OpenAI (see core.http)."""
+    spec = settings.llm_models.get(model)
+    if spec is not None and spec.provider == "openai":
+        return "openai"
+    return groq_upstream(model)
+
+
+def _estimated_cost(model: str, prompt_tokens: int, max_output_tokens: int) -> float:
+    spec = settings.llm_models[model]
+    return prompt_tokens * spec.prompt_price + max_output_tokens * spec.completion_price
+
+
+def route(task: str, text: str, max_output_tokens: int) -> list[str]:
+    """
+    Models to use for one call of ``task`` on ``text``: the cheapest adequate model first, then the larger models a
+    response failing validation escalates to. Adequate means the model's context window holds the prompt and the
+    answer; hard inputs (long, or a low claim-detection confidence) skip the smallest adequate model.
+    """
+    candidates = [model for model in settings.llm_routes[task] if model in settings.llm_models]
+    prompt_tokens = estimate_tokens(text) + PROMPT_OVERHEAD_TOKENS
+    fitting = [
+        model for model in candidates if prompt_tokens + max_output_tokens <= settings.llm_models[model].context_tokens
+    ]
+    if not fitting:
+        # Nothing holds the whole input: the largest window, whose API truncates or rejects it as before
+        return [max(candidates, key=lambda model: settings.llm_models[model].context_tokens)]
+
+    # Stable sort: equally priced models keep the route's order unless one is faster
+    models = sorted(
+        fitting,
+        key=lambda model: (
+            _estimated_cost(model, prompt_tokens, max_output_tokens),
+            settings.llm_models[model].median_seconds,
+        ),
+    )
+    confidence = _claim_confidence.get()
+    hard = prompt_tokens > settings.routing_hard_input_tokens or (
+        confidence is not None and confidence < settings.routing_min_confidence
+    )
+    if hard and len(models) > 1:
+        models = models[1:]
+    return models
+
+
+def _failed_validation(error: Exception) -> bool:
+    # Malformed or schema-violating output (json.JSONDecodeError is a ValueError), or instructor giving up re-asking
+    if isinstance(error, (ValidationError, ValueError, KeyError)):
+        return True
+    from instructor.exceptions import InstructorRetryException
+
+    return isinstance(error, InstructorRetryException)
+
+
+def _client_for(model: str, client: Any) -> Optional[Any]:
+    spec = settings.llm_models.get(model)
+    provider = spec.provider if spec is not None else client_provider(client)
+    return client if provider == client_provider(client) else _clients.get(provider)
+
+
+async def _timed(model: str, call: Callable[[str, Any], Awaitable[T]], client: Any) -> T:
+    start = time.perf_counter()
+    try:
+        result = await call(model, client)
+    except asyncio.CancelledError:
+        # A hedged-out call's latency is unknown; the time it had run would bias the model's typical latency low
+        raise
+    except Exception:
+        observe_latency(model, time.perf_counter() - start)
+        raise
+    observe_latency(model, time.perf_counter() - start)
+    return result
+
+
+async def call_routed(task: str, models: list[str], call: Callable[[str, Any], Awaitable[T]], client: Any) -> T:
+    """
+    Runs ``call(model, client)`` with the first of ``models`` (from route()); ``client`` is the call site's SDK
+    client, and models of the other provider get the registered one. Only a response that fails validation moves the
+    call to the next model, and only while that model's breaker is available; otherwise the error is raised. The first
+    attempt of a call site listed in HEDGE_MODELS may be hedged (see core.hedging).
+    """
+    hedge_model = settings.hedge_models.get(task) if settings.hedging_enabled else None
+    for index, model in enumerate(models):
+        try:
+            attempt = _timed(model, call, _client_for(model, client) or client)
+            hedge_client = _client_for(hedge_model, client) if index == 0 and hedge_model not in (None, model) else None
+            if hedge_client is None:
+                result = await attempt
+            else:
+                result, model = await hedged(
+                    task,
+                    model,
+                    attempt,
+                    hedge_model,
+                    lambda: _timed(hedge_model, call, hedge_client),
+                    breaker(model_upstream(hedge_model)).available,
+                )
+        except Exception as e:
+            escalate_to = models[index + 1] if index + 1 < len(models) else None
+            if escalate_to is None or not _failed_validation(e) or not breaker(model_upstream(escalate_to)).available():
+                raise
+            LLM_ESCALATIONS.labels(task=task, model=escalate_to).inc()
+            logger.info(f"{task}: {model} output failed validation ({e}); escalating to {escalate_to}")
+            continue
+        LLM_ROUTED.labels(task=task, model=model).inc()
+        return result
+    raise ValueError(f"No model routed for {task}")
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator
+
+from app.config import settings
+from core.metrics import LANE_QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Lane of the work running in the current context; upstream calls made further down the call tree inherit it
+_lane: ContextVar[str] = ContextVar("lane", default=INTERACTIVE)
+
+
+def set_lane(lane: str) -> None:
+    _lane.set(lane if lane in LANES else INTERACTIVE)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+class LaneScheduler:
+    """
+    Weighted-fair slots shared by the interactive and bulk lanes.
+
+    ``capacity`` slots are handed out in weighted round robin (start-time fair queuing) between lanes with waiters.
+    Bulk work may take any idle slot except the ``reserved`` ones, which are kept free for interactive work, so a
+    backfill can use the whole unreserved capacity while an interactive request never waits behind more than
+    ``capacity - reserved`` bulk jobs.
+    """
+
+    def __init__(self, name: str, capacity: int, reserved: int, weights: dict[str, float]):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.reserved = min(max(0, reserved), self.capacity - 1)
+        self.weights = weights
+        self.active = {lane: 0 for lane in LANES}
+        self._waiters: dict[str, deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._finish_tag = {lane: 0.0 for lane in LANES}
+        self._virtual_time = 0.0
+
+    def _has_room(self, lane: str) -> bool:
+        if sum(self.active.values()) >= self.capacity:
+            return False
+        return lane == INTERACTIVE or self.active[lane] < self.capacity - self.reserved
+
+    def _grant(self, lane: str) -> None:
+        # A lane that was idle restarts at the current virtual time instead of cashing in credit it didn't use
+        start = max(self._finish_tag[lane], self._virtual_time)
+        self._finish_tag[lane] = start + 1.0 / self.weights.get(lane, 1.0)
+        self._virtual_time = start
+        self.active[lane] += 1
+
+    def _dispatch(self) -> None:
+        while True:
+            for waiters in self._waiters.values():
+                while waiters and waiters[0].done():
+                    waiters.popleft()
+            ready = [lane for lane in LANES if self._waiters[lane] and self._has_room(lane)]
+            if not ready:
+                return
+            lane = min(ready, key=lambda name: max(self._finish_tag[name], self._virtual_time))
+            self._grant(lane)
+            self._waiters[lane].popleft().set_result(None)
+
+    async def acquire(self, lane: str) -> None:
+        if not any(self._waiters.values()) and self._has_room(lane):
+            self._grant(lane)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the waiter was cancelled; hand it on
+                self.release(lane)
+            raise
+
+    def release(self, lane: str) -> None:
+        self.active[lane] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: str) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        await self.acquire(lane)
+        LANE_QUEUE_WAIT_SECONDS.labels(scheduler=self.name, lane=lane).observe(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+
+def _scheduler(name: str, capacity: int) -> LaneScheduler:
+    reserved = math.ceil(capacity * settings.interactive_reserved_share)
+    weights = {INTERACTIVE: settings.interactive_weight, BULK: 1.0}
+    return LaneScheduler(name, capacity, reserved, weights)
+
+
+# Pipeline execution and the upstreams that rate-limit us; see core.admission and core.http
+pipeline_scheduler = _scheduler("pipeline", settings.max_running_tasks)
+upstream_schedulers = {
+    "llm": _scheduler("llm", settings.llm_concurrency),
+    "cse": _scheduler("cse", settings.cse_concurrency),
+}
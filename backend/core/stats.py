@@ -0,0 +1,183 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.config import settings
+from core.db import (
+    DB_NAME,
+    FINISHED_TASK_STATUSES,
+    STATS_TOTALS_ID,
+    TASK_STATS_COLLECTION,
+    TASK_STATS_HOURLY_COLLECTION,
+    TASKS_COLLECTION,
+    stats_hour,
+)
+from core.metrics import UPSTREAM_ERRORS
+from schemas import FactCheckLabel, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# How often each worker checks whether the stats are due for a rebuild
+REBUILD_CHECK_SECONDS = 600
+HOURLY_EVENTS = ("created", *(status.value for status in FINISHED_TASK_STATUSES))
+
+_rebuild_task: Optional[asyncio.Task] = None
+
+
+def _bucket(start: str, hours: list[dict[str, Any]]) -> dict[str, Any]:
+    bucket: dict[str, Any] = {"start": start, **{event: 0 for event in HOURLY_EVENTS}}
+    bucket["labels"] = {label.value: 0 for label in FactCheckLabel}
+    for hour in hours:
+        for event in HOURLY_EVENTS:
+            bucket[event] += hour.get(event, 0)
+        for label, count in (hour.get("label") or {}).items():
+            bucket["labels"][label] = bucket["labels"].get(label, 0) + count
+    return bucket
+
+
+async def task_stats(mongo_client: AsyncIOMotorClient, bucket: str, limit: int) -> dict[str, Any]:
+    """
+    Current task counts per status and per label of completed tasks, and the tasks created / completed / failed /
+    skipped / cancelled in each of the last ``limit`` hours or days (oldest first). Reads the counters kept by
+    core.db.count_transition: one document plus at most ``limit`` hourly ones (24 per day), however many tasks exist.
+    """
+    now = datetime.now()
+    if bucket == "day":
+        first = (now - timedelta(days=limit - 1)).replace(hour=0)
+        starts = [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(limit)]
+    else:
+        first = now - timedelta(hours=limit - 1)
+        starts = [stats_hour(first + timedelta(hours=i)) for i in range(limit)]
+
+    db = mongo_client[DB_NAME]
+    try:
+        totals = await db[TASK_STATS_COLLECTION].find_one({"_id": STATS_TOTALS_ID}) or {}
+        hours = (
+            await db[TASK_STATS_HOURLY_COLLECTION]
+            .find({"hour": {"$gte": stats_hour(first)}}, {"_id": 0})
+            .to_list(length=None)
+        )
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        totals, hours = {}, []
+
+    by_start: dict[str, list[dict[str, Any]]] = {start: [] for start in starts}
+    for hour in hours:
+        by_start.setdefault(hour["hour"][: len(starts[0])], []).append(hour)
+    statuses = {status.value: 0 for status in TaskStatus} | (totals.get("status") or {})
+    return {
+        "total": sum(statuses.values()),
+        "statuses": statuses,
+        "labels": {label.value: 0 for label in FactCheckLabel} | (totals.get("label") or {}),
+        "buckets": [_bucket(start, by_start[start]) for start in starts],
+        "rebuilt_at": totals.get("rebuilt_at"),
+    }
+
+
+async def rebuild_task_stats(mongo_client: AsyncIOMotorClient) -> None:
+    """
+    Recomputes the task stats from the tasks collection. The hourly buckets come out as if every task had gone
+    straight to its current status: a failure that was retried since only counts as the retry's outcome. Transitions
+    written while the scan runs may be counted twice or not at all until the next rebuild.
+    """
+    db = mongo_client[DB_NAME]
+    tasks = db[TASKS_COLLECTION]
+    finished = [status.value for status in FINISHED_TASK_STATUSES]
+    statuses = await tasks.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(length=None)
+    labels = await tasks.aggregate(
+        [
+            {"$match": {"status": TaskStatus.COMPLETED.value}},
+            {"$group": {"_id": "$result.label", "count": {"$sum": 1}}},
+        ]
+    ).to_list(length=None)
+    created = await tasks.aggregate(
+        [{"$group": {"_id": {"$substr": ["$created_at", 0, 13]}, "count": {"$sum": 1}}}]
+    ).to_list(length=None)
+    outcomes = await tasks.aggregate(
+        [
+            {"$match": {"status": {"$in": finished}}},
+            {
+                "$group": {
+                    "_id": {"hour": {"$substr": ["$updated_at", 0, 13]}, "status": "$status", "label": "$result.label"},
+                    "count": {"$sum": 1},
+                }
+            },
+        ]
+    ).to_list(length=None)
+
+    hourly: dict[str, dict[str, Any]] = {}
+    for row in created:
+        hourly.setdefault(row["_id"], {"hour": row["_id"]})["created"] = row["count"]
+    for row in outcomes:
+        key = row["_id"]
+        hour = hourly.setdefault(key["hour"], {"hour": key["hour"]})
+        hour[key["status"]] = hour.get(key["status"], 0) + row["count"]
+        if key["status"] == TaskStatus.COMPLETED.value and key.get("label"):
+            hour.setdefault("label", {})[key["label"]] = row["count"]
+
+    await db[TASK_STATS_COLLECTION].update_one(
+        {"_id": STATS_TOTALS_ID},
+        {
+            "$set": {
+                "status": {row["_id"]: row["count"] for row in statuses if row["_id"]},
+                "label": {row["_id"]: row["count"] for row in labels if row["_id"]},
+                "rebuilt_at": datetime.now(),
+            }
+        },
+        upsert=True,
+    )
+    hours = db[TASK_STATS_HOURLY_COLLECTION]
+    for key, hour in hourly.items():
+        await hours.replace_one({"hour": key}, hour, upsert=True)
+    await hours.delete_many({"hour": {"$nin": list(hourly)}})
+    logger.info(f"Rebuilt task stats from {sum(row['count'] for row in statuses)} tasks")
+
+
+async def claim_stats_rebuild(mongo_client: AsyncIOMotorClient, interval_hours: float) -> bool:
+    """
+    Whether this worker should rebuild the stats: they were never built, or (with a non-zero ``interval_hours``) not
+    within the interval. At most one worker gets a given rebuild.
+    """
+    now = datetime.now()
+    due: list[dict[str, Any]] = [{"rebuilding_at": {"$exists": False}}]
+    if interval_hours:
+        due.append({"rebuilding_at": {"$lt": now - timedelta(hours=interval_hours)}})
+    try:
+        await mongo_client[DB_NAME][TASK_STATS_COLLECTION].update_one(
+            {"_id": STATS_TOTALS_ID, "$or": due}, {"$set": {"rebuilding_at": now}}, upsert=True
+        )
+    except DuplicateKeyError:
+        # The stats exist and another worker claimed (or ran) the rebuild within the interval
+        return False
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return False
+    return True
+
+
+async def _rebuild_loop(mongo_client: AsyncIOMotorClient) -> None:
+    while True:
+        try:
+            # With STATS_REBUILD_HOURS=0 the stats are only built when they are missing (the first deploy)
+            if await claim_stats_rebuild(mongo_client, settings.stats_rebuild_hours):
+                await rebuild_task_stats(mongo_client)
+        except PyMongoError as e:
+            UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+            logger.warning(f"Task stats rebuild failed: {e}")
+        await asyncio.sleep(REBUILD_CHECK_SECONDS)
+
+
+def start_stats_rebuilder(mongo_client: AsyncIOMotorClient) -> None:
+    global _rebuild_task
+    _rebuild_task = asyncio.get_running_loop().create_task(_rebuild_loop(mongo_client), name="task-stats-rebuild")
+
+
+def stop_stats_rebuilder() -> None:
+    global _rebuild_task
+    if _rebuild_task is not None:
+        _rebuild_task.cancel()
+        _rebuild_task = None
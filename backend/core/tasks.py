@@ -1,17 +1,26 @@
+import asyncio
 import logging
 from datetime import datetime, UTC
+from typing import Optional
 from uuid import UUID
 
-import ujson
 from groq import AsyncGroq
 from openai import AsyncOpenAI
 from motor.motor_asyncio import AsyncIOMotorClient
 
-from core.db import update_task_status, add_to_db
-from core.fact import fact_check_process
-from core.fallacies_and_bias import detect_fallacies_and_bias
-from core.preprocessors import summarize, to_english
-from schemas import TaskStatus, TextInputData, FactCheckResponse
+from core.archiver import schedule_archive
+from core.breakers import UpstreamUnavailable, fallback
+from core.checkpoints import ENGLISH_CONTENT, FALLACY_RESULT, SUMMARY, start_checkpoints
+from core.claims import fact_check_claims, verify_claim
+from core.db import update_task_status, to_document
+from core.deadline import start_deadline, time_before_evidence
+from core.fallacies_and_bias import ReasoningIssueAnalysis, detect_fallacies_and_bias, fallacy_models
+from core.metrics import stage, start_task_timings
+from core.pages import get_article, save_page_analysis
+from core.preprocessors import summarize, to_english_checked
+from core.routing import model_upstream, set_claim_confidence
+from core.usage import save_task_usage, start_task_usage
+from schemas import FactCheckLabel, TaskStatus, TextInputData, FactCheckResponse
 
 logger = logging.getLogger(__name__)
 
@@ -22,40 +31,136 @@ async def process_fact_check_task(
     groq_client: AsyncGroq,
     openai_client: AsyncOpenAI,
     mongo_client: AsyncIOMotorClient,
+    checkpoints: Optional[dict] = None,
+    claim_confidence: Optional[float] = None,
 ) -> None:
+    """
+    Runs the fact-check pipeline for a task. Each stage's output is checkpointed on the task document; a retried or
+    resumed task passes its ``checkpoints`` back in and only runs the stages that hadn't completed. The tokens and
+    cost of the task's LLM calls are added to the task document at the end, also when the task is cancelled.
+    ``claim_confidence`` (from claim detection) steers model routing: inputs the classifier was unsure about start on
+    larger models.
+    """
     original_content = data.content
+    timings = start_task_timings()
+    start_deadline(data.deadline_seconds)
+    saved = start_checkpoints(mongo_client, task_id, checkpoints)
+    llm_calls = start_task_usage()
+    set_claim_confidence(claim_confidence)
 
     try:
         await update_task_status(mongo_client, task_id, TaskStatus.PROCESSING, "Task started processing")
 
+        page = None
+        if data.url and not data.content.strip():
+            # Verify by URL: the article is fetched and extracted once and shared by every request for the page
+            page = await get_article(mongo_client, data.url)
+            if page is None:
+                raise RuntimeError(f"Could not fetch an article from {data.url}")
+            original_content = page.content
+
         await update_task_status(mongo_client, task_id, TaskStatus.SUMMARIZING, "Summarizing content")
 
-        summarized_content = await summarize(client=groq_client, text=to_english(text=data.content))
+        # Only real results are checkpointed and shared through the pages cache: a retry, or a later request for the
+        # same page, redoes what ran degraded (breaker open, failures, out of time budget)
+        real_summary = None
+        if page is not None and page.summary:
+            summarized_content = page.summary
+        elif (summarized_content := saved.get(SUMMARY)) is not None:
+            real_summary = summarized_content
+        else:
+            english_content = saved.get(ENGLISH_CONTENT)
+            translated = english_content is not None
+            if english_content is None:
+                try:
+                    with stage("translation"):
+                        english_content, translated = await asyncio.wait_for(
+                            to_english_checked(text=original_content), timeout=time_before_evidence()
+                        )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Task {task_id}: summarizing untranslated text, out of time budget")
+                    english_content = original_content
+                else:
+                    if translated:
+                        await saved.save(ENGLISH_CONTENT, english_content)
+            try:
+                with stage("summarization"):
+                    summarized_content = await asyncio.wait_for(
+                        summarize(client=groq_client, text=english_content), timeout=time_before_evidence()
+                    )
+            except asyncio.TimeoutError:
+                logger.warning(f"Task {task_id}: checking unsummarized text, out of time budget")
+                summarized_content = english_content
+            if translated and summarized_content != english_content:
+                real_summary = summarized_content
+                await saved.save(SUMMARY, real_summary)
         data.content = summarized_content
 
         await update_task_status(mongo_client, task_id, TaskStatus.FACT_CHECKING, "Performing fact check analysis")
 
-        fallacy_result = await detect_fallacies_and_bias(groq_client, original_content)
-
-        fact_check_result, is_cached = await fact_check_process(
-            groq_client=groq_client,
-            openai_client=openai_client,
-            text_data=data,
-            mongo_client=mongo_client,
-        )
-
-        if not is_cached:
-            await add_to_db(mongo_client, fact_check_result)
+        if page is not None and page.fallacy_result is not None:
+            fallacy_result = page.fallacy_result
+        elif (restored := saved.get(FALLACY_RESULT)) is not None:
+            fallacy_result = ReasoningIssueAnalysis.model_validate(restored)
+        elif fallback(model_upstream(fallacy_models(original_content)[0]), "skip_analysis"):
+            fallacy_result = None
+        else:
+            # Optional analysis: dropped rather than eating into the time the evidence and verdict need
+            try:
+                with stage("fallacy_analysis"):
+                    fallacy_result = await asyncio.wait_for(
+                        detect_fallacies_and_bias(groq_client, original_content), timeout=time_before_evidence()
+                    )
+            except asyncio.TimeoutError:
+                logger.warning(f"Task {task_id}: skipped reasoning analysis, out of time budget")
+                fallacy_result = None
+            if fallacy_result is not None:
+                await saved.save(FALLACY_RESULT, to_document(fallacy_result))
+        if page is not None:
+            await save_page_analysis(
+                mongo_client, page, real_summary, fallacy_result if page.fallacy_result is None else None
+            )
+
+        if data.decompose_claims:
+            # Per-claim verdicts are cached individually; the combined result only lives on the task
+            fact_check_result = await fact_check_claims(groq_client, openai_client, mongo_client, data)
+        else:
+            fact_check_result = await verify_claim(groq_client, openai_client, mongo_client, data)
 
         await save_task_completion(
-            mongo_client, task_id, original_content, summarized_content, fact_check_result, fallacy_result
+            mongo_client, task_id, original_content, summarized_content, fact_check_result, fallacy_result, timings
         )
 
+        if (
+            fact_check_result.label != FactCheckLabel.CORRECT
+            and fact_check_result.url
+            and not fact_check_result.archive
+        ):
+            schedule_archive(mongo_client, task_id, fact_check_result.url)
+
         logger.info(f"Task {task_id} completed successfully")
 
+    except asyncio.CancelledError:
+        # Cancelled (see core.cancellation): the task is already marked, and nothing more of it is written
+        logger.info(f"Task {task_id} stopped after being cancelled")
+        raise
+    except UpstreamUnavailable as e:
+        logger.warning(f"Task {task_id} failed fast: {e}")
+        await update_task_status(
+            mongo_client, task_id, TaskStatus.FAILED, f"Task failed: {e}", timings=timings, retryable=True
+        )
+    except asyncio.TimeoutError:
+        # The verdict didn't come within the task's budget; a retry resumes from the checkpointed evidence
+        logger.warning(f"Task {task_id} ran out of its time budget")
+        await update_task_status(
+            mongo_client, task_id, TaskStatus.FAILED, "Task failed: out of time budget", timings=timings, retryable=True
+        )
     except Exception as e:
         logger.error(f"Task {task_id} failed with error: {str(e)}")
-        await update_task_status(mongo_client, task_id, TaskStatus.FAILED, f"Task failed: {str(e)}")
+        await update_task_status(mongo_client, task_id, TaskStatus.FAILED, f"Task failed: {str(e)}", timings=timings)
+    finally:
+        # Failed attempts' tokens were paid for too
+        await save_task_usage(mongo_client, task_id, llm_calls)
 
 
 async def save_task_completion(
@@ -65,13 +170,19 @@ async def save_task_completion(
     summarized_content: str,
     fact_check_result: "FactCheckResponse",
     fallacy_result=None,
+    timings: Optional[dict[str, float]] = None,
 ) -> None:
     try:
         from core.db import update_task_status
         from schemas import TaskStatus
 
         await update_task_status(
-            mongo_client, task_id, TaskStatus.COMPLETED, "Fact check completed successfully", result=fact_check_result
+            mongo_client,
+            task_id,
+            TaskStatus.COMPLETED,
+            "Fact check completed successfully",
+            result=fact_check_result,
+            timings=timings,
         )
 
         from core.db import DB_NAME, TASKS_COLLECTION
@@ -85,12 +196,14 @@ async def save_task_completion(
         }
 
         if fallacy_result is not None:
-            update_data["fallacy_result"] = ujson.loads(fallacy_result.model_dump_json())
-
-        await collection.update_one(
-            {"task_id": str(task_id)},
-            {"$set": update_data},
-        )
+            update_data["fallacy_result"] = to_document(fallacy_result)
+
+        with stage("mongo_write"):
+            # Not for a task cancelled as it completed: its completion wasn't written either
+            await collection.update_one(
+                {"task_id": str(task_id), "status": TaskStatus.COMPLETED.value},
+                {"$set": update_data},
+            )
 
     except Exception as e:
         logger.error(f"Failed to save task completion data for {task_id}: {str(e)}")
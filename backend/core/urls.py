@@ -0,0 +1,113 @@
+import asyncio
+import ipaddress
+import re
+import socket
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import AnyHttpUrl
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "pk_", "hsa_")
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "gbraid",
+    "wbraid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mkt_tok",
+    "ref_src",
+    "ref_url",
+    "cmpid",
+    "ito",
+    "_ga",
+    "_gl",
+    "amp",
+    "outputtype",
+}
+# Mobile and AMP hosts serve the same article as the main site
+MOBILE_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+# https://www.google.com/amp/s/example.com/story and https://example-com.cdn.ampproject.org/c/s/example.com/story
+AMP_VIEWER_RE = re.compile(r"^(?:www\.google\.[a-z.]+/amp|[a-z0-9-]+\.cdn\.ampproject\.org/[a-z]+)/(s/)?(.+)$")
+AMP_PATH_SUFFIX_RE = re.compile(r"(/amp|\.amp)$")
+
+
+def _unwrap_amp_viewer(url: str) -> str:
+    parts = urlsplit(url)
+    match = AMP_VIEWER_RE.match(f"{(parts.hostname or '').lower()}{parts.path}")
+    if not match:
+        return url
+    scheme = "https" if match.group(1) else "http"
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{scheme}://{match.group(2)}{query}"
+
+
+def canonicalize_url(url: AnyHttpUrl | str) -> str:
+    """
+    Normalizes a URL for use as a cache key: lowercased scheme/host without www/mobile/AMP prefixes or the default
+    port, AMP viewer and AMP path variants unwrapped, tracking params and the fragment dropped, query sorted.
+    """
+    parts = urlsplit(_unwrap_amp_viewer(str(url).strip()))
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    for prefix in MOBILE_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix) :]
+            break
+    port = parts.port
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAM_PREFIXES) and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/")
+    path = AMP_PATH_SUFFIX_RE.sub("", path).replace(".amp.", ".")
+    if path.startswith("/amp/"):
+        path = path[len("/amp") :]
+    return urlunsplit((scheme, netloc, path or "/", urlencode(sorted(query)), ""))
+
+
+class UnsafeURL(ValueError):
+    """A URL the server must not fetch for a client: not http(s), or its host resolves to a non-public address."""
+
+
+def _check_public_address(host: str, address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> None:
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    if not address.is_global or address.is_multicast:
+        raise UnsafeURL(f"{host} resolves to a non-public address ({address})")
+
+
+def check_public_url(url: str) -> None:
+    """
+    Raises UnsafeURL unless ``url`` is http(s) and, when its host is an IP literal, a public address. Host names are
+    checked when a connection is made (see resolve_public), so what was checked is what gets dialled.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in DEFAULT_PORTS or not parts.hostname:
+        raise UnsafeURL(f"Only http(s) URLs can be fetched: {url}")
+    try:
+        address = ipaddress.ip_address(parts.hostname)
+    except ValueError:
+        return
+    _check_public_address(parts.hostname, address)
+
+
+async def resolve_public(host: str, port: int) -> list[str]:
+    """
+    The addresses ``host`` resolves to, or UnsafeURL if any of them isn't public: no loopback, private, link-local,
+    shared, reserved or multicast addresses, so client-supplied URLs can't reach the metadata service, Mongo or other
+    internal services.
+    """
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise UnsafeURL(f"Could not resolve {host}: {e}")
+    addresses = list(dict.fromkeys(sockaddr[0].split("%")[0] for *_, sockaddr in infos))
+    for address in addresses:
+        _check_public_address(host, ipaddress.ip_address(address))
+    return addresses
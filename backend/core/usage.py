@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Optional
+from uuid import UUID
+
+import httpx
+import ujson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.db import DB_NAME, LLM_USAGE_COLLECTION, TASKS_COLLECTION
+from core.metrics import LLM_COST_USD, LLM_TOKENS, TASK_BUDGET_EXCEEDED, UPSTREAM_ERRORS, current_stage
+
+logger = logging.getLogger(__name__)
+
+LLM_HOSTS = {"api.groq.com", "api.openai.com"}
+USAGE_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cost_usd", "latency_seconds")
+
+# LLM calls of the task running in the current context; set by the task runner (and the claim-detection route)
+_task_usage: ContextVar[Optional[list[dict[str, Any]]]] = ContextVar("task_usage", default=None)
+# (day, model, stage) -> usage not yet added to the daily rollup collection
+_pending: dict[tuple[str, str, str], dict[str, float]] = {}
+_flush_task: Optional[asyncio.Task] = None
+
+
+def start_task_usage() -> list[dict[str, Any]]:
+    calls: list[dict[str, Any]] = []
+    _task_usage.set(calls)
+    return calls
+
+
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost from the model registry (LLM_MODELS); 0 for unlisted models."""
+    spec = settings.llm_models.get(model)
+    if spec is None:
+        return 0.0
+    return (prompt_tokens * spec.prompt_price + completion_tokens * spec.completion_price) / 1_000_000
+
+
+def _add(totals: dict[str, float], call: dict[str, Any]) -> None:
+    totals["calls"] = totals.get("calls", 0) + 1
+    for field in USAGE_FIELDS[1:]:
+        totals[field] = totals.get(field, 0) + call[field]
+
+
+async def record_llm_response(request: httpx.Request, response: httpx.Response, seconds: float) -> None:
+    """Reads the token usage of a chat completion; called by core.http for every LLM response."""
+    if request.url.host not in LLM_HOSTS or not request.url.path.endswith("/chat/completions"):
+        return
+    if response.status_code != 200:
+        return
+    await response.aread()
+    try:
+        model = ujson.loads(request.content).get("model") or "unknown"
+        usage = ujson.loads(response.content).get("usage") or {}
+    except (ValueError, AttributeError):
+        return
+
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+    call = {
+        "model": model,
+        "stage": current_stage() or "other",
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_seconds": round(seconds, 4),
+        "cost_usd": llm_cost(model, prompt_tokens, completion_tokens),
+    }
+    LLM_TOKENS.labels(model=model, stage=call["stage"], kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(model=model, stage=call["stage"], kind="completion").inc(completion_tokens)
+    LLM_COST_USD.labels(model=model, stage=call["stage"]).inc(call["cost_usd"])
+    _add(_pending.setdefault((date.today().isoformat(), model, call["stage"]), {}), call)
+
+    calls = _task_usage.get()
+    if calls is not None:
+        calls.append(call)
+
+
+async def save_task_usage(mongo_client: AsyncIOMotorClient, task_id: UUID, calls: list[dict[str, Any]]) -> None:
+    """
+    Adds a task's LLM calls and their totals to its document (retries and resumes add to the earlier attempts') and
+    raises a budget alert the first time the task's spend goes over TASK_BUDGET_USD.
+    """
+    if not calls:
+        return
+    totals: dict[str, float] = {}
+    for call in calls:
+        _add(totals, call)
+    try:
+        collection = mongo_client[DB_NAME][TASKS_COLLECTION]
+        await collection.update_one(
+            {"task_id": str(task_id)},
+            {
+                "$push": {"llm_calls": {"$each": calls}},
+                "$inc": {f"llm_usage.{field}": totals[field] for field in USAGE_FIELDS},
+            },
+        )
+        if not settings.task_budget_usd:
+            return
+        # Flags the task only once, however many attempts add to its spend afterwards
+        flagged = await collection.update_one(
+            {
+                "task_id": str(task_id),
+                "llm_usage.cost_usd": {"$gt": settings.task_budget_usd},
+                "llm_usage.budget_exceeded": {"$ne": True},
+            },
+            {"$set": {"llm_usage.budget_exceeded": True}},
+        )
+        if flagged.modified_count:
+            TASK_BUDGET_EXCEEDED.inc()
+            logger.warning(f"Task {task_id} went over its LLM budget of ${settings.task_budget_usd:.4f}")
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+
+
+async def flush_usage(mongo_client: AsyncIOMotorClient) -> None:
+    """Adds the usage recorded since the last flush to the per-day, model and stage rollup."""
+    global _pending
+    pending, _pending = _pending, {}
+    collection = mongo_client[DB_NAME][LLM_USAGE_COLLECTION]
+    for index, ((day, model, stage), totals) in enumerate(pending.items()):
+        try:
+            await collection.update_one(
+                {"day": day, "model": model, "stage": stage},
+                {"$inc": totals, "$set": {"updated_at": datetime.now()}},
+                upsert=True,
+            )
+        except PyMongoError:
+            UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+            # Keep what wasn't written for the next flush
+            for key, rest in list(pending.items())[index:]:
+                merged = _pending.setdefault(key, {})
+                for field, value in rest.items():
+                    merged[field] = merged.get(field, 0) + value
+            return
+
+
+async def usage_report(
+    mongo_client: AsyncIOMotorClient, since: date, until: date, group_by: list[str]
+) -> list[dict[str, Any]]:
+    """LLM usage between two days (inclusive) summed over ``group_by`` (any of day, model, stage), costliest first."""
+    pipeline = [
+        {"$match": {"day": {"$gte": since.isoformat(), "$lte": until.isoformat()}}},
+        {
+            "$group": {
+                "_id": {field: f"${field}" for field in group_by},
+                **{field: {"$sum": f"${field}"} for field in USAGE_FIELDS},
+            }
+        },
+        {"$sort": {"cost_usd": -1}},
+    ]
+    try:
+        rows = await mongo_client[DB_NAME][LLM_USAGE_COLLECTION].aggregate(pipeline).to_list(length=None)
+    except PyMongoError:
+        UPSTREAM_ERRORS.labels(upstream="mongo").inc()
+        return []
+    return [{**row.pop("_id"), **row} for row in rows]
+
+
+async def _flush_loop(mongo_client: AsyncIOMotorClient) -> None:
+    while True:
+        await asyncio.sleep(settings.usage_flush_seconds)
+        await flush_usage(mongo_client)
+
+
+def start_usage_flusher(mongo_client: AsyncIOMotorClient) -> None:
+    global _flush_task
+    _flush_task = asyncio.get_running_loop().create_task(_flush_loop(mongo_client), name="usage-flush")
+
+
+async def stop_usage_flusher(mongo_client: AsyncIOMotorClient) -> None:
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        _flush_task = None
+    await flush_usage(mongo_client)
@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+from datetime import datetime
+from typing import BinaryIO, Optional
+
+import click
+import ujson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from core.export import EXPORT_SOURCES, export_ndjson, export_query
+from schemas import FactCheckLabel, TaskStatus
+
+
+async def _export(out: BinaryIO, source: str, query: dict, fields: list[str]) -> Optional[str]:
+    """Writes the export to ``out``; returns the ``_cursor`` of the last line written."""
+    client = AsyncIOMotorClient(settings.mongo_uri)
+    last = None
+    try:
+        async for chunk in export_ndjson(client, source, query, fields):
+            out.write(chunk)
+            # Chunks hold whole lines, so the last one is a complete document
+            last = ujson.loads(chunk.rstrip(b"\n").rsplit(b"\n", 1)[-1])["_cursor"]
+    except PyMongoError as e:
+        hint = f"; resume with --after {last}" if last else ""
+        raise click.ClickException(f"Export interrupted: {e}{hint}")
+    finally:
+        client.close()
+    return last
+
+
+@click.command()
+@click.argument("source", type=click.Choice(list(EXPORT_SOURCES)))
+@click.option("--since", type=click.DateTime(), help="Only documents created (articles: updated) from this time on.")
+@click.option("--until", type=click.DateTime(), help="Only documents created (articles: updated) before this time.")
+@click.option("--status", type=click.Choice([s.value for s in TaskStatus]), help="Only tasks in this status.")
+@click.option("--label", type=click.Choice([label.value for label in FactCheckLabel]), help="Only this verdict.")
+@click.option("--field", "fields", multiple=True, help="Export only this field (repeatable; dotted paths work).")
+@click.option("--after", help="Resume after the document with this _cursor token.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, allow_dash=True), default="-", help="Default: stdout.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip-compress the output.")
+def main(
+    source: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    status: Optional[str],
+    label: Optional[str],
+    fields: tuple[str, ...],
+    after: Optional[str],
+    output: str,
+    compress: bool,
+) -> None:
+    """Streams all tasks or articles (fact-check verdicts) matching the filters from Mongo as NDJSON."""
+    try:
+        query = export_query(
+            source,
+            since,
+            until,
+            TaskStatus(status) if status else None,
+            FactCheckLabel(label) if label else None,
+            after,
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    with click.open_file(output, "wb") as raw:
+        out = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        try:
+            last = asyncio.run(_export(out, source, query, list(fields)))
+        finally:
+            if compress:
+                out.close()
+    if last:
+        click.echo(f"Last _cursor: {last}", err=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,20 @@
+import click
 import uvicorn
 
+
+@click.command()
+@click.option("--prod", is_flag=True, help="Multi-worker production server (gunicorn + uvicorn workers).")
+@click.option("--workers", type=int, default=0, help="Worker processes for --prod (default: WORKERS or CPU count).")
+@click.option("--host", default="0.0.0.0")
+@click.option("--port", type=int, default=8000)
+def main(prod: bool, workers: int, host: str, port: int) -> None:
+    if prod:
+        from app.server import run_production
+
+        run_production(host, port, workers)
+    else:
+        uvicorn.run("app.main:app", host=host, port=port, reload=True, use_colors=True)
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True, use_colors=True)
+    main()
@@ -1,24 +1,30 @@
 # Full Path: app\schemas\__init__.py
 from schemas.schemas import (
+    ClaimVerdict,
     FactCheckLabel,
     FactCheckResponse,
     GPTFactCheckModel,
     HealthResponse,
+    Priority,
     TextInputData,
     TaskStatus,
     TaskResponse,
     TaskStatusResponse,
+    TaskStatsResponse,
     TaskData,
 )
 
 __all__ = [
+    "ClaimVerdict",
     "FactCheckLabel",
     "FactCheckResponse",
     "GPTFactCheckModel",
     "HealthResponse",
+    "Priority",
     "TextInputData",
     "TaskStatus",
     "TaskResponse",
     "TaskStatusResponse",
+    "TaskStatsResponse",
     "TaskData",
 ]
@@ -8,9 +8,26 @@ from pydantic import AnyHttpUrl, BaseModel, Field, field_validator
 from core.fallacies_and_bias import ReasoningIssueAnalysis
 
 
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
 class TextInputData(BaseModel):
     url: Optional[AnyHttpUrl] = Field(None, description="The url of the article")
     content: str = Field("", description="The content of the article")
+    priority: Priority = Field(
+        Priority.INTERACTIVE, description="Scheduling lane: interactive requests or bulk/backfill jobs"
+    )
+    decompose_claims: bool = Field(
+        False, description="Split the content into atomic claims and verify each one separately"
+    )
+    deadline_seconds: Optional[float] = Field(
+        None, gt=0, description="Latency budget for the task; defaults to the server's TASK_DEADLINE_SECONDS"
+    )
+    abandon_after_seconds: Optional[float] = Field(
+        None, gt=0, description="Cancel the task if its status hasn't been polled for this long"
+    )
 
 
 class FactCheckLabel(str, Enum):
@@ -62,6 +79,17 @@ class GPTFactCheckModel(BaseModel):
 
 class HealthResponse(BaseModel):
     database_is_working: bool = Field(True, description="Whether the database is working")
+    upstreams: dict[str, str] = Field(
+        default_factory=dict,
+        description="Circuit breaker state (closed, half_open, open) of each upstream this worker has called",
+    )
+
+
+class ClaimVerdict(BaseModel):
+    claim: str = Field(description="The atomic claim")
+    label: FactCheckLabel = Field(description="The label of the fact check for this claim")
+    response: str = Field(description="The explanation for this claim")
+    references: list[AnyHttpUrl] = Field([], description="The references for this claim")
 
 
 class FactCheckResponse(BaseModel):
@@ -73,6 +101,11 @@ class FactCheckResponse(BaseModel):
     archive: str | None = Field(None, description="The archive url of the site")
     references: list[AnyHttpUrl] = Field([], description="The references of the fact check")
     updatedAt: datetime = Field(default_factory=datetime.now, description="The time of the last update")
+    version: int = Field(1, description="Incremented each time a re-check changes the verdict")
+    claims: list[ClaimVerdict] = Field([], description="Per-claim verdicts when the content was decomposed")
+    partial_evidence: bool = Field(
+        False, description="Whether some evidence sources were cut off by the task deadline (snippets used instead)"
+    )
 
 
 class TaskStatus(str, Enum):
@@ -83,6 +116,7 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     SKIPPED = "skipped"
+    CANCELLED = "cancelled"
 
 
 class TaskResponse(BaseModel):
@@ -99,6 +133,27 @@ class TaskStatusResponse(BaseModel):
     fallacy_result: Optional["ReasoningIssueAnalysis"] = Field(None, description="The reasoning issue analysis result")
     created_at: datetime = Field(description="When the task was created")
     updated_at: datetime = Field(description="When the task was last updated")
+    retryable: bool = Field(
+        False, description="Whether a failed task failed on an unavailable upstream and can be resubmitted later"
+    )
+
+
+class TaskStatsBucket(BaseModel):
+    start: str = Field(description="The hour (2024-05-01T13) or day (2024-05-01) the bucket covers, server local time")
+    created: int = Field(description="Tasks created")
+    completed: int = Field(description="Tasks completed")
+    failed: int = Field(description="Tasks failed")
+    skipped: int = Field(description="Tasks skipped as containing no factual claim")
+    cancelled: int = Field(description="Tasks cancelled by their client or abandoned")
+    labels: dict[str, int] = Field(description="Completed tasks per verdict label")
+
+
+class TaskStatsResponse(BaseModel):
+    total: int = Field(description="The number of tasks")
+    statuses: dict[str, int] = Field(description="Tasks per current status")
+    labels: dict[str, int] = Field(description="Completed tasks per verdict label")
+    buckets: list[TaskStatsBucket] = Field(description="Task throughput per hour or day, oldest first")
+    rebuilt_at: Optional[datetime] = Field(None, description="When the counters were last recomputed from the tasks")
 
 
 class TaskData(BaseModel):
@@ -110,3 +165,10 @@ class TaskData(BaseModel):
     fallacy_result: Optional["ReasoningIssueAnalysis"] = Field(None, description="The reasoning issue analysis result")
     created_at: datetime = Field(default_factory=datetime.now, description="When the task was created")
     updated_at: datetime = Field(default_factory=datetime.now, description="When the task was last updated")
+    retryable: bool = Field(
+        False, description="Whether a failed task failed on an unavailable upstream and can be resubmitted later"
+    )
+    worker_id: Optional[str] = Field(None, description="The worker process that owns the task")
+    claim_confidence: Optional[float] = Field(
+        None, description="Claim-detection confidence of the input, used to route the task's LLM calls"
+    )
@@ -0,0 +1,5 @@
+import os
+
+# Settings require the upstream credentials; tests never reach the upstreams
+for _key in ("OPENAI_API_KEY", "GOOGLE_API_KEY", "GOOGLE_CSE_ID", "GROQ_API_KEY"):
+    os.environ.setdefault(_key, "test")
@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from core import breakers
+from core.breakers import CALL, CLOSED, HALF_OPEN, OPEN, CircuitBreaker, UpstreamUnavailable
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(breakers, "time", clock)
+    monkeypatch.setattr(settings, "breaker_window_seconds", 60)
+    monkeypatch.setattr(settings, "breaker_min_calls", 4)
+    monkeypatch.setattr(settings, "breaker_error_rate", 0.5)
+    monkeypatch.setattr(settings, "breaker_slow_call_rate", 0.8)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 30)
+    return clock
+
+
+def _open_breaker() -> CircuitBreaker:
+    cb = CircuitBreaker("cse")
+    for _ in range(settings.breaker_min_calls):
+        cb.record(cb.allow(), 0.1, failed=True)
+    assert cb.state == OPEN
+    return cb
+
+
+def test_opens_once_the_error_rate_is_reached(clock: FakeClock):
+    cb = CircuitBreaker("cse")
+    for failed in (False, True, False):
+        cb.record(cb.allow(), 0.1, failed=failed)
+    # Too few calls to judge the upstream yet
+    assert cb.state == CLOSED
+
+    cb.record(cb.allow(), 0.1, failed=True)
+    assert cb.state == OPEN
+    assert cb.allow() is None
+    assert not cb.available()
+    assert cb.retry_after() == 30
+
+
+def test_slow_calls_open_the_breaker(clock: FakeClock):
+    cb = CircuitBreaker("cse")
+    for _ in range(settings.breaker_min_calls):
+        cb.record(cb.allow(), cb.slow_call_seconds + 1, failed=False)
+    assert cb.state == OPEN
+
+
+def test_failures_outside_the_window_are_forgotten(clock: FakeClock):
+    cb = CircuitBreaker("cse")
+    for _ in range(3):
+        cb.record(cb.allow(), 0.1, failed=True)
+    clock.now += settings.breaker_window_seconds + 1
+    cb.record(cb.allow(), 0.1, failed=False)
+    assert cb.state == CLOSED
+
+
+def test_goes_half_open_after_the_cool_down_and_admits_a_single_probe(clock: FakeClock):
+    cb = _open_breaker()
+    clock.now += settings.breaker_open_seconds
+    assert cb.available()
+
+    probe = cb.allow()
+    assert cb.state == HALF_OPEN
+    assert probe is not None and probe is not CALL
+    # Everyone else waits for the probe's outcome
+    assert cb.allow() is None
+    assert not cb.available()
+
+
+def test_a_good_probe_closes_the_breaker(clock: FakeClock):
+    cb = _open_breaker()
+    clock.now += settings.breaker_open_seconds
+    cb.record(cb.allow(), 0.1, failed=False)
+    assert cb.state == CLOSED
+    assert cb.allow() is CALL
+
+
+@pytest.mark.parametrize("seconds, failed", [(0.1, True), (None, False)])
+def test_a_failed_or_slow_probe_opens_it_again(clock: FakeClock, seconds, failed):
+    cb = _open_breaker()
+    clock.now += settings.breaker_open_seconds
+    probe = cb.allow()
+    cb.record(probe, cb.slow_call_seconds + 1 if seconds is None else seconds, failed=failed)
+    assert cb.state == OPEN
+    assert cb.allow() is None
+    assert cb.retry_after() == 30
+
+
+def test_only_the_probe_decides_the_half_open_state(clock: FakeClock):
+    cb = CircuitBreaker("cse")
+    # Admitted while closed, finishing after the breaker has gone half-open
+    stale = [cb.allow() for _ in range(2)]
+    for _ in range(settings.breaker_min_calls):
+        cb.record(cb.allow(), 0.1, failed=True)
+    clock.now += settings.breaker_open_seconds
+    probe = cb.allow()
+
+    cb.record(stale[0], 0.1, failed=False)
+    assert cb.state == HALF_OPEN
+    assert cb.allow() is None
+    cb.record(stale[1], 0.1, failed=True)
+    assert cb.state == HALF_OPEN
+
+    cb.record(probe, 0.1, failed=False)
+    assert cb.state == CLOSED
+
+
+def test_calls_finishing_while_open_are_ignored(clock: FakeClock):
+    cb = CircuitBreaker("cse")
+    late = cb.allow()
+    for _ in range(settings.breaker_min_calls):
+        cb.record(cb.allow(), 0.1, failed=True)
+    opened_at = clock.now
+    clock.now += 5
+
+    cb.record(late, 0.1, failed=False)
+    assert cb.state == OPEN
+    assert cb.retry_after() == settings.breaker_open_seconds - (clock.now - opened_at)
+
+
+def test_a_cancelled_probe_lets_the_next_call_probe(clock: FakeClock):
+    cb = _open_breaker()
+    clock.now += settings.breaker_open_seconds
+    first = cb.allow()
+    cb.cancelled(first)
+    assert cb.state == HALF_OPEN
+
+    second = cb.allow()
+    assert second is not None and second is not first
+    # The abandoned probe no longer counts
+    cb.record(first, 0.1, failed=True)
+    assert cb.state == HALF_OPEN
+    cb.record(second, 0.1, failed=False)
+    assert cb.state == CLOSED
+
+
+def test_call_guards_the_upstream(clock: FakeClock):
+    async def scenario() -> None:
+        cb = _open_breaker()
+        with pytest.raises(UpstreamUnavailable) as raised:
+            async with cb.call():
+                pass
+        assert raised.value.retry_after == 30
+
+        clock.now += settings.breaker_open_seconds
+
+        async def probe() -> None:
+            async with cb.call():
+                await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(probe())
+        await asyncio.sleep(0)
+        assert cb.state == HALF_OPEN and not cb.available()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Cancelling the probe frees its place instead of keeping the breaker stuck half-open
+        assert cb.available()
+
+        async with cb.call():
+            pass
+        assert cb.state == CLOSED
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+import asyncio
+import gzip
+from pathlib import Path
+
+import httpx
+import ujson
+
+from core.cassette import CassetteTransport
+
+
+def _upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"path": request.url.path, "body": request.content.decode()})
+
+
+def test_recorded_traffic_replays(tmp_path: Path):
+    path = tmp_path / "cassette.jsonl.gz"
+
+    async def record() -> None:
+        transport = CassetteTransport(path, "record", inner=httpx.MockTransport(_upstream))
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(
+                *(client.post(f"https://api.example.com/v1/{i}?key=secret", content=f"call {i}") for i in range(20))
+            )
+        assert [r.json()["path"] for r in responses] == [f"/v1/{i}" for i in range(20)]
+        await transport.close()
+
+    async def replay() -> None:
+        transport = CassetteTransport(path, "replay", strict=True)
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.post("https://api.example.com/v1/7?key=other", content="call 7")
+        assert response.json() == {"path": "/v1/7", "body": "call 7"}
+
+    asyncio.run(record())
+
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        lines = [ujson.loads(line) for line in fh]
+    # Every entry queued while recording is on disk once the transport is closed
+    assert "version" in lines[0]
+    assert len(lines) == 21
+    assert not any("secret" in entry["request"]["url"] for entry in lines[1:])
+
+    asyncio.run(replay())
+
+
+def test_closing_without_traffic_writes_the_header(tmp_path: Path):
+    path = tmp_path / "cassette.jsonl.gz"
+
+    async def scenario() -> None:
+        transport = CassetteTransport(path, "record", inner=httpx.MockTransport(_upstream))
+        await transport.close()
+
+    asyncio.run(scenario())
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        assert [ujson.loads(line)["version"] for line in fh] == [1]
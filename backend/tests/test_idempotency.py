@@ -0,0 +1,119 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from core.db import DB_NAME, IDEMPOTENCY_COLLECTION, TASKS_COLLECTION, ensure_indexes
+from core.idempotency import release_idempotency_key, reserve_idempotency_key
+from schemas import TaskStatus
+
+KEY = "key"
+FINGERPRINT = "fingerprint"
+
+
+async def _mongo() -> AsyncMongoMockClient:
+    mongo = AsyncMongoMockClient()
+    await ensure_indexes(mongo)
+    return mongo
+
+
+async def _set_status(mongo: AsyncMongoMockClient, task_id, status: TaskStatus) -> None:
+    await mongo[DB_NAME][TASKS_COLLECTION].update_one(
+        {"task_id": str(task_id)}, {"$set": {"status": status.value}}, upsert=True
+    )
+
+
+def test_a_new_key_is_reserved():
+    async def scenario() -> None:
+        mongo = await _mongo()
+        task_id = uuid4()
+        assert await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, task_id) is None
+
+        record = await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].find_one({"key": KEY})
+        assert record["task_id"] == str(task_id)
+        assert record["fingerprint"] == FINGERPRINT
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("derived", [False, True])
+def test_a_resend_while_the_task_is_in_flight_replays_it(derived: bool):
+    async def scenario() -> None:
+        mongo = await _mongo()
+        first = uuid4()
+        await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, first, derived=derived)
+        await _set_status(mongo, first, TaskStatus.PROCESSING)
+
+        existing = await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, uuid4(), derived=derived)
+        assert existing["task_id"] == str(first)
+        assert await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status", [TaskStatus.FAILED, TaskStatus.CANCELLED])
+def test_a_derived_key_is_taken_over_once_its_task_failed_or_was_cancelled(status: TaskStatus):
+    async def scenario() -> None:
+        mongo = await _mongo()
+        first, second = uuid4(), uuid4()
+        await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, first, derived=True)
+        await _set_status(mongo, first, status)
+
+        assert await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, second, derived=True) is None
+        record = await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].find_one({"key": KEY})
+        assert record["task_id"] == str(second)
+        # The new task owns the key: a further resend replays it
+        existing = await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, uuid4(), derived=True)
+        assert existing["task_id"] == str(second)
+
+    asyncio.run(scenario())
+
+
+def test_a_header_key_replays_a_failed_task():
+    async def scenario() -> None:
+        mongo = await _mongo()
+        first = uuid4()
+        await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, first)
+        await _set_status(mongo, first, TaskStatus.FAILED)
+
+        existing = await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, uuid4())
+        assert existing["task_id"] == str(first)
+
+    asyncio.run(scenario())
+
+
+def test_an_expired_key_is_taken_over():
+    async def scenario() -> None:
+        # Only the unique index: mongomock applies TTL indexes on reads, while the TTL monitor runs once a minute
+        mongo = AsyncMongoMockClient()
+        await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].create_index("key", unique=True)
+        first, second = uuid4(), uuid4()
+        await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, first)
+        await _set_status(mongo, first, TaskStatus.PROCESSING)
+        # Past its expiry but not yet removed by the TTL monitor
+        await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].update_one(
+            {"key": KEY}, {"$set": {"expires_at": datetime.now(UTC) - timedelta(seconds=1)}}
+        )
+
+        assert await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, second) is None
+        record = await mongo[DB_NAME][IDEMPOTENCY_COLLECTION].find_one({"key": KEY})
+        assert record["task_id"] == str(second)
+
+    asyncio.run(scenario())
+
+
+def test_a_released_key_can_be_reserved_again():
+    async def scenario() -> None:
+        mongo = await _mongo()
+        first, second = uuid4(), uuid4()
+        await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, first)
+        # Releasing with another task's id leaves the key alone
+        await release_idempotency_key(mongo, KEY, second)
+        assert (await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, uuid4()))["task_id"] == str(first)
+
+        await release_idempotency_key(mongo, KEY, first)
+        assert await reserve_idempotency_key(mongo, KEY, FINGERPRINT, 60, second) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,154 @@
+import asyncio
+
+from core.scheduler import BULK, INTERACTIVE, LaneScheduler
+
+
+def _scheduler(capacity: int = 1, reserved: int = 0, interactive_weight: float = 4.0) -> LaneScheduler:
+    return LaneScheduler("test", capacity, reserved, {INTERACTIVE: interactive_weight, BULK: 1.0})
+
+
+async def _grant_order(scheduler: LaneScheduler, lanes: list[str]) -> list[str]:
+    """Queues one job per lane in ``lanes`` behind a held slot, then returns the order the slots were granted in."""
+    order: list[str] = []
+
+    async def job(lane: str) -> None:
+        async with scheduler.slot(lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire(INTERACTIVE)
+    jobs = [asyncio.ensure_future(job(lane)) for lane in lanes]
+    await asyncio.sleep(0)
+    scheduler.release(INTERACTIVE)
+    await asyncio.gather(*jobs)
+    return order
+
+
+def test_weights_set_the_share_of_slots_under_contention():
+    scheduler = _scheduler(interactive_weight=4.0)
+    order = asyncio.run(_grant_order(scheduler, [BULK] * 20 + [INTERACTIVE] * 20))
+
+    # While both lanes wait, interactive work gets 4 slots for each bulk one
+    assert order[:10].count(INTERACTIVE) == 8
+    assert order[:10].count(BULK) == 2
+    assert sorted(order) == sorted([BULK] * 20 + [INTERACTIVE] * 20)
+    assert scheduler.active == {INTERACTIVE: 0, BULK: 0}
+
+
+def test_equal_weights_alternate():
+    order = asyncio.run(_grant_order(_scheduler(interactive_weight=1.0), [BULK] * 4 + [INTERACTIVE] * 4))
+
+    assert order.count(INTERACTIVE) == 4
+    assert all(order[i] != order[i + 1] for i in range(len(order) - 1))
+
+
+def test_interactive_work_gets_the_reserved_slot_while_bulk_fills_the_rest():
+    async def scenario() -> None:
+        scheduler = _scheduler(capacity=4, reserved=1)
+        for _ in range(3):
+            await scheduler.acquire(BULK)
+        # Bulk can't take the reserved slot...
+        waiting_bulk = asyncio.ensure_future(scheduler.acquire(BULK))
+        await asyncio.sleep(0)
+        assert not waiting_bulk.done()
+        # ...so an interactive request doesn't queue behind it
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE), timeout=1)
+        assert scheduler.active == {INTERACTIVE: 1, BULK: 3}
+        waiting_bulk.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_interactive_work_goes_first_when_a_slot_frees_up():
+    async def scenario() -> list[str]:
+        scheduler = _scheduler(capacity=2, reserved=1)
+        await scheduler.acquire(BULK)
+        await scheduler.acquire(INTERACTIVE)
+        order: list[str] = []
+
+        async def job(lane: str) -> None:
+            await scheduler.acquire(lane)
+            order.append(lane)
+
+        jobs = [asyncio.ensure_future(job(BULK)) for _ in range(5)]
+        await asyncio.sleep(0)
+        jobs.append(asyncio.ensure_future(job(INTERACTIVE)))
+        await asyncio.sleep(0)
+        scheduler.release(INTERACTIVE)
+        await asyncio.sleep(0)
+        for task in jobs:
+            task.cancel()
+        return order
+
+    assert asyncio.run(scenario()) == [INTERACTIVE]
+
+
+def test_cancelled_waiter_gives_its_place_back():
+    async def scenario() -> None:
+        scheduler = _scheduler()
+        await scheduler.acquire(BULK)
+        waiter = asyncio.ensure_future(scheduler.acquire(BULK))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release(BULK)
+
+        assert scheduler.active == {INTERACTIVE: 0, BULK: 0}
+        await asyncio.wait_for(scheduler.acquire(BULK), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_after_its_grant_hands_the_slot_on():
+    async def scenario() -> None:
+        scheduler = _scheduler()
+        await scheduler.acquire(BULK)
+        granted_then_cancelled = asyncio.ensure_future(scheduler.acquire(BULK))
+        next_in_line = asyncio.ensure_future(scheduler.acquire(BULK))
+        await asyncio.sleep(0)
+        # The release grants the first waiter's future; it is cancelled before it gets to run
+        scheduler.release(BULK)
+        granted_then_cancelled.cancel()
+        await asyncio.gather(granted_then_cancelled, return_exceptions=True)
+
+        await asyncio.wait_for(next_in_line, timeout=1)
+        assert scheduler.active == {INTERACTIVE: 0, BULK: 1}
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_slot_wait_frees_nothing_it_did_not_hold():
+    async def scenario() -> None:
+        scheduler = _scheduler()
+        await scheduler.acquire(INTERACTIVE)
+        try:
+            async with asyncio.timeout(0.01):
+                async with scheduler.slot(BULK):
+                    raise AssertionError("slot granted while the only one is held")
+        except TimeoutError:
+            pass
+        assert scheduler.active == {INTERACTIVE: 1, BULK: 0}
+        scheduler.release(INTERACTIVE)
+        await asyncio.wait_for(scheduler.acquire(BULK), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_slot_is_released_when_the_work_is_cancelled():
+    async def scenario() -> None:
+        scheduler = _scheduler()
+        started = asyncio.Event()
+
+        async def job() -> None:
+            async with scheduler.slot(BULK):
+                started.set()
+                await asyncio.sleep(60)
+
+        running = asyncio.ensure_future(job())
+        await started.wait()
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+
+        assert scheduler.active == {INTERACTIVE: 0, BULK: 0}
+
+    asyncio.run(scenario())
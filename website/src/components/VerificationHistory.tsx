@@ -47,7 +47,8 @@ interface TaskStatusResponse {
     | "summarizing"
     | "fact_checking"
     | "completed"
-    | "failed";
+    | "failed"
+    | "cancelled";
   message: string;
   result?: FactCheckResult;
   created_at: string;
@@ -572,7 +572,7 @@ const getStepStatus = (
 ): StepStatus => {
   if (stepIndex < currentStep) return "finish";
   if (stepIndex === currentStep) {
-    if (status === "failed") return "error";
+    if (status === "failed" || status === "cancelled") return "error";
     if (status === "completed") return "finish";
     return "process";
   }
@@ -586,7 +586,8 @@ const getStepIcon = (
 ) => {
   if (stepIndex < currentStep) return <CheckCircleOutlined />;
   if (stepIndex === currentStep) {
-    if (status === "failed") return <CloseCircleOutlined />;
+    if (status === "failed" || status === "cancelled")
+      return <CloseCircleOutlined />;
     if (status === "completed") return <CheckCircleOutlined />;
     return <LoadingOutlined />;
   }
@@ -606,6 +607,7 @@ const getStepFromStatus = (status: TaskStatus): number => {
     case "completed":
       return 4;
     case "failed":
+    case "cancelled":
       return -1;
     default:
       return 0;
@@ -639,8 +641,12 @@ export const FactCheckTaskComponent: React.FC<FactCheckTaskProps> = ({
         onTaskComplete(data.result);
       }
 
-      // Stop polling if task is completed or failed
-      if (data.status === "completed" || data.status === "failed") {
+      // Stop polling once the task has finished
+      if (
+        data.status === "completed" ||
+        data.status === "failed" ||
+        data.status === "cancelled"
+      ) {
         return true; // Stop polling
       }
 
@@ -884,9 +890,14 @@ export const FactCheckTaskComponent: React.FC<FactCheckTaskProps> = ({
           </div>
         </div>
 
-        {taskStatus?.status === "failed" && (
+        {(taskStatus?.status === "failed" ||
+          taskStatus?.status === "cancelled") && (
           <Alert
-            message="Analysis Failed"
+            message={
+              taskStatus.status === "cancelled"
+                ? "Analysis Cancelled"
+                : "Analysis Failed"
+            }
             description={taskStatus.message}
             type="error"
             showIcon
@@ -901,7 +912,12 @@ export const FactCheckTaskComponent: React.FC<FactCheckTaskProps> = ({
         <Steps
           direction="vertical"
           current={Math.max(0, currentStep)}
-          status={taskStatus?.status === "failed" ? "error" : "process"}
+          status={
+            taskStatus?.status === "failed" ||
+            taskStatus?.status === "cancelled"
+              ? "error"
+              : "process"
+          }
           items={stepsWithStatus.map((step, index) => ({
             ...step,
             description: (
@@ -940,7 +956,9 @@ export const FactCheckTaskComponent: React.FC<FactCheckTaskProps> = ({
             </Button>
           )}
 
-          {(taskStatus?.status === "failed" || error) && (
+          {(taskStatus?.status === "failed" ||
+            taskStatus?.status === "cancelled" ||
+            error) && (
             <Button
               onClick={resetForm}
               type="primary"
@@ -5,7 +5,8 @@ export type TaskStatus =
   | "fact_checking"
   | "completed"
   | "failed"
-  | "skipped";
+  | "skipped"
+  | "cancelled";
 
 export interface FactCheckTask {
   task_id: string;